@@ -6,39 +6,390 @@ imag -- the imaginary part (default 0.0)
 """
 # import main Flask class and request object
 import ast
+import atexit
+import hashlib
 import json
-from flask import Flask, request, render_template
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, Response, request, render_template
 from flask_cors import CORS
-from evaluation.eval_graph import evaluate
+from evaluation import codec
+from evaluation.batch import evaluate_many
+from evaluation.building import evaluate_building
+from evaluation.cache import EvaluationCache, fields_key
+from evaluation.dispatch import Dispatcher, Overloaded, Timeout
+from evaluation.eval_graph import ENGINES, RESULT_FIELDS, result_to_dict
+from evaluation.eval_vector import evaluate_arrays
+from evaluation.live import LiveSessions
+from evaluation.profiling import Metrics, Profile
+from evaluation.reachability import evaluate_reachability
+from evaluation.validate import validate_arrays, validate_plan
+from evaluation.variants import evaluate_variants
 
 
 app = Flask(__name__, static_folder='../webapp/frontend/build', static_url_path='')
+# Number of processes evaluating batch requests, defaults to the CPU count.
+app.config['BATCH_WORKERS'] = int(os.environ.get('AUG_BATCH_WORKERS', 0)) or None
+# Async mode: with AUG_ASYNC_WORKERS set, single evaluations run on a pool of
+# that many processes instead of the request thread. At most
+# AUG_ASYNC_MAX_PENDING distinct plans are evaluated at once, more get 429,
+# and a request waits AUG_ASYNC_TIMEOUT seconds before getting 504.
+app.config['ASYNC_WORKERS'] = int(os.environ.get('AUG_ASYNC_WORKERS', 0))
+app.config['ASYNC_MAX_PENDING'] = int(os.environ.get('AUG_ASYNC_MAX_PENDING',
+                                                     64))
+app.config['ASYNC_TIMEOUT'] = float(os.environ.get('AUG_ASYNC_TIMEOUT', 30))
+# Live sessions are dropped after AUG_LIVE_TTL idle seconds, and their events
+# wait AUG_LIVE_DEBOUNCE seconds for further edits before reporting scores.
+app.config['LIVE_TTL'] = float(os.environ.get('AUG_LIVE_TTL', 600))
+app.config['LIVE_DEBOUNCE'] = float(os.environ.get('AUG_LIVE_DEBOUNCE', 0.1))
 CORS(app)
 
-@app.route('/data_server/evaluation')
+# Results of recently evaluated plans, optionally persisted to
+# AUG_CACHE_PATH when the service exits.
+cache = EvaluationCache(maxsize=int(os.environ.get('AUG_CACHE_SIZE', 1024)),
+                        path=os.environ.get('AUG_CACHE_PATH'))
+if cache.path:
+    atexit.register(cache.save)
+
+# Timings and sizes of the evaluations served, see /metrics.
+metrics = Metrics()
+
+# Floor plans edited through the live evaluation endpoints.
+live_sessions = LiveSessions(ttl=app.config['LIVE_TTL'],
+                             debounce=app.config['LIVE_DEBOUNCE'])
+
+# Process pool of the batch endpoint, started on first use.
+_batch_executor = None
+
+
+def _get_batch_executor():
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ProcessPoolExecutor(
+            max_workers=app.config['BATCH_WORKERS'])
+    return _batch_executor
+
+
+# Dispatcher of the async mode, started on first use.
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def _get_dispatcher():
+    """Returns the async mode dispatcher, None when async mode is off."""
+    global _dispatcher
+    if not app.config['ASYNC_WORKERS']:
+        return None
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher(
+                ProcessPoolExecutor(max_workers=app.config['ASYNC_WORKERS']),
+                max_pending=app.config['ASYNC_MAX_PENDING'],
+                timeout=app.config['ASYNC_TIMEOUT'], cache=cache)
+    return _dispatcher
+
+
+def _format_scores(result):
+    """Formats evaluation scores as served, every value as a string."""
+    return _format_dict(result_to_dict(result))
+
+
+def _format_dict(scores):
+    return {key: str(val) for key, val in scores.items()}
+
+
+@app.route('/data_server/evaluation', methods=['GET', 'POST'])
 def evaluate_graph():
     """Backend function to be called.
 
+    GET reads the floor plan from the 'floor_plan' query parameter. POST
+    reads it from the body, either as application/json or in the binary
+    format of evaluation.codec (application/x-floor-plan). The optional
+    'engine' query parameter selects the evaluation engine, binary bodies
+    are evaluated by the 'vector' engine unless told otherwise. With the
+    'profile' query parameter set, the response also holds the timings and
+    counts of the evaluation.
+
+    The optional 'fields' query parameter, a comma separated list of
+    evaluation.eval_graph.RESULT_FIELDS, restricts the response to those
+    values, served as JSON numbers instead of strings. Values that do not
+    need it, like size_score and the areas, skip the adjacency graph.
+
+    Plans are validated first, a plan that cannot be evaluated gets 400
+    with the report of evaluation.validate.ValidationReport.as_dict(). An
+    unknown engine gets 400 as well.
+
+    In async mode the evaluation runs on the dispatcher's process pool and
+    the profile only holds the time spent waiting for it. The response is
+    429 when too many evaluations are pending and 504 when the evaluation
+    did not finish in time.
+
     Returns:
         Evaluation score: A dictionary to be dumped as a string.
     """
-    floor_plan_json = request.args.get('floor_plan')
-    floor_plan_json = ast.literal_eval(floor_plan_json)
-    score_final, total_area, total_usable_area, total_used_area = evaluate(
-        floor_plan_json)
-    (align_score, size_score, desired_size, lounge_score, hallway_access_score,
-     work_ext_score, meet_score, hallway_num) = score_final
-    return json.dumps({'align_score': str(align_score),
-                       'size_score': str(size_score),
-                       'desired_size': str(desired_size),
-                       'lounge_score': str(lounge_score),
-                       'hallway_access_score': str(hallway_access_score),
-                       'work_ext_score': str(work_ext_score),
-                       'meet_score': str(meet_score),
-                       'hallway_number': str(hallway_num),
-                       'total_area': str(total_area),
-                       'total_usable_area': str(total_usable_area),
-                       'total_used_area': str(total_used_area)})
+    engine = request.args.get('engine')
+    if engine and engine not in ENGINES:
+        return json.dumps({'error': 'Invalid engine: %s.' % engine}), 400
+    fields = None
+    if request.args.get('fields'):
+        fields = set(request.args['fields'].split(','))
+        unknown = sorted(fields.difference(RESULT_FIELDS))
+        if unknown:
+            return json.dumps({'error': 'Invalid fields: %s.'
+                               % ', '.join(unknown)}), 400
+    profile = Profile()
+    coords = codes = None
+    with profile.time('parse'):
+        if request.method == 'GET':
+            floor_plan_json = request.args.get('floor_plan')
+            floor_plan_json = ast.literal_eval(floor_plan_json)
+        elif request.mimetype == codec.CONTENT_TYPE:
+            try:
+                coords, codes = codec.decode_arrays(request.get_data())
+            except ValueError as e:
+                return json.dumps({'error': str(e)}), 400
+            if (engine or 'vector') != 'vector':
+                floor_plan_json = codec.arrays_to_plan(coords, codes)
+            else:
+                floor_plan_json = None
+        else:
+            floor_plan_json = request.get_json(force=True)
+    with profile.time('validate'):
+        if floor_plan_json is None and coords is not None:
+            report = validate_arrays(coords, codes)
+        elif not isinstance(floor_plan_json, dict):
+            return json.dumps({'error': 'Expected a floor plan.'}), 400
+        else:
+            report = validate_plan(floor_plan_json)
+    if not report.ok:
+        return json.dumps(report.as_dict()), 400
+    dispatcher = _get_dispatcher()
+    if dispatcher is None:
+        if floor_plan_json is None:
+            result = evaluate_arrays(coords, codes, profile=profile,
+                                     fields=fields)
+        else:
+            result = cache.evaluate(floor_plan_json,
+                                    engine=engine or 'graph', profile=profile,
+                                    fields=fields)
+    else:
+        try:
+            with profile.time('dispatch'):
+                if floor_plan_json is None:
+                    key = 'arrays:' + hashlib.sha256(
+                        request.get_data()).hexdigest()
+                    if fields is not None:
+                        key = fields_key(key, fields)
+                    result = cache.get(key)
+                    if result is None:
+                        result = dispatcher.run(key, evaluate_arrays, coords,
+                                                codes, None, fields)
+                else:
+                    result = dispatcher.evaluate(floor_plan_json,
+                                                 engine=engine or 'graph',
+                                                 fields=fields)
+        except Overloaded as e:
+            return json.dumps({'error': str(e)}), 429, {'Retry-After': '1'}
+        except Timeout as e:
+            return json.dumps({'error': str(e)}), 504
+    metrics.observe(profile)
+    scores = result if fields is not None else _format_scores(result)
+    if request.args.get('profile'):
+        scores['profile'] = profile.as_dict()
+    return json.dumps(scores)
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Serves evaluation and cache metrics in Prometheus text format."""
+    gauges = {'cache_' + key: val for key, val in cache.stats().items()}
+    if _dispatcher is not None:
+        gauges.update(('dispatch_' + key, val)
+                      for key, val in _dispatcher.stats().items())
+    return Response(metrics.render(gauges),
+                    mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/data_server/evaluation/batch', methods=['POST'])
+def evaluate_graph_batch():
+    """Evaluates a JSON list of floor plans on the batch process pool.
+
+    Returns:
+        A JSON list with, in the order of the input plans, either the
+        evaluation score dictionary or {'error': message} for plans that
+        could not be evaluated.
+    """
+    plans = request.get_json()
+    if not isinstance(plans, list):
+        return json.dumps({'error': 'Expected a JSON list of floor plans.'}), 400
+    results = []
+    for scores, error in evaluate_many(plans,
+                                       executor=_get_batch_executor()):
+        results.append({'error': error} if error else _format_scores(scores))
+    return json.dumps(results)
+
+@app.route('/data_server/evaluation/building', methods=['POST'])
+def evaluate_graph_building():
+    """Evaluates a JSON list of the floor plans of a building.
+
+    Identical floors are evaluated once, on the batch process pool. The
+    optional 'engine' query parameter selects the evaluation engine.
+
+    Returns:
+        {'floors': a list with, in the order of the input floors, either
+        the evaluation score dictionary or {'error': message}, 'building':
+        the building aggregates, see evaluation.building.aggregate_floors}.
+    """
+    floors = request.get_json()
+    if not isinstance(floors, list):
+        return json.dumps({'error': 'Expected a JSON list of floor plans.'}), 400
+    engine = request.args.get('engine') or 'graph'
+    if engine not in ENGINES:
+        return json.dumps({'error': 'Invalid engine: %s.' % engine}), 400
+    floor_results, building = evaluate_building(
+        floors, engine=engine, executor=_get_batch_executor(), cache=cache)
+    return json.dumps({
+        'floors': [{'error': error} if error else _format_scores(scores)
+                   for scores, error in floor_results],
+        'building': _format_dict(building)})
+
+
+@app.route('/data_server/evaluation/validate', methods=['POST'])
+def validate_floor_plan():
+    """Validates a JSON floor plan without evaluating it.
+
+    Returns:
+        The report of evaluation.validate.ValidationReport.as_dict(): the
+        invalid program types, values and rooms, the types that cannot be
+        scored, and every pair of overlapping rooms with its overlap area.
+    """
+    floor_plan_json = request.get_json(force=True)
+    if not isinstance(floor_plan_json, dict):
+        return json.dumps({'error': 'Expected a floor plan.'}), 400
+    return json.dumps(validate_plan(floor_plan_json).as_dict())
+
+
+@app.route('/data_server/evaluation/reachability', methods=['POST'])
+def evaluate_graph_reachability():
+    """Calculates the egress metrics of a JSON floor plan.
+
+    Returns:
+        The dictionary of evaluation.reachability.reachability, with the
+        hop distance from the largest ENTRANCE of every room in the order
+        of the plan's program types and rooms.
+    """
+    floor_plan_json = request.get_json(force=True)
+    try:
+        metrics_dict = evaluate_reachability(floor_plan_json)
+    except (AssertionError, AttributeError, TypeError, ValueError) as e:
+        return json.dumps({'error': '%s: %s' % (type(e).__name__, e)}), 400
+    return json.dumps(metrics_dict)
+
+
+@app.route('/data_server/evaluation/variants', methods=['POST'])
+def evaluate_graph_variants():
+    """Evaluates variants of a floor plan against it.
+
+    The body is {'base': floor plan, 'variants': a list of lists of room
+    diffs}, see evaluation.variants.VariantSet.evaluate. The rooms of the
+    base plan have the ids 0..n-1, in the order of the plan.
+
+    Returns:
+        {'base': evaluation score dictionary, 'variants': a list with, in
+        the order of the input variants, either {'scores': evaluation score
+        dictionary, 'deltas': difference of the scores to the base ones} or
+        {'error': message}}.
+    """
+    body = request.get_json(force=True)
+    if (not isinstance(body, dict) or
+            not isinstance(body.get('variants'), list)):
+        return json.dumps({'error': 'Expected a base plan and variants.'}), 400
+    try:
+        comparison = evaluate_variants(body.get('base'), body['variants'])
+    except (AssertionError, AttributeError, KeyError, TypeError) as e:
+        return json.dumps({'error': 'Invalid floor plan: %s' % e}), 400
+    return json.dumps({
+        'base': _format_dict(comparison['base']),
+        'variants': [row if 'error' in row else
+                     {'scores': _format_dict(row['scores']),
+                      'deltas': _format_dict(row['deltas'])}
+                     for row in comparison['variants']]})
+
+
+@app.route('/data_server/evaluation/live', methods=['POST'])
+def create_live_session():
+    """Opens a live evaluation session on the JSON floor plan of the body.
+
+    The rooms of the plan get the ids 0..n-1, in the order of the plan.
+
+    Returns:
+        {'session': session id, 'scores': evaluation score dictionary}.
+    """
+    try:
+        session_id, session = live_sessions.create(request.get_json(force=True))
+    except (AssertionError, AttributeError, KeyError, TypeError) as e:
+        return json.dumps({'error': 'Invalid floor plan: %s' % e}), 400
+    return json.dumps({'session': session_id,
+                       'scores': _format_dict(session.scores())})
+
+
+@app.route('/data_server/evaluation/live/<session_id>',
+           methods=['POST', 'DELETE'])
+def edit_live_session(session_id):
+    """Applies the JSON list of room diffs of the body to a live session.
+
+    See evaluation.live.LiveSession.apply for the diffs. The changed scores
+    are pushed to the events stream of the session, or returned right away
+    when the 'scores' query parameter is set. DELETE closes the session.
+
+    Returns:
+        {'ids': ids of the added rooms, 'version': number of edits so far}
+        and 'scores', the changed scores, if asked for.
+    """
+    session = live_sessions.get(session_id)
+    if session is None:
+        return json.dumps({'error': 'Unknown live session.'}), 404
+    if request.method == 'DELETE':
+        live_sessions.close(session_id)
+        return json.dumps({})
+    diffs = request.get_json(force=True)
+    if not isinstance(diffs, list):
+        return json.dumps({'error': 'Expected a JSON list of diffs.'}), 400
+    try:
+        added = session.apply(diffs)
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+    response = {'ids': added, 'version': session.version}
+    if request.args.get('scores'):
+        response['scores'] = _format_dict(session.changed_scores())
+    return json.dumps(response)
+
+
+@app.route('/data_server/evaluation/live/<session_id>/events')
+def live_session_events(session_id):
+    """Streams the changed scores of a live session as server-sent events.
+
+    Every event follows a burst of edits and holds
+    {'version': number of edits so far, 'scores': the changed scores}. The
+    stream ends once the session is closed or expires.
+    """
+    session = live_sessions.get(session_id)
+    if session is None:
+        return json.dumps({'error': 'Unknown live session.'}), 404
+
+    def stream():
+        for event in live_sessions.events(session_id):
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                version, changed = event
+                yield 'data: %s\n\n' % json.dumps(
+                    {'version': version, 'scores': _format_dict(changed)})
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 
 def server():
     return send_from_directory(app.static_folder, 'index.html')
@@ -0,0 +1,106 @@
+"""Benchmarks evaluate() on synthetic floor plans of growing size.
+
+Measures latency percentiles, throughput and peak memory for every room
+count and engine, and can compare them to a stored baseline:
+
+    python benchmark.py --sizes 10,100,1000 --save-baseline baseline.json
+    python benchmark.py --sizes 10,100,1000 --baseline baseline.json
+
+The comparison exits with status 1 when the median latency of a case grew
+by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+from evaluation.eval_graph import evaluate
+from evaluation.synthetic import generate_plan
+
+
+def run_case(num_rooms, engine, repeat, seed=0):
+    """Benchmarks one room count and engine.
+
+    Returns:
+        A dictionary of latency percentiles in seconds, throughput in plans
+        per second and peak traced memory in bytes.
+    """
+    plan = generate_plan(num_rooms, seed=seed)
+    evaluate(plan, engine=engine)  # Warm up.
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluate(plan, engine=engine)
+        latencies.append(time.perf_counter() - start)
+
+    # Traced separately as tracemalloc slows down the evaluation.
+    tracemalloc.start()
+    evaluate(plan, engine=engine)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {'rooms': num_rooms, 'engine': engine,
+            'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'throughput': repeat / sum(latencies),
+            'peak_memory': peak_memory}
+
+
+def compare(results, baseline, tolerance):
+    """Returns the cases whose median latency regressed past tolerance."""
+    previous = {(case['rooms'], case['engine']): case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get((case['rooms'], case['engine']))
+        if old and case['p50'] > old['p50'] * (1 + tolerance):
+            regressions.append((case, old))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='10,100,1000',
+                        help='comma separated room counts')
+    parser.add_argument('--engines', default='graph,vector',
+                        help='comma separated evaluation engines')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed evaluations per case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--save-baseline', help='file to store results in')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative growth of the median latency')
+    args = parser.parse_args(argv)
+
+    results = []
+    print('%8s %8s %10s %10s %10s %12s %12s' % (
+        'rooms', 'engine', 'p50 ms', 'p90 ms', 'p99 ms', 'plans/s',
+        'peak MiB'))
+    for num_rooms in [int(size) for size in args.sizes.split(',')]:
+        for engine in args.engines.split(','):
+            case = run_case(num_rooms, engine, args.repeat, seed=args.seed)
+            results.append(case)
+            print('%8d %8s %10.2f %10.2f %10.2f %12.1f %12.2f' % (
+                num_rooms, engine, case['p50'] * 1e3, case['p90'] * 1e3,
+                case['p99'] * 1e3, case['throughput'],
+                case['peak_memory'] / 2 ** 20))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for case, old in regressions:
+            print('REGRESSION rooms=%d engine=%s p50 %.2f ms -> %.2f ms' % (
+                case['rooms'], case['engine'], old['p50'] * 1e3,
+                case['p50'] * 1e3))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
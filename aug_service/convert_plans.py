@@ -0,0 +1,55 @@
+"""Converts floor plans to a memory-mapped dataset.
+
+Reads floor plan JSON files, directories of them, or NDJSON files with one
+plan per line, and writes them in order to a dataset directory, see
+evaluation.dataset:
+
+    python convert_plans.py ../test_data -o plans.dataset
+    python convert_plans.py plans.ndjson -o plans.dataset --float32
+
+The dataset is then scored without any JSON parsing with
+python score_plans.py --dataset plans.dataset.
+"""
+import argparse
+import json
+import os
+import sys
+from evaluation.dataset import write_dataset
+
+
+def read_plans(paths):
+    """Yields the plans of JSON files, directories of JSON files and NDJSON
+    files, in order."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from read_plans(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith('.json')))
+        elif path.endswith('.json'):
+            with open(path) as f:
+                yield json.load(f)
+        else:
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='+',
+                        help='JSON files, directories or NDJSON files')
+    parser.add_argument('-o', '--output', required=True,
+                        help='dataset directory')
+    parser.add_argument('--float32', action='store_true',
+                        help='store float32 coordinates')
+    args = parser.parse_args(argv)
+
+    count = write_dataset(args.output, read_plans(args.paths),
+                          dtype='f' if args.float32 else 'd')
+    sys.stderr.write('Wrote %d plans to %s\n' % (count, args.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Adjacency engine that only compares rooms whose sides share a line.
+
+Two rooms can only be adjacent when a side of one lies on the same
+coordinate line as the opposite side of the other, e.g. rec2's x_max equals
+rec1's x_min. EdgeIndex buckets every room side by that coordinate so each
+room is compared against the rooms of four buckets instead of every other
+room in the plan.
+
+The ratios follow intersect_edge_ratio exactly, so the resulting edges are
+identical to the pairwise builder in eval_graph.
+
+snap_adjacency is the tolerant alternative for unrounded CAD coordinates:
+sides are hashed by their coordinate snapped to a grid of the tolerance, so
+sides within tolerance of each other are found in neighbouring cells, and
+the ratio is the true overlap of the two sides.
+"""
+import math
+from evaluation.profiling import NULL_PROFILE
+
+# Default distance within which two coordinates of snap_adjacency match.
+DEFAULT_TOLERANCE = 1e-6
+
+# Direction in which rec2 lies, seen from rec1.
+DIRECTIONS = ('right', 'left', 'up', 'bottom')
+
+# Direction in which rec1 lies, seen from rec2.
+OPPOSITE = {'right': 'left', 'left': 'right', 'up': 'bottom', 'bottom': 'up'}
+
+# Index of each direction in DIRECTIONS.
+DIRECTION_INDEX = {direction: k for k, direction in enumerate(DIRECTIONS)}
+
+
+def _side_ratio(rec1, rec2, direction):
+    """Common edge ratio of two rectangles known to share a side line.
+
+    Mirrors the arithmetic of intersect_edge_ratio without its validation,
+    so callers must have checked both rectangles beforehand.
+
+    Args:
+        rec1: rectangle 1, [x_min, y_min, x_max, y_max].
+        rec2: rectangle 2, lying on the `direction` side line of rec1.
+        direction: one of DIRECTIONS.
+    Returns:
+        The common edge ratio, 0 when the rectangles only touch at a corner.
+    """
+    if direction == 'left' or direction == 'right':
+        length = rec1[3] - rec1[1]
+        intersect = min(abs(rec1[3] - rec2[1]), abs(rec1[1] - rec2[3]),
+                        length, rec2[3] - rec2[1])
+    else:
+        length = rec1[2] - rec1[0]
+        intersect = min(abs(rec1[2] - rec2[0]), abs(rec1[0] - rec2[2]),
+                        length, rec2[2] - rec2[0])
+    if length != 0 and intersect != 0:
+        return intersect / length
+    return 0
+
+
+def covered_length(intervals):
+    """Returns the length of the union of (lo, hi) intervals.
+
+    Sorts intervals in place.
+    """
+    if len(intervals) > 1:
+        intervals.sort()
+    covered = 0
+    end = None
+    for lo, hi in intervals:
+        if end is None or lo > end:
+            covered += hi - lo
+            end = hi
+        elif hi > end:
+            covered += hi - end
+            end = hi
+    return covered
+
+
+def exposed_lengths(shape, neighbors, shapes):
+    """Calculates the length of each side of a room not touched by another.
+
+    Unlike the residual of the common edge ratios, this is the true
+    uncovered length: neighbors that only share the side line do not
+    count, and neighbors that overlap one another along the side are not
+    counted twice.
+
+    Args:
+        shape: rectangle of the room, [x_min, y_min, x_max, y_max].
+        neighbors: the (j, direction, ratio) common edges of the room.
+        shapes: rectangles of all rooms, indexed by j.
+    Returns:
+        A tuple of the exposed length of each side, in DIRECTIONS order.
+    """
+    x_min, y_min, x_max, y_max = shape
+    covers = ([], [], [], [])
+    for j, direction, _ in neighbors:
+        k = DIRECTION_INDEX[direction]
+        other = shapes[j]
+        # Right and left sides run along y, up and bottom sides along x.
+        if k < 2:
+            lo = other[1] if other[1] > y_min else y_min
+            hi = other[3] if other[3] < y_max else y_max
+        else:
+            lo = other[0] if other[0] > x_min else x_min
+            hi = other[2] if other[2] < x_max else x_max
+        if hi > lo:
+            covers[k].append((lo, hi))
+    return side_exposure(shape, covers)
+
+
+def side_exposure(shape, covers):
+    """Returns the exposed length of each side of shape given the (lo, hi)
+    intervals covering each side, in DIRECTIONS order."""
+    height = shape[3] - shape[1]
+    width = shape[2] - shape[0]
+    return (height - covered_length(covers[0]),
+            height - covered_length(covers[1]),
+            width - covered_length(covers[2]),
+            width - covered_length(covers[3]))
+
+
+class EdgeIndex:
+    """Rooms bucketed by the coordinate lines their four sides lie on.
+
+    Attributes:
+        shapes: a dictionary of room index to rectangle.
+        num_comparisons: number of candidate pairs compared so far.
+    """
+
+    def __init__(self, shapes=()):
+        """Inits the index with a sequence of rectangles, indexed 0..n-1."""
+        self.shapes = {}
+        self.num_comparisons = 0
+        # Buckets of x_min, y_min, x_max, y_max. Each bucket is a dictionary
+        # used as an insertion ordered set of room indexes.
+        self._buckets = ({}, {}, {}, {})
+        for i, shape in enumerate(shapes):
+            self.add(i, shape)
+
+    def add(self, i, shape):
+        """Adds room i with the given rectangle."""
+        assert i not in self.shapes, "Room already indexed."
+        self.shapes[i] = shape
+        for bucket, coord in zip(self._buckets, shape):
+            bucket.setdefault(coord, {})[i] = None
+
+    def remove(self, i):
+        """Removes room i and returns its rectangle."""
+        shape = self.shapes.pop(i)
+        for bucket, coord in zip(self._buckets, shape):
+            members = bucket[coord]
+            del members[i]
+            if not members:
+                del bucket[coord]
+        return shape
+
+    def candidates(self, i):
+        """Yields (direction, j) for every room j sharing a side line with i.
+
+        Only the line is shared, the rooms may still be far apart along it.
+        """
+        xmin_bucket, ymin_bucket, xmax_bucket, ymax_bucket = self._buckets
+        x_min, y_min, x_max, y_max = self.shapes[i]
+        for direction, bucket, coord in (('right', xmin_bucket, x_max),
+                                         ('left', xmax_bucket, x_min),
+                                         ('up', ymin_bucket, y_max),
+                                         ('bottom', ymax_bucket, y_min)):
+            for j in bucket.get(coord, ()):
+                if j != i:
+                    yield direction, j
+
+    def ratio(self, i, j, direction):
+        """Returns the common edge ratio of room i with room j, which lies on
+        the `direction` side line of i."""
+        return _side_ratio(self.shapes[i], self.shapes[j], direction)
+
+    def neighbors(self, i):
+        """Returns the adjacency of room i.
+
+        Returns:
+            A list of (j, direction, ratio) sorted by j, holding every room
+            j with a non-zero common edge ratio seen from room i.
+        """
+        rec1 = self.shapes[i]
+        edges = []
+        for direction, j in self.candidates(i):
+            self.num_comparisons += 1
+            ratio = _side_ratio(rec1, self.shapes[j], direction)
+            if ratio:
+                edges.append((j, direction, ratio))
+        edges.sort(key=lambda edge: edge[0])
+        return edges
+
+
+def bucket_adjacency(shapes, profile=NULL_PROFILE):
+    """Calculates adjacency of all rooms through an EdgeIndex.
+
+    Args:
+        shapes: a list of rectangles, x_min, y_min, x_max, y_max.
+        profile: a profiling.Profile counting the compared pairs.
+    Returns:
+        A list holding for each room a list of (j, direction, ratio) sorted
+        by j.
+    """
+    for rec in shapes:
+        assert len(rec) == 4, "Invalid input rectangle."
+        assert rec[0] < rec[2], "Invalid input rectangle: x_min < x_max"
+        assert rec[1] < rec[3], "Invalid input rectangle: y_min < y_max"
+    index = EdgeIndex(shapes)
+    adjacency = [index.neighbors(i) for i in range(len(shapes))]
+    profile.count('pair_comparisons', index.num_comparisons)
+    return adjacency
+
+
+def _overlap_ratio(rec1, rec2, direction, tolerance):
+    """Ratio of the side of rec1 that rec2, lying in direction, overlaps.
+
+    Returns:
+        The overlap length over the side length, 0 when the overlap is not
+        longer than tolerance.
+    """
+    if direction == 'left' or direction == 'right':
+        low, high, other_low, other_high = rec1[1], rec1[3], rec2[1], rec2[3]
+    else:
+        low, high, other_low, other_high = rec1[0], rec1[2], rec2[0], rec2[2]
+    overlap = min(high, other_high) - max(low, other_low)
+    if overlap > tolerance:
+        return overlap / (high - low)
+    return 0
+
+
+def snap_adjacency(shapes, tolerance=DEFAULT_TOLERANCE, profile=NULL_PROFILE):
+    """Calculates adjacency of rooms whose sides match within tolerance.
+
+    Unlike the other builders, rooms on a common line only share the part
+    of their sides that actually overlaps, and coordinates need not be
+    equal, so it is meant for unrounded shapes.
+
+    Args:
+        shapes: a list of rectangles, x_min, y_min, x_max, y_max.
+        tolerance: largest distance between two matching sides, and smallest
+            overlap counted as a common edge.
+        profile: a profiling.Profile counting the compared pairs.
+    Returns:
+        A list holding for each room a list of (j, direction, ratio) sorted
+        by j.
+    """
+    assert tolerance > 0, "Invalid tolerance."
+    for rec in shapes:
+        assert len(rec) == 4, "Invalid input rectangle."
+        assert rec[0] < rec[2], "Invalid input rectangle: x_min < x_max"
+        assert rec[1] < rec[3], "Invalid input rectangle: y_min < y_max"
+    # Cells of x_min, y_min, x_max, y_max, each cell is tolerance wide.
+    buckets = ({}, {}, {}, {})
+    for i, rec in enumerate(shapes):
+        for bucket, coord in zip(buckets, rec):
+            bucket.setdefault(math.floor(coord / tolerance), []).append(i)
+
+    xmin_bucket, ymin_bucket, xmax_bucket, ymax_bucket = buckets
+    num_comparisons = 0
+    adjacency = []
+    for i, rec1 in enumerate(shapes):
+        x_min, y_min, x_max, y_max = rec1
+        found = {}
+        for direction, bucket, coord, side in (
+                ('right', xmin_bucket, x_max, 0),
+                ('left', xmax_bucket, x_min, 2),
+                ('up', ymin_bucket, y_max, 1),
+                ('bottom', ymax_bucket, y_min, 3)):
+            cell = math.floor(coord / tolerance)
+            # Coordinates within tolerance are at most one cell apart.
+            for neighbor in (cell - 1, cell, cell + 1):
+                for j in bucket.get(neighbor, ()):
+                    rec2 = shapes[j]
+                    if (j == i or j in found or
+                            abs(rec2[side] - coord) > tolerance):
+                        continue
+                    num_comparisons += 1
+                    ratio = _overlap_ratio(rec1, rec2, direction, tolerance)
+                    if ratio:
+                        found[j] = (j, direction, ratio)
+        adjacency.append(sorted(found.values()))
+    profile.count('pair_comparisons', num_comparisons)
+    return adjacency
@@ -0,0 +1,51 @@
+"""Evaluates many floor plans at once on a pool of processes."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from evaluation.eval_graph import evaluate
+
+
+def evaluate_or_error(floor_plan_json, engine='graph'):
+    """Evaluates one plan, returning the error instead of raising it.
+
+    Returns:
+        (scores, error), see evaluate_many.
+    """
+    try:
+        return evaluate(floor_plan_json, engine=engine), None
+    except Exception as e:
+        return None, '%s: %s' % (type(e).__name__, e)
+
+
+def evaluate_many(plans, max_workers=None, engine='graph', chunksize=None,
+                  executor=None):
+    """Evaluates floor plans in parallel processes.
+
+    A plan that fails to evaluate does not fail the batch, its error is
+    reported in place of its scores.
+
+    Args:
+        plans: an iterable of floor_plan_json dictionaries, see evaluate.
+        max_workers: number of processes, defaults to the number of CPUs.
+            Ignored when executor is given.
+        engine: evaluation engine, see evaluate.
+        chunksize: number of plans sent to a worker at a time. Larger chunks
+            amortize inter-process overhead on batches of small plans. By
+            default each worker gets about four chunks.
+        executor: an existing concurrent.futures executor to reuse instead
+            of starting a new process pool.
+    Returns:
+        A list of (scores, error) in the order of plans. scores is the
+        result of evaluate, or None if evaluation failed, in which case
+        error is a message describing the failure.
+    """
+    plans = list(plans)
+    engines = [engine] * len(plans)
+    if chunksize is None:
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(plans) // (4 * workers))
+    if executor is not None:
+        return list(executor.map(evaluate_or_error, plans, engines,
+                                 chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(evaluate_or_error, plans, engines,
+                             chunksize=chunksize))
@@ -0,0 +1,99 @@
+"""Evaluates the floors of a building and aggregates their scores.
+
+Buildings repeat typical floors, so floors are keyed like the evaluation
+cache and every distinct floor is evaluated only once, on a process pool.
+"""
+import copy
+from evaluation.batch import evaluate_many
+from evaluation.cache import evaluation_key
+from evaluation.eval_graph import result_to_dict
+
+
+def evaluate_building(floors, max_workers=None, engine='graph', executor=None,
+                      cache=None):
+    """Evaluates every floor of a building.
+
+    Args:
+        floors: a list of floor_plan_json dictionaries, see evaluate.
+        max_workers, engine, executor: see batch.evaluate_many.
+        cache: an optional cache.EvaluationCache answering the floors
+            evaluated before and storing the new results.
+    Returns:
+        (floor_results, building), where floor_results holds a (scores,
+        error) pair for each floor in order, see batch.evaluate_many, and
+        building the aggregates returned by aggregate_floors.
+    """
+    keys = []
+    unique = {}
+    results = {}
+    for k, floor in enumerate(floors):
+        try:
+            key = evaluation_key(floor, engine)
+        except (AttributeError, TypeError, ValueError) as e:
+            # Not a floor plan, reported like a failed evaluation.
+            key = k
+            results[key] = None, '%s: %s' % (type(e).__name__, e)
+        else:
+            unique.setdefault(key, floor)
+        keys.append(key)
+
+    if cache is not None:
+        for key in unique:
+            scores = cache.get(key)
+            if scores is not None:
+                results[key] = scores, None
+    missing = [key for key in unique if key not in results]
+    evaluated = []
+    if missing:
+        evaluated = evaluate_many([unique[key] for key in missing],
+                                  max_workers=max_workers, engine=engine,
+                                  executor=executor)
+    for key, (scores, error) in zip(missing, evaluated):
+        results[key] = scores, error
+        if cache is not None and error is None:
+            cache.put(key, copy.deepcopy(scores))
+
+    floor_results = [results[key] for key in keys]
+    return floor_results, aggregate_floors(floor_results, len(unique))
+
+
+def aggregate_floors(floor_results, num_unique=None):
+    """Aggregates the scores of the floors of a building.
+
+    Args:
+        floor_results: a list of (scores, error) pairs, one per floor.
+        num_unique: number of distinct floors, reported as is.
+    Returns:
+        A dictionary of
+            floors: number of floors.
+            unique_floors: num_unique.
+            failed_floors: indexes of the floors that could not be evaluated.
+            total_area, total_usable_area, total_used_area: sums over the
+                evaluated floors.
+            size_score, desired_size: per program type sums over the
+                evaluated floors.
+            hallway_access_score: the largest, i.e. worst, floor score.
+            worst_access_floor: index of the first floor with that score,
+                None if no floor was evaluated.
+    """
+    building = {'floors': len(floor_results), 'unique_floors': num_unique,
+                'failed_floors': [], 'total_area': 0, 'total_usable_area': 0,
+                'total_used_area': 0, 'size_score': {}, 'desired_size': {},
+                'hallway_access_score': None, 'worst_access_floor': None}
+    for k, (scores, error) in enumerate(floor_results):
+        if error is not None:
+            building['failed_floors'].append(k)
+            continue
+        scores = result_to_dict(scores)
+        for name in ('total_area', 'total_usable_area', 'total_used_area'):
+            building[name] += scores[name]
+        for name in ('size_score', 'desired_size'):
+            for prog_type, val in scores[name].items():
+                building[name][prog_type] = (
+                    building[name].get(prog_type, 0) + val)
+        access = scores['hallway_access_score']
+        if (building['hallway_access_score'] is None or
+                access > building['hallway_access_score']):
+            building['hallway_access_score'] = access
+            building['worst_access_floor'] = k
+    return building
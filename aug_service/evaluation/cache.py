@@ -0,0 +1,157 @@
+"""Content-addressed cache of evaluation results.
+
+Plans are hashed with their exact coordinates and program types in their
+submitted order: the order numbers the rooms, and rounding may move a side
+onto or off its neighbor's, so both can change the scores. Only empty
+program types are dropped, so a cached result always equals evaluate() of
+the plan.
+"""
+import collections
+import copy
+import hashlib
+import json
+import os
+import pickle
+import threading
+from evaluation.eval_graph import (check_fields, evaluate, result_to_dict,
+                                   select_fields)
+
+
+def canonical_plan(floor_plan_json):
+    """Returns floor_plan_json without its empty program types.
+
+    Program types, rooms and coordinates are kept as they are, in order.
+    """
+    return {key: [list(rec) for rec in floor_plan_json[key]]
+            for key in floor_plan_json if len(floor_plan_json[key])}
+
+
+def plan_key(floor_plan_json):
+    """Returns the hex digest identifying a floor plan, see canonical_plan."""
+    return _key(canonical_plan(floor_plan_json))
+
+
+def evaluation_key(floor_plan_json, engine='graph'):
+    """Returns the key of evaluating a plan with engine."""
+    return engine + ':' + plan_key(floor_plan_json)
+
+
+def fields_key(key, fields):
+    """Returns the key of evaluating only fields of the plan with key."""
+    return key + '?' + ','.join(sorted(fields))
+
+
+def _key(canonical):
+    data = json.dumps(canonical, separators=(',', ':')).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+class EvaluationCache:
+    """LRU cache in front of evaluate.
+
+    Attributes:
+        maxsize: maximum number of results kept, the least recently used
+            result is evicted first.
+        path: optional file the cache is persisted to by save() and loaded
+            from on init.
+        hits: number of evaluations answered from the cache.
+        misses: number of evaluations that had to be computed.
+    """
+
+    def __init__(self, maxsize=1024, path=None):
+        """Inits the cache, loading the entries saved at path if any."""
+        assert maxsize > 0, "Invalid cache size."
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Returns a copy of the result cached under key, or None."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Results hold dictionaries, callers must not modify the cached ones.
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """Caches result under key, evicting the least recently used."""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def key(self, floor_plan_json, engine='graph'):
+        """Returns the cache key of evaluating a plan with engine."""
+        return evaluation_key(floor_plan_json, engine)
+
+    def evaluate(self, floor_plan_json, engine='graph', profile=None,
+                 fields=None):
+        """Same as evaluate, answered from the cache when possible.
+
+        A cached result of the whole evaluation also answers requests for
+        some fields. Otherwise the fields are evaluated, and cached, on
+        their own, see fields_key.
+
+        profile is only filled when the plan has to be evaluated.
+        """
+        key = self.key(floor_plan_json, engine)
+        if fields is not None:
+            fields = check_fields(fields)
+            partial_key = fields_key(key, fields)
+            if partial_key not in self and key in self:
+                result = self.get(key)
+                if result is not None:
+                    return select_fields(result_to_dict(result), fields)
+            key = partial_key
+        result = self.get(key)
+        if result is None:
+            result = evaluate(floor_plan_json, engine=engine, profile=profile,
+                              fields=fields)
+            self.put(key, copy.deepcopy(result))
+        return result
+
+    def stats(self):
+        """Returns a dictionary of the cache counters."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self):
+        """Writes the entries to path, replacing the previous file."""
+        assert self.path, "Cache has no path."
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Reads the entries saved at path, keeping the newest maxsize."""
+        assert self.path, "Cache has no path."
+        with open(self.path, 'rb') as f:
+            entries = pickle.load(f)
+        for key, result in entries:
+            self.put(key, result)
@@ -0,0 +1,85 @@
+"""Compact binary encoding of floor plans.
+
+A plan is encoded as a 4 byte header, the number of rooms of each program
+type and then the room rectangles grouped by program type:
+
+    b'FPB' + dtype    dtype is b'f' for float32 or b'd' for float64
+    uint32[9]         room count per type of Room.available_prog_types
+    dtype[n, 4]       x_min, y_min, x_max, y_max of every room
+
+All numbers are little-endian. Decoding is a zero-copy view of the buffer,
+so it yields the coordinate arrays of eval_vector without any parsing.
+"""
+import numpy as np
+from evaluation.eval_graph import Room
+
+MAGIC = b'FPB'
+CONTENT_TYPE = 'application/x-floor-plan'
+
+_DTYPES = {b'f': np.dtype('<f4'), b'd': np.dtype('<f8')}
+_COUNTS_DTYPE = np.dtype('<u4')
+_HEADER_SIZE = len(MAGIC) + 1 + _COUNTS_DTYPE.itemsize * len(
+    Room.available_prog_types)
+
+
+def encode_plan(floor_plan_json, dtype='d'):
+    """Encodes floor_plan_json into the binary format.
+
+    Args:
+        floor_plan_json: A dictionary that specifies each zone's location
+        using rectangular representation.
+        dtype: 'd' to store float64 coordinates, 'f' for float32 which halves
+        the size but rounds the coordinates.
+    Returns:
+        The encoded bytes.
+    """
+    dtype = dtype.encode()
+    assert dtype in _DTYPES, 'Invalid coordinate dtype.'
+    for key in floor_plan_json:
+        assert key in Room.available_prog_types, 'Invalid program type.'
+    counts = []
+    recs = []
+    for prog_type in Room.available_prog_types:
+        val = np.asarray(floor_plan_json.get(prog_type, []),
+                         dtype=_DTYPES[dtype]).reshape(-1, 4)
+        counts.append(len(val))
+        recs.append(val.tobytes())
+    return b''.join([MAGIC, dtype,
+                     np.array(counts, dtype=_COUNTS_DTYPE).tobytes()] + recs)
+
+
+def decode_arrays(buf):
+    """Decodes the binary format into columnar arrays.
+
+    Args:
+        buf: a bytes-like object holding an encoded plan.
+    Returns:
+        coords: (n, 4) array of x_min, y_min, x_max, y_max, a read-only view
+            of buf.
+        codes: (n,) int array of program type codes, the indexes of
+            Room.available_prog_types.
+    """
+    buf = memoryview(buf)
+    if len(buf) < _HEADER_SIZE or bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError('Not an encoded floor plan.')
+    dtype = _DTYPES.get(bytes(buf[len(MAGIC):len(MAGIC) + 1]))
+    if dtype is None:
+        raise ValueError('Invalid coordinate dtype.')
+    counts = np.frombuffer(buf, dtype=_COUNTS_DTYPE,
+                           count=len(Room.available_prog_types),
+                           offset=len(MAGIC) + 1)
+    n = int(counts.sum())
+    if len(buf) != _HEADER_SIZE + 4 * n * dtype.itemsize:
+        raise ValueError('Truncated floor plan.')
+    coords = np.frombuffer(buf, dtype=dtype, offset=_HEADER_SIZE).reshape(n, 4)
+    codes = np.repeat(np.arange(len(counts), dtype=np.int8), counts)
+    return coords, codes
+
+
+def arrays_to_plan(coords, codes):
+    """Converts columnar arrays back to a floor_plan_json dictionary."""
+    floor_plan_json = {}
+    for rec, code in zip(np.asarray(coords).tolist(), np.asarray(codes)):
+        floor_plan_json.setdefault(Room.available_prog_types[code],
+                                   []).append(rec)
+    return floor_plan_json
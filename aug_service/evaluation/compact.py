@@ -0,0 +1,89 @@
+"""Compressed sparse row (CSR) storage of a floor plan graph.
+
+The edges of room i are the slice indptr[i]:indptr[i + 1] of three typed
+arrays: the neighbor index (NO_ROOM for the wall), the direction code and
+the common edge ratio. That is 13 bytes per edge, against a tuple of a
+direction string, a program type string and a float in each adj_graph
+entry, which lets a worker hold many evaluated plans at once.
+"""
+import numpy as np
+from evaluation.adjacency import DIRECTIONS
+
+# Destination of an edge that ends at the wall instead of another room.
+NO_ROOM = -1
+
+
+class CompactGraph:
+    """Adjacency graph in CSR layout.
+
+    Attributes:
+        indptr: (n + 1,) int64 offsets of each room's edges.
+        indices: int32 room each edge leads to, NO_ROOM for walls.
+        direction: int8 direction code of each edge, see DIRECTIONS.
+        ratio: float64 common edge ratio of each edge.
+    """
+
+    __slots__ = ('indptr', 'indices', 'direction', 'ratio')
+
+    def __init__(self, indptr, indices, direction, ratio):
+        self.indptr = indptr
+        self.indices = indices
+        self.direction = direction
+        self.ratio = ratio
+
+    @classmethod
+    def from_edges(cls, num_rooms, src, dst, direction, ratio):
+        """Builds the graph from edge arrays.
+
+        Edges of the same room keep their relative order.
+        """
+        order = np.argsort(src, kind='stable')
+        indptr = np.zeros(num_rooms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_rooms), out=indptr[1:])
+        return cls(indptr,
+                   np.asarray(dst)[order].astype(np.int32),
+                   np.asarray(direction)[order].astype(np.int8),
+                   np.asarray(ratio, dtype=np.float64)[order])
+
+    @property
+    def num_rooms(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    @property
+    def nbytes(self):
+        """Memory used by the arrays."""
+        return (self.indptr.nbytes + self.indices.nbytes +
+                self.direction.nbytes + self.ratio.nbytes)
+
+    def degree(self):
+        """Returns the number of edges of every room."""
+        return np.diff(self.indptr)
+
+    def sources(self):
+        """Returns the room each edge starts from, expanded from indptr."""
+        return np.repeat(np.arange(self.num_rooms, dtype=np.int32),
+                         self.degree())
+
+    def edges(self, i):
+        """Returns (indices, direction, ratio) of the edges of room i."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.direction[lo:hi], self.ratio[lo:hi]
+
+    def to_adj_graph(self, prog_types):
+        """Converts the graph to the FloorPlan.adj_graph dictionary format.
+
+        Args:
+            prog_types: program type name of each room.
+        """
+        graph = {}
+        for i in range(self.num_rooms):
+            indices, direction, ratio = self.edges(i)
+            graph[(i, prog_types[i])] = [
+                (DIRECTIONS[d], prog_types[j] if j != NO_ROOM else 'wall', r)
+                for j, d, r in zip(indices.tolist(), direction.tolist(),
+                                   ratio.tolist())]
+        return graph
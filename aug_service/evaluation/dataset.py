@@ -0,0 +1,197 @@
+"""Memory-mapped columnar storage of many floor plans.
+
+A dataset is a directory of three NumPy .npy files:
+
+    coords.npy    float[n, 4]   x_min, y_min, x_max, y_max of every room
+    codes.npy     int8[n]       program type code of every room, the
+                                indexes of Room.available_prog_types
+    offsets.npy   int64[p + 1]  plan k is made of rooms offsets[k] to
+                                offsets[k + 1]
+
+Rooms of a plan are in the order evaluate numbers them. Opened with
+memory mapping, a plan is a zero-copy slice of the arrays that
+eval_vector.evaluate_arrays takes as is, so scoring a dataset does no
+parsing and only reads the pages of the plans it evaluates.
+"""
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from evaluation.codec import arrays_to_plan
+from evaluation.eval_graph import evaluate
+from evaluation.eval_vector import evaluate_arrays, plan_to_arrays
+from evaluation.stream import (default_max_pending, indexed_scores,
+                               ordered_results, to_ndjson)
+
+_DTYPES = {'d': np.dtype('<f8'), 'f': np.dtype('<f4')}
+_CODES_DTYPE = np.dtype('i1')
+_OFFSETS_DTYPE = np.dtype('<i8')
+
+
+def write_dataset(path, plans, dtype='d'):
+    """Converts floor plans to a dataset.
+
+    Plans are streamed to temporary files in path, so memory does not grow
+    with the number of plans, and the .npy files are written at the end.
+
+    Args:
+        path: directory of the dataset, created if missing.
+        plans: an iterable of floor_plan_json dictionaries.
+        dtype: 'd' to store float64 coordinates, 'f' for float32 which halves
+            the size but rounds the coordinates.
+    Returns:
+        The number of plans written.
+    """
+    assert dtype in _DTYPES, 'Invalid coordinate dtype.'
+    os.makedirs(path, exist_ok=True)
+    dtypes = {'coords': _DTYPES[dtype], 'codes': _CODES_DTYPE,
+              'offsets': _OFFSETS_DTYPE}
+    raw = {name: os.path.join(path, name + '.raw') for name in dtypes}
+    files = {}
+    num_plans = num_rooms = 0
+    # The temporary files are removed whether the plans are written or not.
+    try:
+        for name in dtypes:
+            files[name] = open(raw[name], 'wb')
+        files['offsets'].write(np.zeros(1, dtype=_OFFSETS_DTYPE).tobytes())
+        for floor_plan_json in plans:
+            coords, codes = plan_to_arrays(floor_plan_json)
+            files['coords'].write(coords.astype(dtypes['coords']).tobytes())
+            files['codes'].write(codes.astype(_CODES_DTYPE).tobytes())
+            num_rooms += len(codes)
+            num_plans += 1
+            files['offsets'].write(
+                np.array([num_rooms], dtype=_OFFSETS_DTYPE).tobytes())
+        for f in files.values():
+            f.close()
+
+        shapes = {'coords': (num_rooms, 4), 'codes': (num_rooms,),
+                  'offsets': (num_plans + 1,)}
+        for name, shape in shapes.items():
+            if shape[0]:
+                array = np.memmap(raw[name], dtype=dtypes[name], mode='r',
+                                  shape=shape)
+            else:
+                array = np.empty(shape, dtype=dtypes[name])
+            np.save(os.path.join(path, name + '.npy'), array)
+            del array
+    finally:
+        for name, f in files.items():
+            f.close()
+            os.remove(raw[name])
+    return num_plans
+
+
+class Dataset:
+    """A dataset written by write_dataset.
+
+    Attributes:
+        path: directory of the dataset.
+        coords, codes, offsets: the arrays of the dataset, read-only memory
+            maps unless opened with mmap_mode=None.
+    """
+
+    def __init__(self, path, mmap_mode='r'):
+        """Opens the dataset in directory path."""
+        self.path = path
+        self.coords, self.codes, self.offsets = (
+            np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+            for name in ('coords', 'codes', 'offsets'))
+        if (self.coords.ndim != 2 or self.coords.shape[1] != 4 or
+                self.codes.shape != (len(self.coords),) or
+                len(self.offsets) == 0 or self.offsets[0] != 0 or
+                self.offsets[-1] != len(self.codes)):
+            raise ValueError('Inconsistent floor plan dataset.')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def arrays(self, k):
+        """Returns (coords, codes) of plan k, zero-copy slices of the
+        dataset, see eval_vector.plan_to_arrays."""
+        lo, hi = int(self.offsets[k]), int(self.offsets[k + 1])
+        return self.coords[lo:hi], self.codes[lo:hi]
+
+    def plan(self, k):
+        """Returns plan k as a floor_plan_json dictionary."""
+        return arrays_to_plan(*self.arrays(k))
+
+    def plans(self):
+        """Yields every plan as a floor_plan_json dictionary."""
+        for k in range(len(self)):
+            yield self.plan(k)
+
+    def evaluate(self, k, engine='vector'):
+        """Evaluates plan k, see evaluate.
+
+        The 'vector' engine evaluates the slices of the dataset directly,
+        the 'graph' engine needs the plan as a dictionary.
+        """
+        if engine == 'vector':
+            return evaluate_arrays(*self.arrays(k))
+        return evaluate(self.plan(k), engine=engine)
+
+
+@functools.lru_cache(maxsize=4)
+def open_dataset(path):
+    """Returns the Dataset at path, kept open for the later tasks of a
+    worker process."""
+    return Dataset(path)
+
+
+def _score_range(args):
+    """Evaluates plans lo to hi of a dataset in a worker."""
+    path, lo, hi, engine = args
+    dataset = open_dataset(path)
+    records = []
+    for k in range(lo, hi):
+        try:
+            records.append((dataset.evaluate(k, engine), None))
+        except Exception as e:
+            records.append((None, '%s: %s' % (type(e).__name__, e)))
+    return records
+
+
+def score_dataset(path, executor, engine='vector', start=0, chunksize=64,
+                  max_pending=None):
+    """Evaluates the plans of a dataset in order.
+
+    Workers map the dataset themselves, only the plan ranges and the
+    scores are sent between processes.
+
+    Args:
+        path: directory of the dataset.
+        executor: a concurrent.futures executor running the evaluations.
+        engine: evaluation engine, see Dataset.evaluate.
+        start: number of plans to skip, to resume an interrupted run.
+        chunksize: number of plans evaluated per task.
+        max_pending: maximum number of chunks in flight, see
+            stream.ordered_results.
+    Yields:
+        (index, scores, error) for every plan from start on, see
+        stream.stream_scores.
+    """
+    num_plans = len(Dataset(path))
+    tasks = ((path, lo, min(lo + chunksize, num_plans), engine)
+             for lo in range(start, num_plans, chunksize))
+    yield from indexed_scores(
+        ordered_results(executor, _score_range, tasks, max_pending), start)
+
+
+def score_dataset_file(path, output, max_workers=None, **kwargs):
+    """Evaluates a dataset on a process pool and writes NDJSON scores.
+
+    Args:
+        path: directory of the dataset.
+        output: a text file the scores are written to, see
+            stream.to_ndjson.
+        max_workers: number of processes, defaults to the number of CPUs.
+        kwargs: passed to score_dataset.
+    Yields:
+        The index of every plan written, for progress reporting.
+    """
+    kwargs.setdefault('max_pending', default_max_pending(max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, scores, error in score_dataset(path, executor, **kwargs):
+            output.write(to_ndjson(index, scores, error))
+            yield index
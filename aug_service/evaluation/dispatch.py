@@ -0,0 +1,133 @@
+"""Evaluates requests on a worker pool with coalescing and backpressure.
+
+The Dispatcher lets request handlers wait for evaluations running in other
+processes instead of computing them inline. Requests for a plan that is
+already being evaluated wait for the same future rather than starting a
+second evaluation. At most max_pending distinct evaluations are in flight,
+further requests are rejected with Overloaded, and a caller stops waiting
+after its timeout.
+"""
+import copy
+import functools
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from evaluation.cache import evaluation_key, fields_key
+from evaluation.eval_graph import (check_fields, evaluate, result_to_dict,
+                                   select_fields)
+
+
+class Overloaded(Exception):
+    """Raised when max_pending evaluations are already in flight."""
+
+
+class Timeout(Exception):
+    """Raised when an evaluation did not finish within the timeout."""
+
+
+class Dispatcher:
+    """Runs evaluations on an executor, coalescing identical requests.
+
+    Attributes:
+        executor: the concurrent.futures executor running the evaluations.
+        max_pending: maximum number of distinct evaluations in flight.
+        timeout: default number of seconds a caller waits for a result,
+            None to wait forever.
+        cache: an optional cache.EvaluationCache answering plans evaluated
+            before and storing the new results.
+        coalesced: number of requests that joined an evaluation in flight.
+        rejected: number of requests rejected with Overloaded.
+        timeouts: number of requests that timed out.
+    """
+
+    def __init__(self, executor, max_pending=64, timeout=30, cache=None):
+        assert max_pending > 0, "Invalid number of pending evaluations."
+        self.executor = executor
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.cache = cache
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        """Returns the future of fn(*args), shared by every call with key.
+
+        Raises:
+            Overloaded: max_pending other evaluations are in flight.
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded('Too many pending evaluations: %d.' %
+                                 self.max_pending)
+            future = self.executor.submit(fn, *args)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def run(self, key, fn, *args, timeout=None):
+        """Returns fn(*args), see submit.
+
+        Args:
+            timeout: seconds to wait, defaults to the dispatcher timeout.
+        Raises:
+            Overloaded: max_pending other evaluations are in flight.
+            Timeout: the result was not ready in time. The evaluation keeps
+                running and later requests with key still join it.
+        """
+        future = self.submit(key, fn, *args)
+        try:
+            result = future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise Timeout('Evaluation did not finish in time.')
+        # Coalesced callers share the result, each gets its own copy.
+        return copy.deepcopy(result)
+
+    def evaluate(self, floor_plan_json, engine='graph', timeout=None,
+                 fields=None):
+        """Same as evaluate, on the executor and answered from the cache
+        when possible, see EvaluationCache.evaluate for fields. See run for
+        the exceptions raised."""
+        if self.cache is None:
+            key = evaluation_key(floor_plan_json, engine)
+        else:
+            key = self.cache.key(floor_plan_json, engine)
+        fn = evaluate
+        if fields is not None:
+            fields = check_fields(fields)
+            partial_key = fields_key(key, fields)
+            if (self.cache is not None and partial_key not in self.cache
+                    and key in self.cache):
+                result = self.cache.get(key)
+                if result is not None:
+                    return select_fields(result_to_dict(result), fields)
+            key = partial_key
+            fn = functools.partial(evaluate, fields=sorted(fields))
+        result = None if self.cache is None else self.cache.get(key)
+        if result is None:
+            result = self.run(key, fn, floor_plan_json, engine,
+                              timeout=timeout)
+        return result
+
+    def stats(self):
+        """Returns a dictionary of the dispatcher counters."""
+        return {'pending': len(self._pending), 'coalesced': self.coalesced,
+                'rejected': self.rejected, 'timeouts': self.timeouts}
+
+    def _finish(self, key, future):
+        # Cached before leaving _pending so that no request in between
+        # starts the evaluation again.
+        if (self.cache is not None and not future.cancelled()
+                and future.exception() is None):
+            self.cache.put(key, copy.deepcopy(future.result()))
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
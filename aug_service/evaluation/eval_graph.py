@@ -1,6 +1,12 @@
 """Evaluation algorithm using a graph representation."""
-import logging
-import numpy as np
+import sys
+from evaluation.adjacency import (DEFAULT_TOLERANCE, DIRECTION_INDEX,
+                                  DIRECTIONS, bucket_adjacency,
+                                  exposed_lengths, snap_adjacency)
+from evaluation.profiling import NULL_PROFILE
+from evaluation.rules import (DEFAULT_RULES, AccessRule, AlignmentRule,
+                              ExtWorkRule, HallwayCountRule, LoungeRule,
+                              MeetRule, SizeRule)
 
 
 def intersect_edge_ratio(rec1, rec2):
@@ -32,6 +38,11 @@ def intersect_edge_ratio(rec1, rec2):
         assert rec[0] < rec[2], "Invalid input rectangle: x_min < x_max"
         assert rec[1] < rec[3], "Invalid input rectangle: y_min < y_max"
 
+    return _edge_ratio(rec1, rec2)
+
+
+def _edge_ratio(rec1, rec2):
+    """intersect_edge_ratio without the validation of the rectangles."""
     rec1_xmin = rec1[0]
     rec1_xmax = rec1[2]
     rec1_ymin = rec1[1]
@@ -42,21 +53,12 @@ def intersect_edge_ratio(rec1, rec2):
     rec2_ymin = rec2[1]
     rec2_ymax = rec2[3]
 
-    def _is_overlap():
-        if rec1_xmin >= rec2_xmax or rec1_xmax <= rec2_xmin:
-            return False
-        if rec1_ymin >= rec2_ymax or rec1_ymax <= rec2_ymin:
-            return False
-        return True
+    # Overlapping rectangles are not reported here, see validate.
 
-    # Two rectangles should not have overlaps.
-    if _is_overlap():
-        logging.warning('Rectangles are overlapped.')
-    
     # Case: rec2 is adjacent on the left.
     if rec2_xmax == rec1_xmin:
-        intersect = min(np.abs(rec1_ymax - rec2_ymin),
-                        np.abs(rec1_ymin - rec2_ymax),
+        intersect = min(abs(rec1_ymax - rec2_ymin),
+                        abs(rec1_ymin - rec2_ymax),
                         rec1_ymax - rec1_ymin, rec2_ymax - rec2_ymin)
         if rec1_ymax - rec1_ymin != 0 and intersect != 0:
             intersect_ratio = intersect/(rec1_ymax - rec1_ymin)
@@ -66,8 +68,8 @@ def intersect_edge_ratio(rec1, rec2):
 
     # Case: rec2 is adjacent on the right.
     elif rec2_xmin == rec1_xmax:
-        intersect = min(np.abs(rec1_ymax - rec2_ymin),
-                        np.abs(rec1_ymin - rec2_ymax),
+        intersect = min(abs(rec1_ymax - rec2_ymin),
+                        abs(rec1_ymin - rec2_ymax),
                         rec1_ymax - rec1_ymin, rec2_ymax - rec2_ymin)
         if rec1_ymax - rec1_ymin != 0 and intersect != 0:
             intersect_ratio = intersect / (rec1_ymax - rec1_ymin)
@@ -77,8 +79,8 @@ def intersect_edge_ratio(rec1, rec2):
 
     # Case: rec2 is adjacent on the up.
     elif rec2_ymin == rec1_ymax:
-        intersect = min(np.abs(rec1_xmax - rec2_xmin),
-                        np.abs(rec1_xmin - rec2_xmax),
+        intersect = min(abs(rec1_xmax - rec2_xmin),
+                        abs(rec1_xmin - rec2_xmax),
                         rec1_xmax - rec1_xmin, rec2_xmax - rec2_xmin)
         if rec1_xmax - rec1_xmin != 0 and intersect != 0:
             intersect_ratio = intersect / (rec1_xmax - rec1_xmin)
@@ -88,8 +90,8 @@ def intersect_edge_ratio(rec1, rec2):
 
     # Case: rec2 is adjacent on the bottom.
     elif rec2_ymax == rec1_ymin:
-        intersect = min(np.abs(rec1_xmax - rec2_xmin),
-                        np.abs(rec1_xmin - rec2_xmax),
+        intersect = min(abs(rec1_xmax - rec2_xmin),
+                        abs(rec1_xmin - rec2_xmax),
                         rec1_xmax - rec1_xmin, rec2_xmax - rec2_xmin)
         if rec1_xmax - rec1_xmin != 0 and intersect != 0:
             intersect_ratio = intersect / (rec1_xmax - rec1_xmin)
@@ -101,6 +103,113 @@ def intersect_edge_ratio(rec1, rec2):
         return None, 0
 
 
+def pairwise_adjacency(shapes, profile=NULL_PROFILE):
+    """Calculates adjacency of all rooms by comparing every pair of rooms.
+
+    Args:
+        shapes: a list of rectangles, x_min, y_min, x_max, y_max.
+        profile: a profiling.Profile counting the compared pairs.
+    Returns:
+        A list holding for each room a list of (j, direction, ratio) sorted
+        by j.
+    """
+    # Validated once here, the pairs are compared without checks.
+    for rec in shapes:
+        assert len(rec) == 4, "Invalid input rectangle."
+        assert rec[0] < rec[2], "Invalid input rectangle: x_min < x_max"
+        assert rec[1] < rec[3], "Invalid input rectangle: y_min < y_max"
+    adjacency = []
+    for i, shape_self in enumerate(shapes):
+        edges = []
+        for j, shape_other in enumerate(shapes):
+            if i != j:
+                intersection_dir, intersection_ratio = _edge_ratio(
+                    shape_self, shape_other)
+                if intersection_dir:
+                    edges.append((j, intersection_dir, intersection_ratio))
+        adjacency.append(edges)
+    profile.count('pair_comparisons', len(shapes) * (len(shapes) - 1))
+    return adjacency
+
+
+# Names of the scores of FloorPlan.eval(), in order.
+EVAL_FIELDS = ('align_score', 'size_score', 'desired_size', 'lounge_score',
+               'hallway_access_score', 'work_ext_score', 'meet_score',
+               'hallway_number')
+
+# Names of the values of result_to_dict, in order.
+RESULT_FIELDS = EVAL_FIELDS + ('total_area', 'total_usable_area',
+                               'total_used_area')
+
+# Evaluation engines of evaluate.
+ENGINES = ('graph', 'vector')
+
+# Available ways to calculate room adjacency, see FloorPlan.
+ADJACENCY_BUILDERS = {'pairwise': pairwise_adjacency,
+                      'bucket': bucket_adjacency,
+                      'snap': snap_adjacency}
+
+
+def add_wall_edges(edges, tolerance=0, residual=None):
+    """Appends the residual 'wall' edge of each direction to a room's edges.
+
+    The part of a side not covered by common edges is assumed to touch the
+    wall.
+
+    Args:
+        edges: graph entry of a room, a list of (direction, prog_type, ratio).
+        tolerance: largest residual ratio that is not a wall edge, or one
+            such ratio per direction in DIRECTIONS order, see
+            wall_tolerances.
+        residual: 1 minus the ratios of each direction's edges, in
+            DIRECTIONS order, if already summed while building edges.
+    """
+    if residual is None:
+        residual = [1, 1, 1, 1]
+        for edge in edges:
+            residual[DIRECTION_INDEX[edge[0]]] -= edge[2]
+    if not isinstance(tolerance, (list, tuple)):
+        tolerance = (tolerance,) * len(DIRECTIONS)
+    for direction, res, tol in zip(DIRECTIONS, residual, tolerance):
+        if res > tol:
+            edges.append((direction, 'wall', res))
+
+
+def wall_tolerances(shape, tolerance):
+    """Returns the residual ratio of each side of shape, in DIRECTIONS
+    order, that leaves at most tolerance of its length uncovered."""
+    height = shape[3] - shape[1]
+    width = shape[2] - shape[0]
+    return (tolerance / height, tolerance / height,
+            tolerance / width, tolerance / width)
+
+
+def graph_entry(neighbors, prog_types, shape=None, tolerance=0):
+    """Builds the graph entry of a room from its common edges.
+
+    The wall residuals are summed in the pass that adds the common edges.
+
+    Args:
+        neighbors: the (j, direction, ratio) common edges of the room.
+        prog_types: program types of all rooms, indexed by j.
+        shape: rectangle of the room, needed with a tolerance.
+        tolerance: largest length of a side left uncovered that is not a
+            wall edge, see wall_tolerances.
+    Returns:
+        The list of (direction, prog_type, ratio) edges of the room
+        followed by its wall edges.
+    """
+    edges = []
+    residual = [1, 1, 1, 1]
+    for j, direction, ratio in neighbors:
+        edges.append((direction, prog_types[j], ratio))
+        residual[DIRECTION_INDEX[direction]] -= ratio
+    if tolerance:
+        tolerance = wall_tolerances(shape, tolerance)
+    add_wall_edges(edges, tolerance, residual)
+    return edges
+
+
 class Room:
     """Room represents each physical room from real floor plan.
 
@@ -112,20 +221,26 @@ class Room:
         room_id: an unique integer to represent the room.
         prog_type: program type, whether "ENTRANCE", "CIRC", "WORK", or other type.
         shape: coords of upper-left point and buttom-right point.
+        raw_shape: shape before rounding to integers.
         area: sq.ft size of the room.
     """
 
     available_prog_types = ['ENTRANCE', "CIRC", 'WORK', 'OPERATE', 'MEET', 'WASH',
                             'OBS', 'core', 'wall']
+
+    # No per-instance __dict__, large plans hold many rooms.
+    __slots__ = ('room_id', 'prog_type', 'shape', 'raw_shape', 'area')
     
     def __init__(self, room_id, prog_type, shape):
         self.room_id = room_id
-        self.prog_type = prog_type
         assert prog_type in Room.available_prog_types, 'Invalid program type.'
+        # All rooms of a type share one string.
+        self.prog_type = sys.intern(prog_type)
         self.shape = [int(round(shape[0])),
                       int(round(shape[1])),
                       int(round(shape[2])),
                       int(round(shape[3]))]
+        self.raw_shape = list(shape)
         self.area = (shape[2] - shape[0]) * (shape[3] - shape[1])
 
 
@@ -137,9 +252,34 @@ class FloorPlan:
         room_list: a list of rooms that this floor contains.
         adj_graph: a graph representative of the floor.
         desired_size: desired size of each zone.
+        adjacency: name of the builder in ADJACENCY_BUILDERS used to
+            calculate the common edges. 'bucket' only compares rooms whose
+            sides lie on a common line, 'pairwise' compares every pair of
+            rooms. Both give the same graph. 'snap' matches the unrounded
+            shapes within tolerance, see adjacency.snap_adjacency. 'tiled'
+            gives the graph of 'bucket' built tile by tile on several
+            processes, see tiled.tiled_graph.
+        tolerance: coordinate tolerance of the 'snap' builder.
+        workers: number of processes of the 'tiled' builder, None for the
+            number of CPUs.
+        exposure: for each room, the length of each side not touched by
+            another room, in adjacency.DIRECTIONS order, see
+            adjacency.exposed_lengths. None until a rule needs it, see
+            ensure_exposure.
+        profile: a profiling.Profile recording the time of the graph build
+            and of the rule pass, NULL_PROFILE when not profiling.
+        lazy: whether the graph is only built when a rule needs it, see
+            ensure_graph. adj_graph is None until then.
+        rooms_by_id: a dictionary of room_id to the first room with it.
+        type_rooms: a dictionary of program type to the indexes in room_list
+            of its rooms, in ascending order.
+        type_area: a dictionary of program type to the summed area of its
+            rooms.
     """
     
-    def __init__(self, room_list, desired_size):
+    def __init__(self, room_list, desired_size, adjacency='bucket',
+                 profile=None, tolerance=DEFAULT_TOLERANCE, lazy=False,
+                 workers=None):
         """Inits room with parameters."""
         self.room_list = room_list
         # Validation test for room_list.
@@ -151,201 +291,293 @@ class FloorPlan:
         # Validation test for desired_size.
         assert len(self.desired_size) > 0, "Invalid input desired_size: Empty"
 
-        self.adj_graph = self.build_graph()
+        assert adjacency in ADJACENCY_BUILDERS or adjacency == 'tiled', \
+            "Invalid adjacency builder."
+        self.adjacency = adjacency
+        self.tolerance = tolerance
+        self.workers = workers
+        self.profile = profile or NULL_PROFILE
+
+        self.build_indexes()
+        self.adj_graph = None
+        self.exposure = None
+        if not lazy:
+            self.ensure_graph()
+
+    def build_indexes(self):
+        """Indexes the rooms by room_id and by program type."""
+        self.rooms_by_id = {}
+        self.type_rooms = {}
+        self.type_area = {}
+        for i, room in enumerate(self.room_list):
+            self.rooms_by_id.setdefault(room.room_id, room)
+            self.type_rooms.setdefault(room.prog_type, []).append(i)
+            self.type_area[room.prog_type] = (
+                self.type_area.get(room.prog_type, 0) + room.area)
+
+    def ensure_graph(self):
+        """Builds adj_graph unless already built."""
+        if self.adj_graph is None:
+            with self.profile.time('graph_build'):
+                self.adj_graph = self.build_graph()
+
+    def ensure_exposure(self):
+        """Calculates exposure unless already calculated.
+
+        The common edges are not kept along with the graph, so they are
+        calculated again, outside of the profiled graph build.
+        """
+        if self.exposure is None:
+            with self.profile.time('exposure'):
+                shapes, adjacency = self.common_edges(NULL_PROFILE)
+                self.exposure = [exposed_lengths(shape, neighbors, shapes)
+                                 for shape, neighbors in zip(shapes,
+                                                             adjacency)]
+
+    def common_edges(self, profile):
+        """Calculates the common edges of every room with its builder.
+
+        Args:
+            profile: a profiling.Profile counting the compared pairs.
+        Returns:
+            shapes, adjacency: the rectangles the builder compared and, for
+            each room, its (j, direction, ratio) common edges.
+        """
+        if self.adjacency == 'snap':
+            shapes = [room.raw_shape for room in self.room_list]
+            return shapes, snap_adjacency(shapes, tolerance=self.tolerance,
+                                          profile=profile)
+        shapes = [room.shape for room in self.room_list]
+        # 'tiled' gives the common edges of 'bucket'.
+        builder = ADJACENCY_BUILDERS.get(self.adjacency, bucket_adjacency)
+        return shapes, builder(shapes, profile=profile)
 
     def build_graph(self):
         """Builds floor plan graph by list of rooms."""
-        graph = {(i, self.room_list[i].prog_type): []
-                 for i in range(len(self.room_list))}
-
+        prog_types = [room.prog_type for room in self.room_list]
         # Calculate each two rooms adjacency relationships, aka common edge
         # ratio.
-        for i, room_self in enumerate(self.room_list):
-            for j, room_other in enumerate(self.room_list):
-                if i != j:
-                    intersection_dir, intersection_ratio = intersect_edge_ratio(room_self.shape,
-                                                                                room_other.shape)
-                    if intersection_dir:
-                        graph[(i, room_self.prog_type)].append(
-                            (intersection_dir, room_other.prog_type,
-                             intersection_ratio))
-        for i, room_self in enumerate(self.room_list):
-            for direction in ['right', 'left', 'up', 'bottom']:
-                res = 1
-                for edge in graph[(i, room_self.prog_type)]:
-                    if edge[0] == direction:
-                        res -= edge[2]
-                if res > 0:
-                    graph[(i, room_self.prog_type)].append(
-                        (direction, 'wall', res))
-        return graph
+        if self.adjacency == 'tiled':
+            # Imported here as tiled builds on this module.
+            from evaluation.tiled import tiled_graph
+            entries = tiled_graph(
+                [room.shape for room in self.room_list], prog_types,
+                max_workers=self.workers, profile=self.profile)
+        else:
+            # Snapped sides may leave gaps of up to tolerance uncovered.
+            tolerance = self.tolerance if self.adjacency == 'snap' else 0
+            shapes, adjacency = self.common_edges(self.profile)
+            entries = [graph_entry(neighbors, prog_types, shape, tolerance)
+                       for shape, neighbors in zip(shapes, adjacency)]
+            self.profile.count('edges',
+                               sum(len(edges) for edges in adjacency))
+        self.profile.count('rooms', len(self.room_list))
+        return {(i, prog_type): edges
+                for i, (prog_type, edges) in enumerate(zip(prog_types,
+                                                           entries))}
 
     def eval(self):
         """Evaluates floor graph by checking multiple rules."""
-        align_score = self._alignment_check()
-        size_score = self._size_check()
-        lounge_score = self._lounge_check()
-        hallway_access_score = self._access_hw_check()
-        work_ext_score = self._check_ext_work()
-        meet_score = self._check_meet()
-        num_hallway = self._get_num_hallway()
-        return (align_score, size_score, self.desired_size, lounge_score,
-                hallway_access_score, work_ext_score, meet_score, num_hallway)
+        scores = self.eval_rules(DEFAULT_RULES)
+        return (scores['align_score'], scores['size_score'], self.desired_size,
+                scores['lounge_score'], scores['hallway_access_score'],
+                scores['work_ext_score'], scores['meet_score'],
+                scores['hallway_number'])
 
-    def _alignment_check(self):
-        """Checks alignment score of the floor plan.
+    def eval_rules(self, rules):
+        """Evaluates rules in a single pass over the rooms and the graph.
+
+        The graph is built first if one of the rules needs it, and the
+        exposed lengths if one of the rules needs them.
 
+        Args:
+            rules: a sequence of rules.Rule.
         Returns:
-            align_score: High align_score means more un-alignment (0 is
-                the best score).
+            A dictionary of rule name to score.
         """
-        align_score = 0
-        for item, val in self.adj_graph.items():
-            if item[1] != 'CIRC':
-                for edge in val:
-                    align_score += np.abs(edge[2] - 1)
-        return align_score
-
-    def _size_check(self):
-        """Checks size of each program type of the floor plan.
-
+        if any(rule.needs_graph for rule in rules):
+            self.ensure_graph()
+        if any(rule.needs_exposure for rule in rules):
+            self.ensure_exposure()
+        with self.profile.time('rules'):
+            states = [rule.start(self) for rule in rules]
+            visits = [(rule.room, state) for rule, state in zip(rules, states)
+                      if rule.room is not None]
+            graph = self.adj_graph
+            if visits:
+                for i, room in enumerate(self.room_list):
+                    edges = (graph[(i, room.prog_type)] if graph is not None
+                             else None)
+                    for visit, state in visits:
+                        visit(state, i, room, edges)
+            return {rule.name: rule.result(state, self)
+                    for rule, state in zip(rules, states)}
+
+    def eval_fields(self, names):
+        """Evaluates only the named scores of eval().
+
+        Args:
+            names: names of the scores, see EVAL_FIELDS.
         Returns:
-            size_score: High size_score means high deviation from desired area
-                        ({0, 0, 0, 0, 0 ...} is the best case which means no
-                        deviation).
+            A dictionary of score name to value.
         """
-        size_score = self.desired_size.copy()
-        for room in self.room_list:
-            size_score[room.prog_type] -= room.area
-        return size_score
+        scores = self.eval_rules([rule for rule in DEFAULT_RULES
+                                  if rule.name in names])
+        if 'desired_size' in names:
+            scores['desired_size'] = self.desired_size
+        return scores
 
-    def _lounge_check(self):
-        """Checks if lounge touch the core area and the good view.
+    def _check(self, rule):
+        return self.eval_rules([rule])[rule.name]
 
-           Note that in evluation, we assume all walls are good views. See
-           more details in the Room.
-        Return:
-            lounge_score: {'touch_gv': 0, 'touch_core': 1}  (0 means not touch,
-            >=1 means touch).
-        """
-        lounge_score = {'touch_gv': 0, 'touch_core': 0}
-        max_size = 0
-        lounge_index = 0
-        for room in self.room_list:
-            if room.prog_type == 'ENTRANCE':
-                if room.area > max_size:
-                    max_size = room.area
-                    lounge_index = room.room_id
-        for item, val in self.adj_graph.items():
-            if item[0] == lounge_index:
-                for edge in val:
-                    if edge[1] == 'core':
-                        lounge_score['touch_core'] += 1
-                    elif edge[1] == 'wall':
-                        lounge_score['touch_gv'] += 1
-        return lounge_score
+    def _alignment_check(self):
+        """Checks alignment score of the floor plan, see AlignmentRule."""
+        return self._check(AlignmentRule())
 
-    def _access_hw_check(self):
-        """Checks the accessibility of floor plan.
+    def _size_check(self):
+        """Checks size of each program type of the floor plan, see
+        SizeRule."""
+        return self._check(SizeRule())
 
-        Return:
-            hallway_access_score: High hallway_access score means more
-                un-accessibility. (Best would be 0; it means all rooms are
-                connected to hallway.)
-        """
-        hallway_access_score = 0
-        for item, val in self.adj_graph.items():
-            if item[1] != 'CIRC':
-                num_hallway_touch = 0
-                for edge in val:
-                    if edge[1] == 'CIRC':
-                        num_hallway_touch += 1
-                if num_hallway_touch == 0:
-                    hallway_access_score += 1
-        return hallway_access_score
+    def _lounge_check(self):
+        """Checks if lounge touch the core area and the good view, see
+        LoungeRule."""
+        return self._check(LoungeRule())
 
-    def _check_ext_work(self):
-        """Checks the rule: 'Work is better put at the wall'.
+    def _access_hw_check(self):
+        """Checks the accessibility of floor plan, see AccessRule."""
+        return self._check(AccessRule())
 
-        Return:
-            work_ext_score: High work_ext_score means more area are assigned
-            to be work space.
-        """
-        work_ext_score = 0
-        for item, val in self.adj_graph.items():
-            if item[1] == 'WORK':
-                for edge in val:
-                    if edge[1] == 'wall':
-                        for room in self.room_list:
-                            if room.room_id == item[0]:
-                                size = room.area
-                                break
-                        work_ext_score += size
-                        break
-        return work_ext_score
+    def _check_ext_work(self):
+        """Checks the rule: 'Work is better put at the wall', see
+        ExtWorkRule."""
+        return self._check(ExtWorkRule())
 
     def _check_meet(self):
-        """Rule: 'meet should separate lounge and work as much as possible.'.
-
-        Return:
-            meet_score: To simplify it we just lower the adjacency between
-            lounge and work.
-        """
-        meet_score = 0
-        for item, val in self.adj_graph.items():
-            if item[1] == 'ENTRANCE':
-                for edge in val:
-                    if edge[1] == 'WORK':
-                        meet_score += edge[2]
-        return meet_score
+        """Checks the adjacency between lounge and work, see MeetRule."""
+        return self._check(MeetRule())
 
     def _get_num_hallway(self):
-        """Returns the number of circulate.
+        """Returns the number of circulate, see HallwayCountRule."""
+        return self._check(HallwayCountRule())
 
-        Smaller num_hallway means less corner of hallway, the smaller
-        the better.
-        Return:
-            num_hallway: the number of circulate.
-        """
-        # Count number of circulate: better to be few.
-        num_hallway = 0
-        for room in self.room_list:
-            if room.prog_type == 'CIRC':
-                num_hallway += 1
-        return num_hallway
+
+def desired_size_of(total_usable_area):
+    """Returns the desired size of each zone given the usable area."""
+    return {'CIRC': 0.0*total_usable_area,
+            'OPERATE': 0.0*total_usable_area,
+            'WORK': 0.0*total_usable_area,
+            'ENTRANCE': 0.0*total_usable_area,
+            'MEET': 0.0*total_usable_area,
+            'WASH': 0.0*total_usable_area,
+            'OBS': 0.0*total_usable_area}
+
+
+def rooms_from_json(floor_plan_json):
+    """Returns the rooms of floor_plan_json as a list of Room, with the
+    room ids 0..n-1 in the order of the plan."""
+    room_list = []
+    for key, val in floor_plan_json.items():
+        for single_rec in val:
+            room_list.append(Room(len(room_list), key, single_rec))
+    return room_list
 
 
-def evaluate(floor_plan_json):
+def evaluate(floor_plan_json, engine='graph', profile=None, adjacency='bucket',
+             tolerance=DEFAULT_TOLERANCE, fields=None, workers=None):
     """Converts floor_plan_json to floor plan and evaluate it.
 
     Args:
         floor_plan_json: A dictionary that specifies each zone's location
         using rectangular representation.
+        engine: 'graph' evaluates a FloorPlan of Room objects, 'vector'
+        evaluates columnar arrays with eval_vector.VectorFloorPlan, which is
+        much faster on large plans.
+        profile: an optional profiling.Profile, filled with the time spent
+        in each stage and the number of rooms, edges and compared pairs.
+        adjacency, tolerance, workers: adjacency builder of the 'graph'
+        engine, tolerance of the 'snap' builder and processes of the
+        'tiled' builder, see FloorPlan.
+        fields: optional names of the values to calculate, see
+        RESULT_FIELDS. The adjacency graph is only built, and a rule only
+        evaluated, if a requested value needs it: size_score,
+        desired_size, hallway_number and the areas do not.
     Returns:
-        evaluation scores.
+        evaluation scores, or with fields a dictionary of the requested
+        values in the order of RESULT_FIELDS.
     """
-    room_list = []
-    index = 0
-    total_area = 0
-    total_usable_area = 0
-    total_used_area = 0
-    for key, val in floor_plan_json.items():
-        for single_rec in val:
-            rec = Room(index, key, single_rec)
-            room_list.append(rec)
-            index += 1
+    assert engine in ENGINES, 'Invalid evaluation engine.'
+    if fields is not None:
+        fields = check_fields(fields)
+    profile = profile or NULL_PROFILE
+    if engine == 'vector':
+        # Imported here as eval_vector builds on this module.
+        from evaluation.eval_vector import evaluate_arrays, plan_to_arrays
+        with profile.time('rooms'):
+            coords, codes = plan_to_arrays(floor_plan_json)
+        return evaluate_arrays(coords, codes, profile=profile, fields=fields)
+
+    with profile.time('rooms'):
+        room_list = rooms_from_json(floor_plan_json)
+        total_area = 0
+        total_usable_area = 0
+        for rec in room_list:
             total_area += rec.area
-            if key != 'OBS':
+            if rec.prog_type != 'OBS':
                 total_usable_area += rec.area
-                total_used_area += rec.area
-
-    desired_size = {'CIRC': 0.0*total_usable_area,
-                    'OPERATE': 0.0*total_usable_area,
-                    'WORK': 0.0*total_usable_area,
-                    'ENTRANCE': 0.0*total_usable_area,
-                    'MEET': 0.0*total_usable_area,
-                    'WASH': 0.0*total_usable_area,
-                    'OBS': 0.0*total_usable_area}
-
-    fp = FloorPlan(room_list, desired_size)
-    return fp.eval(), total_area, total_usable_area, total_used_area
+        total_used_area = total_usable_area
+
+    desired_size = desired_size_of(total_usable_area)
+
+    fp = FloorPlan(room_list, desired_size, adjacency=adjacency,
+                   profile=profile, tolerance=tolerance,
+                   lazy=fields is not None, workers=workers)
+    if fields is None:
+        return fp.eval(), total_area, total_usable_area, total_used_area
+    return select_fields(dict(fp.eval_fields(fields), total_area=total_area,
+                              total_usable_area=total_usable_area,
+                              total_used_area=total_used_area), fields)
+
+
+def check_fields(fields):
+    """Returns fields as a set, asserting they are RESULT_FIELDS."""
+    fields = set(fields)
+    for name in fields:
+        assert name in RESULT_FIELDS, 'Invalid field: %s' % name
+    return fields
+
+
+def select_fields(values, fields):
+    """Returns the values named in fields, in the order of RESULT_FIELDS.
+
+    Args:
+        values: a dictionary holding at least the fields, like the one of
+            result_to_dict.
+        fields: a set of names of RESULT_FIELDS.
+    """
+    return {name: values[name] for name in RESULT_FIELDS if name in fields}
+
+
+def result_to_dict(result):
+    """Names the values returned by evaluate.
+
+    Args:
+        result: evaluation scores returned by evaluate.
+    Returns:
+        A dictionary of score name to value, in the order served by the
+        evaluation endpoint.
+    """
+    score_final, total_area, total_usable_area, total_used_area = result
+    (align_score, size_score, desired_size, lounge_score, hallway_access_score,
+     work_ext_score, meet_score, hallway_num) = score_final
+    return {'align_score': align_score,
+            'size_score': size_score,
+            'desired_size': desired_size,
+            'lounge_score': lounge_score,
+            'hallway_access_score': hallway_access_score,
+            'work_ext_score': work_ext_score,
+            'meet_score': meet_score,
+            'hallway_number': hallway_num,
+            'total_area': total_area,
+            'total_usable_area': total_usable_area,
+            'total_used_area': total_used_area}
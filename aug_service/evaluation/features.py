@@ -0,0 +1,314 @@
+"""Numeric feature matrix of many floor plans, for training models.
+
+Every plan becomes one row of FEATURE_NAMES, fixed float64 columns:
+
+    align_score, hallway_access_score, work_ext_score, meet_score,
+    hallway_number, total_area, total_usable_area, total_used_area
+                            the scores of evaluate
+    size_score.T, desired_size.T
+                            per program type T with a desired size
+    lounge_score.touch_gv, lounge_score.touch_core
+    area.T, rooms.T         summed area and number of rooms of type T
+    adjacency.A.B           number of pairs of rooms of types A and B with
+                            a common edge, A before B in FEATURE_TYPES
+    walls.T                 number of residual 'wall' edges of type T rooms
+    exposure.T              summed exposed side length of type T rooms, see
+                            adjacency.exposed_lengths
+
+Rows are calculated with the arrays of eval_vector.VectorFloorPlan and
+written chunk by chunk, so memory does not grow with the number of plans
+and no scores go through dictionaries or strings. Plans that cannot be
+evaluated get a row of NaN. Unlike evaluate, plans with rooms of a type
+without a desired size, like core, still get their features; wall rooms
+have no per type columns and only count in the scores.
+
+The features are written to a directory as features.npy, memory-mappable
+like a dataset.Dataset, and columns.json, the list of column names.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from evaluation.compact import NO_ROOM
+from evaluation.dataset import Dataset, open_dataset
+from evaluation.eval_graph import Room, desired_size_of
+from evaluation.eval_vector import (OBS, PROG_CODES, VectorFloorPlan,
+                                    plan_to_arrays)
+from evaluation.stream import default_max_pending, ordered_results
+
+# Program types of the per type columns, in code order.
+FEATURE_TYPES = [prog_type for prog_type in Room.available_prog_types
+                 if prog_type != 'wall']
+
+# Program types of the size_score and desired_size columns.
+SIZE_TYPES = list(desired_size_of(0))
+
+FEATURE_NAMES = tuple(
+    ['align_score'] +
+    ['size_score.' + prog_type for prog_type in SIZE_TYPES] +
+    ['desired_size.' + prog_type for prog_type in SIZE_TYPES] +
+    ['lounge_score.touch_gv', 'lounge_score.touch_core',
+     'hallway_access_score', 'work_ext_score', 'meet_score',
+     'hallway_number', 'total_area', 'total_usable_area', 'total_used_area'] +
+    ['area.' + prog_type for prog_type in FEATURE_TYPES] +
+    ['rooms.' + prog_type for prog_type in FEATURE_TYPES] +
+    ['adjacency.%s.%s' % (a, b) for k, a in enumerate(FEATURE_TYPES)
+     for b in FEATURE_TYPES[k:]] +
+    ['walls.' + prog_type for prog_type in FEATURE_TYPES] +
+    ['exposure.' + prog_type for prog_type in FEATURE_TYPES])
+
+_COLUMNS = {name: k for k, name in enumerate(FEATURE_NAMES)}
+_NUM_TYPES = len(FEATURE_TYPES)
+_NUM_PAIRS = _NUM_TYPES * (_NUM_TYPES + 1) // 2
+_SIZE_CODES = np.array([PROG_CODES[prog_type] for prog_type in SIZE_TYPES])
+
+
+def _pair_columns():
+    """Returns the offset among the adjacency columns of each pair of type
+    codes."""
+    columns = np.zeros((_NUM_TYPES, _NUM_TYPES), dtype=np.int64)
+    a, b = np.triu_indices(_NUM_TYPES)
+    columns[a, b] = columns[b, a] = np.arange(_NUM_PAIRS)
+    return columns
+
+
+_PAIR_COLUMNS = _pair_columns()
+
+
+def _span(name, count):
+    start = _COLUMNS[name]
+    return slice(start, start + count)
+
+
+def exposed_length_array(floor_plan):
+    """Calculates the exposed length of every side of every room.
+
+    The array counterpart of adjacency.exposed_lengths: the parts of each
+    side that neighbors truly touch are merged in a sorted sweep over all
+    sides at once.
+
+    Args:
+        floor_plan: a VectorFloorPlan.
+    Returns:
+        (n, 4) array of the exposed length of each side, in DIRECTIONS
+        order.
+    """
+    shape = floor_plan.shape
+    num_rooms = floor_plan.num_rooms
+    dst = floor_plan.dst
+    keep = dst != NO_ROOM
+    src = floor_plan.src[keep]
+    dst = dst[keep]
+    direction = floor_plan.direction[keep].astype(np.int64)
+    # Right and left sides run along y, up and bottom sides along x.
+    low = np.where(direction < 2, 1, 0)
+    lo = np.maximum(shape[src, low], shape[dst, low])
+    hi = np.minimum(shape[src, low + 2], shape[dst, low + 2])
+    keep = hi > lo
+    side = (src * 4 + direction)[keep]
+    lo, hi = lo[keep], hi[keep]
+    order = np.lexsort((lo, side))
+    side, lo, hi = side[order], lo[order], hi[order]
+
+    covered = np.zeros(num_rooms * 4)
+    if len(side):
+        # Ends are shifted by side so that a running maximum restarts at
+        # every side.
+        base = shape.min()
+        stride = shape.max() - base + 1
+        ends = np.maximum.accumulate(side * stride + (hi - base))
+        end = np.empty_like(lo)
+        end[1:] = ends[:-1] - side[1:] * stride + base
+        first = np.ones(len(side), dtype=bool)
+        first[1:] = side[1:] != side[:-1]
+        end[first] = lo[first]
+        np.add.at(covered, side, np.maximum(hi - np.maximum(lo, end), 0))
+    width = shape[:, 2] - shape[:, 0]
+    height = shape[:, 3] - shape[:, 1]
+    return (np.stack([height, height, width, width], axis=1) -
+            covered.reshape(num_rooms, 4))
+
+
+def plan_features(coords, codes, out=None):
+    """Calculates the features of a floor plan given as arrays.
+
+    Args:
+        coords, codes: the plan, see eval_vector.plan_to_arrays.
+        out: optional float64 array of len(FEATURE_NAMES) to fill.
+    Returns:
+        The array of the features, in FEATURE_NAMES order.
+    """
+    if out is None:
+        out = np.empty(len(FEATURE_NAMES))
+    coords = np.asarray(coords, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.int8)
+    area = (coords[:, 2] - coords[:, 0]) * (coords[:, 3] - coords[:, 1])
+    total_area = float(area.sum())
+    total_usable_area = float(area[codes != OBS].sum())
+    desired_size = desired_size_of(total_usable_area)
+    fp = VectorFloorPlan(coords, codes, desired_size)
+
+    type_area = np.bincount(codes, weights=fp.area, minlength=_NUM_TYPES)
+    desired = np.array([desired_size[prog_type] for prog_type in SIZE_TYPES])
+    lounge_score = fp._lounge_check()
+    out[_COLUMNS['align_score']] = fp._alignment_check()
+    out[_span('size_score.' + SIZE_TYPES[0], len(SIZE_TYPES))] = (
+        desired - type_area[_SIZE_CODES])
+    out[_span('desired_size.' + SIZE_TYPES[0], len(SIZE_TYPES))] = desired
+    out[_COLUMNS['lounge_score.touch_gv']] = lounge_score['touch_gv']
+    out[_COLUMNS['lounge_score.touch_core']] = lounge_score['touch_core']
+    out[_COLUMNS['hallway_access_score']] = fp._access_hw_check()
+    out[_COLUMNS['work_ext_score']] = fp._check_ext_work()
+    out[_COLUMNS['meet_score']] = fp._check_meet()
+    out[_COLUMNS['hallway_number']] = fp._get_num_hallway()
+    out[_COLUMNS['total_area']] = total_area
+    out[_COLUMNS['total_usable_area']] = total_usable_area
+    out[_COLUMNS['total_used_area']] = total_usable_area
+    out[_span('area.' + FEATURE_TYPES[0], _NUM_TYPES)] = (
+        type_area[:_NUM_TYPES])
+    out[_span('rooms.' + FEATURE_TYPES[0], _NUM_TYPES)] = np.bincount(
+        codes, minlength=_NUM_TYPES)[:_NUM_TYPES]
+
+    src, dst = fp.src, fp.dst
+    # Each pair has an edge both ways, NO_ROOM walls are never counted.
+    pair = src < dst
+    a, b = codes[src[pair]], codes[dst[pair]]
+    # Pairs with a wall room have no column.
+    typed = (a < _NUM_TYPES) & (b < _NUM_TYPES)
+    out[_span('adjacency.%s.%s' % (FEATURE_TYPES[0], FEATURE_TYPES[0]),
+              _NUM_PAIRS)] = np.bincount(
+        _PAIR_COLUMNS[a[typed], b[typed]], minlength=_NUM_PAIRS)
+    out[_span('walls.' + FEATURE_TYPES[0], _NUM_TYPES)] = np.bincount(
+        codes[src[dst == NO_ROOM]], minlength=_NUM_TYPES)[:_NUM_TYPES]
+    out[_span('exposure.' + FEATURE_TYPES[0], _NUM_TYPES)] = np.bincount(
+        codes, weights=exposed_length_array(fp).sum(axis=1),
+        minlength=_NUM_TYPES)[:_NUM_TYPES]
+    return out
+
+
+def feature_chunks(plans, chunksize=1024):
+    """Calculates the features of plans, chunksize rows at a time.
+
+    Args:
+        plans: an iterable of (coords, codes) arrays, see plan_features,
+            or (None, None) for a plan that could not be read.
+        chunksize: number of rows of each chunk.
+    Yields:
+        (rows, len(FEATURE_NAMES)) float64 arrays, NaN rows for the plans
+        that cannot be evaluated.
+    """
+    chunk = np.empty((chunksize, len(FEATURE_NAMES)))
+    rows = 0
+    for coords, codes in plans:
+        try:
+            if coords is None:
+                raise ValueError('Invalid floor plan.')
+            plan_features(coords, codes, out=chunk[rows])
+        except (AssertionError, IndexError, TypeError, ValueError):
+            chunk[rows] = np.nan
+        rows += 1
+        if rows == chunksize:
+            yield chunk
+            chunk = np.empty_like(chunk)
+            rows = 0
+    if rows:
+        yield chunk[:rows]
+
+
+def _plan_arrays(plans):
+    """Yields plans as arrays, (None, None) for invalid plans."""
+    for floor_plan_json in plans:
+        try:
+            yield plan_to_arrays(floor_plan_json)
+        except (AssertionError, AttributeError, TypeError, ValueError):
+            yield None, None
+
+
+def write_features(path, chunks):
+    """Writes feature chunks to a directory.
+
+    Chunks are streamed to a temporary file in path and features.npy is
+    written at the end, see dataset.write_dataset.
+
+    Args:
+        path: directory of the features, created if missing.
+        chunks: an iterable of feature matrices, see feature_chunks.
+    Returns:
+        The number of rows written.
+    """
+    os.makedirs(path, exist_ok=True)
+    raw = os.path.join(path, 'features.raw')
+    rows = 0
+    try:
+        with open(raw, 'wb') as f:
+            for chunk in chunks:
+                f.write(np.ascontiguousarray(chunk, dtype='<f8').tobytes())
+                rows += len(chunk)
+        shape = (rows, len(FEATURE_NAMES))
+        if rows:
+            array = np.memmap(raw, dtype='<f8', mode='r', shape=shape)
+        else:
+            array = np.empty(shape)
+        np.save(os.path.join(path, 'features.npy'), array)
+        del array
+    finally:
+        os.remove(raw)
+    with open(os.path.join(path, 'columns.json'), 'w') as f:
+        json.dump(list(FEATURE_NAMES), f)
+    return rows
+
+
+def export_plan_features(path, plans, chunksize=1024):
+    """Writes the features of floor_plan_json dictionaries to path.
+
+    Returns:
+        The number of rows written.
+    """
+    return write_features(path, feature_chunks(_plan_arrays(plans),
+                                               chunksize))
+
+
+def _features_range(args):
+    """Calculates the features of plans lo to hi of a dataset in a worker."""
+    path, lo, hi = args
+    dataset = open_dataset(path)
+    return next(feature_chunks((dataset.arrays(k) for k in range(lo, hi)),
+                               hi - lo))
+
+
+def dataset_feature_chunks(path, executor, chunksize=256, max_pending=None):
+    """Calculates the features of the plans of a dataset in order.
+
+    Workers map the dataset themselves, only the plan ranges and the
+    feature chunks are sent between processes, see dataset.score_dataset.
+
+    Args:
+        path: directory of the dataset.
+        executor: a concurrent.futures executor running the calculations.
+        chunksize: number of plans per task and rows per chunk.
+        max_pending: maximum number of chunks in flight, see
+            stream.ordered_results.
+    Yields:
+        Feature matrices, see feature_chunks.
+    """
+    num_plans = len(Dataset(path))
+    tasks = ((path, lo, min(lo + chunksize, num_plans))
+             for lo in range(0, num_plans, chunksize))
+    yield from ordered_results(executor, _features_range, tasks, max_pending)
+
+
+def export_dataset_features(path, output, max_workers=None, **kwargs):
+    """Writes the features of a dataset, calculated on a process pool.
+
+    Args:
+        path: directory of the dataset.
+        output: directory of the features.
+        max_workers: number of processes, defaults to the number of CPUs.
+        kwargs: passed to dataset_feature_chunks.
+    Returns:
+        The number of rows written.
+    """
+    kwargs.setdefault('max_pending', default_max_pending(max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return write_features(output, dataset_feature_chunks(
+            path, executor, **kwargs))
@@ -0,0 +1,279 @@
+"""Floor plan that can be edited room by room without a full rebuild.
+
+IncrementalFloorPlan keeps the EdgeIndex used to build its graph. Adding,
+moving, retyping or removing a room only recalculates the graph entries of
+that room and of the rooms it touches before and after the edit, and the
+scores are patched with the difference of those rooms' contributions. An
+edit costs O(degree) instead of a whole build_graph and eval().
+"""
+import bisect
+from evaluation.adjacency import OPPOSITE, EdgeIndex, exposed_lengths
+from evaluation.eval_graph import (FloorPlan, Room, add_wall_edges,
+                                   desired_size_of)
+
+
+def _check_shape(shape):
+    assert len(shape) == 4, "Invalid input rectangle."
+    assert shape[0] < shape[2], "Invalid input rectangle: x_min < x_max"
+    assert shape[1] < shape[3], "Invalid input rectangle: y_min < y_max"
+
+
+class IncrementalFloorPlan(FloorPlan):
+    """FloorPlan with add/move/retype/remove room operations.
+
+    The room_id of every room must be its index in room_list, as in plans
+    built by evaluate. eval() returns the patched scores, which are the
+    ones of FloorPlan.eval() up to floating-point rounding.
+    """
+
+    def __init__(self, room_list, desired_size):
+        """Inits room with parameters."""
+        super().__init__(room_list, desired_size, adjacency='bucket')
+
+    def build_graph(self):
+        """Builds floor plan graph and the per room score contributions."""
+        for i, room in enumerate(self.room_list):
+            assert room.room_id == i, "Invalid room list: room_id != index"
+            _check_shape(room.shape)
+        self.adj_graph = {}
+        self._index = EdgeIndex()
+        self._neighbors = {}
+        self._contributions = {}
+        self._totals = [0, 0, 0, 0]
+        self.rooms_by_id = {}
+        self.type_rooms = {}
+        self.type_area = {}
+        for i in range(len(self.room_list)):
+            self._insert(i)
+        for i in range(len(self.room_list)):
+            self._neighbors[i] = self._index.neighbors(i)
+        self._update(range(len(self.room_list)))
+        return self.adj_graph
+
+    def add_room(self, prog_type, shape):
+        """Adds a room and returns its index."""
+        i = len(self.room_list)
+        room = Room(i, prog_type, shape)
+        _check_shape(room.shape)
+        self.room_list.append(room)
+        if self.exposure is not None:
+            self.exposure.append(None)
+        self._insert(i)
+        self._update([i] + self._link(i))
+        return i
+
+    def move_room(self, i, shape):
+        """Moves or resizes room i to the given rectangle."""
+        room = Room(i, self.room_list[i].prog_type, shape)
+        _check_shape(room.shape)
+        affected = set(self._unlink(i))
+        self._drop(i)
+        self.room_list[i] = room
+        self._insert(i)
+        affected.update(self._link(i))
+        affected.add(i)
+        self._update(affected)
+
+    def set_prog_type(self, i, prog_type):
+        """Changes the program type of room i."""
+        old = self.room_list[i]
+        room = Room(i, prog_type, old.raw_shape)
+        # The common edges stay, only the graph entries naming room i change.
+        self._remove_type(i)
+        self.room_list[i] = room
+        self._add_type(i)
+        self.adj_graph[(i, prog_type)] = self.adj_graph.pop(
+            (i, old.prog_type))
+        self._recontribute(i)
+        for j, _, _ in self._neighbors[i]:
+            # Graph entries are ordered like the common edges, walls last.
+            k = bisect.bisect_left(self._neighbors[j], (i,))
+            edges = self.adj_graph[(j, self.room_list[j].prog_type)]
+            edges[k] = (edges[k][0], prog_type, edges[k][2])
+            self._recontribute(j)
+
+    def remove_room(self, i):
+        """Removes room i.
+
+        The last room of room_list takes the place, and the room_id, of the
+        removed room so that room indexes stay contiguous.
+
+        Returns:
+            The previous index of the room now at index i, None if room i
+            was the last one.
+        """
+        last = len(self.room_list) - 1
+        assert last > 0, "Invalid input room list: Empty"
+        affected = set(self._unlink(i))
+        self._drop(i)
+        moved = None
+        if i != last:
+            moved = last
+            affected.update(self._unlink(last))
+            self._drop(last)
+            self.room_list[i] = self.room_list[last]
+            self.room_list[i].room_id = i
+            self._insert(i)
+            affected.update(self._link(i))
+            affected.add(i)
+        self.room_list.pop()
+        if self.exposure is not None:
+            self.exposure.pop()
+        affected.discard(last)
+        self._update(affected)
+        return moved
+
+    def eval(self):
+        """Returns the scores of FloorPlan.eval() from the patched totals."""
+        align_score, hallway_access_score, work_ext_score, meet_score = (
+            self._totals)
+        size_score = self.desired_size.copy()
+        for prog_type, area in self.type_area.items():
+            size_score[prog_type] -= area
+        return (align_score, size_score, self.desired_size,
+                self._lounge_check(), hallway_access_score, work_ext_score,
+                meet_score, len(self.type_rooms.get('CIRC', ())))
+
+    def result(self):
+        """Returns the scores and areas like evaluate, with the desired
+        sizes of the current usable area."""
+        total_area = sum(self.type_area.values())
+        total_usable_area = sum(area for prog_type, area
+                                in self.type_area.items()
+                                if prog_type != 'OBS')
+        self.desired_size = desired_size_of(total_usable_area)
+        return self.eval(), total_area, total_usable_area, total_usable_area
+
+    def _insert(self, i):
+        """Indexes room i, its edges are linked by _link."""
+        self._index.add(i, self.room_list[i].shape)
+        self._add_type(i)
+
+    def _drop(self, i):
+        """Removes room i from the indexes, the graph and the totals."""
+        room = self.room_list[i]
+        self._index.remove(i)
+        self._remove_type(i)
+        del self.adj_graph[(i, room.prog_type)]
+        del self._neighbors[i]
+        self._add_contribution(self._contributions.pop(i), -1)
+
+    def _add_type(self, i):
+        """Adds room i to rooms_by_id, type_rooms and type_area."""
+        room = self.room_list[i]
+        self.rooms_by_id[i] = room
+        bisect.insort(self.type_rooms.setdefault(room.prog_type, []), i)
+        self.type_area[room.prog_type] = (
+            self.type_area.get(room.prog_type, 0) + room.area)
+
+    def _remove_type(self, i):
+        """Removes room i from rooms_by_id, type_rooms and type_area."""
+        room = self.room_list[i]
+        del self.rooms_by_id[i]
+        rooms = self.type_rooms[room.prog_type]
+        del rooms[bisect.bisect_left(rooms, i)]
+        if rooms:
+            self.type_area[room.prog_type] -= room.area
+        else:
+            # No leftover rounding error once the type is gone.
+            del self.type_rooms[room.prog_type]
+            del self.type_area[room.prog_type]
+
+    def _link(self, i):
+        """Calculates the common edges of room i and adds room i to the
+        common edges of its neighbors.
+
+        Returns:
+            The indexes of the neighbors.
+        """
+        neighbors = self._index.neighbors(i)
+        self._neighbors[i] = neighbors
+        for j, direction, _ in neighbors:
+            opposite = OPPOSITE[direction]
+            bisect.insort(self._neighbors[j],
+                          (i, opposite, self._index.ratio(j, i, opposite)))
+        return [j for j, _, _ in neighbors]
+
+    def _unlink(self, i):
+        """Removes room i from the common edges of its neighbors.
+
+        Returns:
+            The indexes of the neighbors.
+        """
+        neighbors = [j for j, _, _ in self._neighbors[i]]
+        for j in neighbors:
+            self._neighbors[j] = [edge for edge in self._neighbors[j]
+                                  if edge[0] != i]
+        return neighbors
+
+    def ensure_exposure(self):
+        """Calculates exposure from the kept common edges unless already
+        calculated. Edits keep it up to date from then on."""
+        if self.exposure is None:
+            shapes = self._index.shapes
+            self.exposure = [exposed_lengths(shapes[i], self._neighbors[i],
+                                             shapes)
+                             for i in range(len(self.room_list))]
+
+    def _update(self, rooms):
+        """Rebuilds the graph entries, exposed lengths if calculated and
+        contributions of rooms from their common edges."""
+        room_list = self.room_list
+        shapes = self._index.shapes
+        for i in rooms:
+            neighbors = self._neighbors[i]
+            edges = [(direction, room_list[j].prog_type, ratio)
+                     for j, direction, ratio in neighbors]
+            add_wall_edges(edges)
+            self.adj_graph[(i, room_list[i].prog_type)] = edges
+            if self.exposure is not None:
+                self.exposure[i] = exposed_lengths(shapes[i], neighbors,
+                                                   shapes)
+            self._recontribute(i)
+
+    def _recontribute(self, i):
+        """Replaces the contribution of room i by one from its graph entry."""
+        room = self.room_list[i]
+        new = self._contribution(room, self.adj_graph[(i, room.prog_type)])
+        old = self._contributions.get(i)
+        self._contributions[i] = new
+        totals = self._totals
+        if old is None:
+            for k in range(4):
+                totals[k] += new[k]
+        else:
+            for k in range(4):
+                totals[k] += new[k] - old[k]
+
+    def _add_contribution(self, contribution, sign):
+        totals = self._totals
+        for k, val in enumerate(contribution):
+            totals[k] += sign * val
+
+    @staticmethod
+    def _contribution(room, edges):
+        """Returns what room adds to the align, hallway access, exterior
+        work and meet scores, see the FloorPlan checks."""
+        align = 0
+        access = 0
+        work_ext = 0
+        meet = 0
+        circ = False
+        wall = False
+        for _, prog_type, ratio in edges:
+            align += abs(ratio - 1)
+            if prog_type == 'CIRC':
+                circ = True
+            elif prog_type == 'wall':
+                wall = True
+            elif prog_type == 'WORK':
+                meet += ratio
+        if room.prog_type == 'CIRC':
+            align = 0
+        elif not circ:
+            access = 1
+        if room.prog_type == 'WORK' and wall:
+            work_ext = room.area
+        if room.prog_type != 'ENTRANCE':
+            meet = 0
+        return align, access, work_ext, meet
@@ -0,0 +1,238 @@
+"""Live evaluation sessions of floor plans edited room by room.
+
+An editor opens a LiveSession with a whole plan once, then only sends the
+rooms it adds, moves or removes. The edits are applied to an
+IncrementalFloorPlan, so none of them rebuilds the graph, and the session
+reports only the scores that changed since the last report. events()
+debounces rapid edits into a single report, for a server-sent events
+stream, until the session is closed or expires.
+"""
+import itertools
+import math
+import numbers
+import threading
+import time
+import uuid
+from evaluation.eval_graph import (desired_size_of, result_to_dict,
+                                   rooms_from_json)
+from evaluation.incremental import IncrementalFloorPlan
+from evaluation.validate import validate_plan
+
+
+def check_diff(diff):
+    """Asserts that diff is a dictionary whose shape, if it has one, is a
+    rectangle of four finite numbers, and whose program type, if it has
+    one, has a desired size, so that the edited plan can still be scored."""
+    assert isinstance(diff, dict), 'Invalid diff: not a dictionary.'
+    if 'type' in diff:
+        assert diff['type'] in desired_size_of(0), 'Invalid program type.'
+    if 'shape' in diff:
+        shape = diff['shape']
+        assert (isinstance(shape, (list, tuple)) and len(shape) == 4 and
+                all(isinstance(coord, numbers.Real) and math.isfinite(coord)
+                    for coord in shape)), 'Invalid input rectangle.'
+
+
+class LiveSession:
+    """A floor plan edited by diffs.
+
+    Rooms are named by ids that stay the same across edits, unlike their
+    indexes in the floor plan. The rooms of the initial plan get ids 0..n-1
+    in the order evaluate numbers them, added rooms get the next ids.
+
+    Attributes:
+        floor_plan: the IncrementalFloorPlan being edited.
+        version: number of edits applied so far.
+        debounce: seconds events() waits after an edit for further edits.
+        last_access: time.monotonic() of the last use, see LiveSessions.
+        closed: whether the session was closed, or expired, see
+            LiveSessions.
+    """
+
+    def __init__(self, floor_plan_json, debounce=0.1):
+        validate_plan(floor_plan_json).check()
+        room_list = rooms_from_json(floor_plan_json)
+        self.floor_plan = IncrementalFloorPlan(room_list,
+                                               desired_size_of(0))
+        self.version = 0
+        self.debounce = debounce
+        self.last_access = time.monotonic()
+        self.closed = False
+        # Room ids by index in the floor plan, and indexes by room id.
+        self._ids = list(range(len(room_list)))
+        self._indexes = {i: i for i in self._ids}
+        self._next_id = itertools.count(len(room_list))
+        self._reported = {}
+        self._reported_version = None
+        self._changed = threading.Condition()
+
+    def apply(self, diffs):
+        """Applies a list of room diffs.
+
+        Each diff is one of
+            {'op': 'add', 'type': prog_type, 'shape': rectangle},
+            {'op': 'move', 'id': room_id, 'shape': rectangle},
+            {'op': 'remove', 'id': room_id}.
+        The diffs before an invalid one stay applied.
+
+        Returns:
+            The ids of the added rooms, in order.
+        Raises:
+            ValueError: a diff is invalid.
+        """
+        added = []
+        with self._changed:
+            self.last_access = time.monotonic()
+            for k, diff in enumerate(diffs):
+                try:
+                    check_diff(diff)
+                    room_id = self._apply(diff)
+                except (AssertionError, KeyError, TypeError) as e:
+                    raise ValueError('Invalid diff %d: %s %s'
+                                     % (k, type(e).__name__, e))
+                self.version += 1
+                self._changed.notify_all()
+                if room_id is not None:
+                    added.append(room_id)
+        return added
+
+    def scores(self):
+        """Returns every score, as named by eval_graph.result_to_dict, and
+        marks them reported."""
+        with self._changed:
+            self.last_access = time.monotonic()
+            scores = result_to_dict(self.floor_plan.result())
+            self._reported = scores
+            self._reported_version = self.version
+        return scores
+
+    def changed_scores(self):
+        """Returns the scores that changed since the last report."""
+        with self._changed:
+            reported = self._reported
+            return {key: val for key, val in self.scores().items()
+                    if key not in reported or reported[key] != val}
+
+    def room_ids(self):
+        """Returns a dictionary of room id to (prog_type, shape)."""
+        with self._changed:
+            return {self._ids[i]: (room.prog_type, room.shape)
+                    for i, room in enumerate(self.floor_plan.room_list)}
+
+    def close(self):
+        """Marks the session closed, ending its events()."""
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def events(self, keepalive=15):
+        """Yields (version, changed scores) after every burst of edits.
+
+        After an edit not reported yet, waits until no further edit came for
+        debounce seconds and reports the scores that changed. Yields None
+        when there was no edit for keepalive seconds, so that the caller can
+        keep its connection alive. Ends once the session is closed.
+        """
+        while True:
+            with self._changed:
+                edited = self._changed.wait_for(
+                    lambda: (self.closed or
+                             self.version != self._reported_version),
+                    keepalive)
+                # Debounces until the edits stop.
+                while edited and not self.closed:
+                    version = self.version
+                    self._changed.wait(self.debounce)
+                    if self.version == version:
+                        break
+                if self.closed:
+                    return
+                changed = self.changed_scores() if edited else None
+            if not edited:
+                yield None
+            elif changed:
+                yield version, changed
+
+    def _apply(self, diff):
+        floor_plan = self.floor_plan
+        op = diff['op']
+        if op == 'add':
+            i = floor_plan.add_room(diff['type'], diff['shape'])
+            room_id = next(self._next_id)
+            self._ids.append(room_id)
+            self._indexes[room_id] = i
+            return room_id
+        if op == 'move':
+            floor_plan.move_room(self._indexes[diff['id']], diff['shape'])
+        elif op == 'remove':
+            i = self._indexes[diff['id']]
+            moved = floor_plan.remove_room(i)
+            del self._indexes[diff['id']]
+            if moved is not None:
+                self._ids[i] = self._ids[moved]
+                self._indexes[self._ids[i]] = i
+            self._ids.pop()
+        else:
+            raise KeyError(op)
+        return None
+
+
+class LiveSessions:
+    """Open live sessions by session id, dropping the idle ones.
+
+    Attributes:
+        ttl: seconds a session may stay unused before it is dropped.
+        debounce: debounce of the sessions, see LiveSession.
+    """
+
+    def __init__(self, ttl=600, debounce=0.1):
+        self.ttl = ttl
+        self.debounce = debounce
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, floor_plan_json):
+        """Opens a session on a plan and returns (session id, session)."""
+        session = LiveSession(floor_plan_json, debounce=self.debounce)
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = session
+        return session_id, session
+
+    def get(self, session_id):
+        """Returns the session, None if it does not exist or expired."""
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def events(self, session_id, keepalive=15):
+        """Yields the events of a session, see LiveSession.events.
+
+        Listening does not keep the session alive: the session still
+        expires after ttl seconds without edits or reports, and the events
+        end once it is closed or expired.
+        """
+        session = self.get(session_id)
+        if session is None:
+            return
+        for event in session.events(keepalive):
+            if event is None and self.get(session_id) is not session:
+                return
+            yield event
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        for session_id, session in list(self._sessions.items()):
+            if session.last_access < deadline:
+                del self._sessions[session_id]
+                session.close()
@@ -0,0 +1,230 @@
+"""Improves floor plans by simulated annealing.
+
+Every step perturbs one room of an IncrementalFloorPlan: it moves the room,
+moves one of its sides, or swaps its program type with another room. The
+candidate is scored from the patched scores of the floor plan, which only
+recalculates the rooms around the edit, and undone if it is rejected.
+
+Rooms stay on the integer grid the evaluation rounds shapes to, inside the
+bounding box of the starting plan, and a room is never moved onto another.
+Rooms that overlap in the starting plan keep their shapes.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from evaluation.eval_graph import (EVAL_FIELDS, Room, desired_size_of,
+                                   rooms_from_json)
+from evaluation.incremental import IncrementalFloorPlan
+
+# Weight of each score in the cost that is minimized, see plan_cost.
+DEFAULT_WEIGHTS = {'align_score': 1, 'hallway_access_score': 1,
+                   'meet_score': 1}
+
+
+def plan_cost(scores, weights):
+    """Returns the weighted sum of the scores of FloorPlan.eval().
+
+    Args:
+        scores: the tuple returned by FloorPlan.eval().
+        weights: a dictionary of score name, see eval_graph.EVAL_FIELDS,
+            to weight. Scores that are dictionaries, like size_score, count
+            as the sum of their absolute values. Negative weights reward a
+            score.
+    """
+    total = 0
+    for name, weight in weights.items():
+        val = scores[EVAL_FIELDS.index(name)]
+        if isinstance(val, dict):
+            val = sum(abs(v) for v in val.values())
+        total += weight * val
+    return total
+
+
+class Annealer:
+    """Simulated annealing of a floor plan.
+
+    Attributes:
+        floor_plan: the IncrementalFloorPlan being optimized.
+        weights: see plan_cost.
+        step: largest distance in grid units a room or side moves at once.
+        cost: cost of the current plan.
+        best_cost: lowest cost seen so far.
+        evaluations: number of candidates scored.
+        accepted: number of candidates accepted.
+    """
+
+    def __init__(self, floor_plan_json, weights=None, seed=0, step=1):
+        # Starts from the shapes the evaluation rounds to.
+        room_list = [Room(room.room_id, room.prog_type, room.shape)
+                     for room in rooms_from_json(floor_plan_json)]
+        total_usable_area = sum(room.area for room in room_list
+                                if room.prog_type != 'OBS')
+        self.floor_plan = IncrementalFloorPlan(
+            room_list, desired_size_of(total_usable_area))
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.step = step
+        self._rnd = random.Random(seed)
+        self._shapes = np.array([room.shape for room in room_list],
+                                dtype=np.int64)
+        self._prog_types = [room.prog_type for room in room_list]
+        self._bounds = (self._shapes[:, 0].min(), self._shapes[:, 1].min(),
+                        self._shapes[:, 2].max(), self._shapes[:, 3].max())
+        self.cost = plan_cost(self.floor_plan.eval(), self.weights)
+        self.best_cost = self.cost
+        self._best = self._snapshot()
+        self.evaluations = 0
+        self.accepted = 0
+
+    def run(self, steps, start_temperature=1.0, end_temperature=0.01):
+        """Runs steps annealing steps, cooling geometrically between the two
+        temperatures, and returns the best cost."""
+        assert 0 < end_temperature <= start_temperature, \
+            "Invalid temperatures."
+        cooling = (end_temperature / start_temperature) ** (1 / max(steps, 1))
+        temperature = start_temperature
+        rnd = self._rnd
+        for _ in range(steps):
+            undo = self._perturb()
+            temperature *= cooling
+            if undo is None:
+                continue
+            self.evaluations += 1
+            cost = plan_cost(self.floor_plan.eval(), self.weights)
+            delta = cost - self.cost
+            if delta <= 0 or rnd.random() < math.exp(-delta / temperature):
+                self.accepted += 1
+                self.cost = cost
+                if cost < self.best_cost:
+                    self.best_cost = cost
+                    self._best = self._snapshot()
+            else:
+                undo()
+        return self.best_cost
+
+    def best_plan(self):
+        """Returns the floor_plan_json of the best plan seen."""
+        prog_types, shapes = self._best
+        plan = {}
+        for prog_type, shape in zip(prog_types, shapes.tolist()):
+            plan.setdefault(prog_type, []).append(shape)
+        return plan
+
+    def _snapshot(self):
+        return self._prog_types[:], self._shapes.copy()
+
+    def _perturb(self):
+        """Applies a random feasible move.
+
+        Returns:
+            A function undoing the move, None if the move drawn was not
+            feasible and nothing changed.
+        """
+        rnd = self._rnd
+        floor_plan = self.floor_plan
+        i = rnd.randrange(len(floor_plan.room_list))
+        old = floor_plan.room_list[i]
+        move = rnd.random()
+        if move < 1 / 3:
+            j = rnd.randrange(len(floor_plan.room_list))
+            other = floor_plan.room_list[j]
+            if other.prog_type == old.prog_type:
+                return None
+            self._swap(i, j)
+            return lambda: self._swap(i, j)
+
+        shape = list(old.shape)
+        delta = rnd.choice((-1, 1)) * rnd.randint(1, self.step)
+        if move < 2 / 3:
+            # Moves the room along x or y.
+            axis = rnd.randrange(2)
+            shape[axis] += delta
+            shape[axis + 2] += delta
+        else:
+            # Moves one side of the room.
+            shape[rnd.randrange(4)] += delta
+        if not self._fits(i, shape):
+            return None
+        old_shape = old.shape
+        self._set_shape(i, shape)
+
+        def undo():
+            self._set_shape(i, old_shape)
+        return undo
+
+    def _fits(self, i, shape):
+        """Returns whether room i can take shape, i.e. the shape is valid,
+        inside the bounds and does not overlap another room."""
+        x_min, y_min, x_max, y_max = self._bounds
+        if not (x_min <= shape[0] < shape[2] <= x_max and
+                y_min <= shape[1] < shape[3] <= y_max):
+            return False
+        shapes = self._shapes
+        overlap = ((shapes[:, 0] < shape[2]) & (shapes[:, 2] > shape[0]) &
+                   (shapes[:, 1] < shape[3]) & (shapes[:, 3] > shape[1]))
+        overlap[i] = False
+        return not overlap.any()
+
+    def _swap(self, i, j):
+        """Swaps the program types of rooms i and j."""
+        prog_types = self._prog_types
+        prog_types[i], prog_types[j] = prog_types[j], prog_types[i]
+        self.floor_plan.set_prog_type(i, prog_types[i])
+        self.floor_plan.set_prog_type(j, prog_types[j])
+
+    def _set_shape(self, i, shape):
+        self.floor_plan.move_room(i, shape)
+        self._shapes[i] = shape
+
+
+def optimize(floor_plan_json, steps=10000, seed=0, weights=None, step=1,
+             start_temperature=1.0, end_temperature=0.01):
+    """Optimizes a floor plan by simulated annealing.
+
+    Args:
+        floor_plan_json: the starting plan, see evaluate.
+        steps: number of annealing steps.
+        seed: seed of the random moves.
+        weights: see plan_cost, defaults to DEFAULT_WEIGHTS.
+        step: largest distance in grid units a room or side moves at once.
+        start_temperature, end_temperature: the temperature cools
+            geometrically from the first to the second.
+    Returns:
+        A dictionary of the best plan found, its cost, the cost of the
+        starting plan, the seed, the number of candidates scored and
+        accepted, and the candidates scored per second.
+    """
+    start = time.perf_counter()
+    annealer = Annealer(floor_plan_json, weights=weights, seed=seed,
+                        step=step)
+    initial_cost = annealer.cost
+    annealer.run(steps, start_temperature, end_temperature)
+    seconds = time.perf_counter() - start
+    return {'plan': annealer.best_plan(), 'cost': annealer.best_cost,
+            'initial_cost': initial_cost, 'seed': seed,
+            'evaluations': annealer.evaluations,
+            'accepted': annealer.accepted,
+            'evaluations_per_second': annealer.evaluations / seconds}
+
+
+def _optimize_seed(args):
+    floor_plan_json, seed, kwargs = args
+    return optimize(floor_plan_json, seed=seed, **kwargs)
+
+
+def optimize_many(floor_plan_json, seeds, max_workers=None, **kwargs):
+    """Runs optimize with every seed in parallel processes.
+
+    Args:
+        floor_plan_json: the starting plan.
+        seeds: an iterable of seeds, one independent run each.
+        max_workers: number of processes, defaults to the number of CPUs.
+        kwargs: the other arguments of optimize.
+    Returns:
+        The results of optimize, sorted by cost.
+    """
+    jobs = [(floor_plan_json, seed, kwargs) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_optimize_seed, jobs))
+    return sorted(results, key=lambda result: result['cost'])
@@ -0,0 +1,133 @@
+"""Timing and size instrumentation of floor plan evaluation.
+
+Pass a Profile to evaluate (or FloorPlan) to record the wall time of every
+stage and counts such as rooms, edges and compared room pairs. Metrics
+aggregates many profiles and renders them in the Prometheus text format.
+"""
+import contextlib
+import threading
+import time
+
+
+class Profile:
+    """Stage timings and counters of one evaluation.
+
+    Attributes:
+        timings: a dictionary of stage name to seconds.
+        counts: a dictionary of counter name to value.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counts = {}
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """Adds the wall time of the with block to the stage timing."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = (self.timings.get(stage, 0) +
+                                   time.perf_counter() - start)
+
+    def count(self, name, value):
+        """Adds value to a counter."""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def total_time(self):
+        """Returns the summed wall time of all stages."""
+        return sum(self.timings.values())
+
+    def as_dict(self):
+        return {'timings': dict(self.timings), 'counts': dict(self.counts)}
+
+
+class _NullProfile:
+    """Profile that records nothing, used when profiling is off."""
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        yield
+
+    def count(self, name, value):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
+
+
+class Metrics:
+    """Totals of many evaluation profiles, for a /metrics endpoint.
+
+    Attributes:
+        buckets: upper bounds in seconds of the evaluation time histogram.
+    """
+
+    buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage_seconds = {}
+        self._stage_count = {}
+        self._counts = {}
+        self._bucket_counts = [0] * len(self.buckets)
+        self._evaluations = 0
+        self._seconds = 0
+        self._max_seconds = 0
+
+    def observe(self, profile):
+        """Adds the timings and counters of one evaluation."""
+        seconds = profile.total_time()
+        with self._lock:
+            for stage, val in profile.timings.items():
+                self._stage_seconds[stage] = (
+                    self._stage_seconds.get(stage, 0) + val)
+                self._stage_count[stage] = self._stage_count.get(stage, 0) + 1
+            for name, val in profile.counts.items():
+                self._counts[name] = self._counts.get(name, 0) + val
+            for k, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._bucket_counts[k] += 1
+            self._evaluations += 1
+            self._seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+
+    def render(self, gauges=None):
+        """Returns the metrics in the Prometheus text exposition format.
+
+        Args:
+            gauges: optional dictionary of extra gauge name to value, e.g.
+            cache statistics, appended with the 'aug_' prefix.
+        """
+        with self._lock:
+            lines = [
+                '# HELP aug_evaluation_seconds Wall time of an evaluation.',
+                '# TYPE aug_evaluation_seconds histogram']
+            for bound, count in zip(self.buckets, self._bucket_counts):
+                lines.append('aug_evaluation_seconds_bucket{le="%s"} %d'
+                             % (bound, count))
+            lines += ['aug_evaluation_seconds_bucket{le="+Inf"} %d'
+                      % self._evaluations,
+                      'aug_evaluation_seconds_sum %r' % self._seconds,
+                      'aug_evaluation_seconds_count %d' % self._evaluations,
+                      '# HELP aug_evaluation_max_seconds Slowest evaluation.',
+                      '# TYPE aug_evaluation_max_seconds gauge',
+                      'aug_evaluation_max_seconds %r' % self._max_seconds,
+                      '# HELP aug_evaluation_stage_seconds Wall time per '
+                      'evaluation stage.',
+                      '# TYPE aug_evaluation_stage_seconds summary']
+            for stage in sorted(self._stage_seconds):
+                lines += ['aug_evaluation_stage_seconds_sum{stage="%s"} %r'
+                          % (stage, self._stage_seconds[stage]),
+                          'aug_evaluation_stage_seconds_count{stage="%s"} %d'
+                          % (stage, self._stage_count[stage])]
+            lines += ['# HELP aug_evaluation_items_total Rooms, edges and '
+                      'compared pairs of all evaluations.',
+                      '# TYPE aug_evaluation_items_total counter']
+            for name in sorted(self._counts):
+                lines.append('aug_evaluation_items_total{item="%s"} %d'
+                             % (name, self._counts[name]))
+        for name, val in sorted((gauges or {}).items()):
+            lines += ['# TYPE aug_%s gauge' % name, 'aug_%s %r' % (name, val)]
+        return '\n'.join(lines) + '\n'
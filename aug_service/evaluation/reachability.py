@@ -0,0 +1,161 @@
+"""Egress and reachability metrics of a floor plan.
+
+People walk from the largest ENTRANCE through CIRC rooms, every other room
+is entered from a neighbor but not walked through, and OBS rooms are never
+entered. Rooms are connected when they truly share part of a side: the
+common edges of the evaluation also link rooms whose sides only lie on the
+same line, see eval_graph.intersect_edge_ratio, and those are left out.
+
+Both the union-find over CIRC rooms and the breadth-first search work on
+the CSR arrays of compact.CompactGraph, in time linear in the number of
+rooms and edges.
+"""
+from collections import deque
+import numpy as np
+from evaluation.compact import NO_ROOM
+from evaluation.eval_graph import desired_size_of
+from evaluation.eval_vector import (CIRC, ENTRANCE, LEFT, OBS, RIGHT,
+                                    VectorFloorPlan, plan_to_arrays)
+
+# Hop distance of the rooms that cannot be reached.
+UNREACHABLE = -1
+
+
+def walkable_edges(graph, shape):
+    """Returns the common edges along which two rooms truly touch.
+
+    Args:
+        graph: a compact.CompactGraph.
+        shape: (n, 4) array of the room rectangles the graph was built from.
+    Returns:
+        src, dst: edge arrays, sorted by src like the graph.
+    """
+    src = graph.sources()
+    keep = graph.indices != NO_ROOM
+    src, dst, direction = src[keep], graph.indices[keep], graph.direction[keep]
+    # Left and right edges run along y, up and bottom edges along x.
+    low = np.where((direction == RIGHT) | (direction == LEFT), 1, 0)
+    overlap = (np.minimum(shape[src, low + 2], shape[dst, low + 2]) -
+               np.maximum(shape[src, low], shape[dst, low]))
+    keep = overlap > 0
+    return src[keep], dst[keep]
+
+
+def circ_components(codes, src, dst):
+    """Labels the connected components of the CIRC rooms by union-find.
+
+    Args:
+        codes: program type code of each room.
+        src, dst: edge arrays, see walkable_edges.
+    Returns:
+        An int array of the component of each room, numbered from 0 in
+        order of their first room, and UNREACHABLE for the other rooms.
+    """
+    parent = list(range(len(codes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    mask = (codes[src] == CIRC) & (codes[dst] == CIRC) & (src < dst)
+    for i, j in zip(src[mask].tolist(), dst[mask].tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    labels = np.full(len(codes), UNREACHABLE, dtype=np.int64)
+    roots = {}
+    for i in np.flatnonzero(codes == CIRC).tolist():
+        labels[i] = roots.setdefault(find(i), len(roots))
+    return labels
+
+
+def hop_distances(codes, src, dst, start):
+    """Breadth-first search of the rooms reachable from a room.
+
+    Args:
+        codes: program type code of each room.
+        src, dst: edge arrays sorted by src, see walkable_edges.
+        start: index of the room the search starts from.
+    Returns:
+        An int array of the number of rooms walked into to reach each room,
+        UNREACHABLE for the rooms that cannot be reached.
+    """
+    num_rooms = len(codes)
+    indptr = np.zeros(num_rooms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_rooms), out=indptr[1:])
+    indptr = indptr.tolist()
+    neighbors = dst.tolist()
+    passable = (codes == CIRC).tolist()
+    enterable = (codes != OBS).tolist()
+
+    hops = [UNREACHABLE] * num_rooms
+    hops[start] = 0
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        if i != start and not passable[i]:
+            continue
+        for j in neighbors[indptr[i]:indptr[i + 1]]:
+            if hops[j] == UNREACHABLE and enterable[j]:
+                hops[j] = hops[i] + 1
+                queue.append(j)
+    return np.array(hops, dtype=np.int64)
+
+
+def reachability(floor_plan):
+    """Calculates the reachability metrics of a floor plan.
+
+    Args:
+        floor_plan: an eval_vector.VectorFloorPlan.
+    Returns:
+        A dictionary of
+            entrance: index of the largest ENTRANCE, the first one on ties,
+                None if there is no ENTRANCE.
+            circ_components: number of connected groups of CIRC rooms.
+            largest_circ_component: number of rooms of the largest group.
+            reachable_circ_components: number of groups reached from the
+                entrance.
+            hops: the hop distance of every room from the entrance, see
+                hop_distances.
+            max_hops, mean_hops: over the reached rooms but the entrance, 0
+                if there is none.
+            unreachable_rooms: number of rooms other than OBS that cannot be
+                reached.
+    """
+    codes = floor_plan.codes
+    src, dst = walkable_edges(floor_plan.graph, floor_plan.shape)
+    labels = circ_components(codes, src, dst)
+    sizes = np.bincount(labels[labels != UNREACHABLE])
+
+    entrance = None
+    hops = np.full(len(codes), UNREACHABLE, dtype=np.int64)
+    if np.any(codes == ENTRANCE):
+        entrance_area = np.where(codes == ENTRANCE, floor_plan.area, -1)
+        entrance = int(np.argmax(entrance_area))
+        hops = hop_distances(codes, src, dst, entrance)
+    reached = hops[hops > 0]
+    return {'entrance': entrance,
+            'circ_components': len(sizes),
+            'largest_circ_component': int(sizes.max()) if len(sizes) else 0,
+            'reachable_circ_components': len(np.unique(
+                labels[(labels != UNREACHABLE) & (hops != UNREACHABLE)])),
+            'hops': hops.tolist(),
+            'max_hops': int(reached.max()) if len(reached) else 0,
+            'mean_hops': float(reached.mean()) if len(reached) else 0,
+            'unreachable_rooms': int(np.count_nonzero(
+                (hops == UNREACHABLE) & (codes != OBS)))}
+
+
+def evaluate_reachability(floor_plan_json):
+    """Calculates the reachability metrics of floor_plan_json.
+
+    Rooms are numbered in the order of evaluate, program type by program
+    type, see reachability for the metrics.
+    """
+    coords, codes = plan_to_arrays(floor_plan_json)
+    # The metrics do not use the desired sizes.
+    floor_plan = VectorFloorPlan(coords, codes, desired_size_of(0))
+    return reachability(floor_plan)
@@ -0,0 +1,201 @@
+"""Rules evaluated by FloorPlan in a single pass over its rooms.
+
+A rule creates a state with start(), is shown every room together with its
+graph entry by room(), and turns the state into its score with result().
+Rules that only need a few rooms set room to None and look them up in the
+FloorPlan indexes (rooms_by_id, type_rooms, type_area) from result().
+Rules that do not read the graph set needs_graph to False, so a FloorPlan
+evaluating only such rules never builds it. Likewise, FloorPlan.exposure is
+only calculated for rules that set needs_exposure.
+FloorPlan.eval_rules() visits the rooms once for all of the given rules, so
+a new rule evaluated along with DEFAULT_RULES costs no extra pass over the
+graph.
+"""
+
+
+class Rule:
+    """Base class of the floor plan rules.
+
+    Attributes:
+        name: name of the score the rule computes.
+        needs_graph: whether the rule reads adj_graph, or the edges given
+            to room(), which are None when the graph is not built.
+        needs_exposure: whether the rule reads FloorPlan.exposure.
+    """
+
+    name = None
+    needs_graph = True
+    needs_exposure = False
+
+    def start(self, floor_plan):
+        """Returns the initial state of the rule for floor_plan."""
+        return [0]
+
+    def room(self, state, i, room, edges):
+        """Accumulates room i, whose graph entry is edges, into state."""
+        raise NotImplementedError
+
+    def result(self, state, floor_plan):
+        """Returns the score of the rule from its final state."""
+        return state[0]
+
+
+class AlignmentRule(Rule):
+    """Checks alignment score of the floor plan.
+
+    High align_score means more un-alignment (0 is the best score).
+    """
+
+    name = 'align_score'
+
+    def room(self, state, i, room, edges):
+        if room.prog_type != 'CIRC':
+            align_score = state[0]
+            for edge in edges:
+                align_score += abs(edge[2] - 1)
+            state[0] = align_score
+
+
+class SizeRule(Rule):
+    """Checks size of each program type of the floor plan.
+
+    High size_score means high deviation from desired area ({0, 0, 0, 0, 0
+    ...} is the best case which means no deviation).
+    """
+
+    name = 'size_score'
+    needs_graph = False
+
+    def start(self, floor_plan):
+        return floor_plan.desired_size.copy()
+
+    def room(self, state, i, room, edges):
+        state[room.prog_type] -= room.area
+
+    def result(self, state, floor_plan):
+        return state
+
+
+class LoungeRule(Rule):
+    """Checks if lounge touch the core area and the good view.
+
+    The lounge is the largest ENTRANCE. Note that in evluation, we assume
+    all walls are good views. See more details in the Room. The score is
+    {'touch_gv': 0, 'touch_core': 1} (0 means not touch, >=1 means touch).
+    """
+
+    name = 'lounge_score'
+    room = None
+
+    def result(self, state, floor_plan):
+        lounge_score = {'touch_gv': 0, 'touch_core': 0}
+        max_size = 0
+        lounge_index = 0
+        for i in floor_plan.type_rooms.get('ENTRANCE', ()):
+            room = floor_plan.room_list[i]
+            if room.area > max_size:
+                max_size = room.area
+                lounge_index = room.room_id
+        if 0 <= lounge_index < len(floor_plan.room_list):
+            lounge = floor_plan.room_list[lounge_index]
+            for edge in floor_plan.adj_graph[(lounge_index, lounge.prog_type)]:
+                if edge[1] == 'core':
+                    lounge_score['touch_core'] += 1
+                elif edge[1] == 'wall':
+                    lounge_score['touch_gv'] += 1
+        return lounge_score
+
+
+class AccessRule(Rule):
+    """Checks the accessibility of floor plan.
+
+    High hallway_access score means more un-accessibility. (Best would be 0;
+    it means all rooms are connected to hallway.)
+    """
+
+    name = 'hallway_access_score'
+
+    def room(self, state, i, room, edges):
+        if room.prog_type != 'CIRC':
+            for edge in edges:
+                if edge[1] == 'CIRC':
+                    return
+            state[0] += 1
+
+
+class ExtWorkRule(Rule):
+    """Checks the rule: 'Work is better put at the wall'.
+
+    High work_ext_score means more area are assigned to be work space.
+    """
+
+    name = 'work_ext_score'
+    room = None
+
+    def result(self, state, floor_plan):
+        work_ext_score = 0
+        # The area is looked up by room_id. Like the original scan of
+        # room_list, a missing room_id reuses the previous room's area.
+        size = None
+        for i in floor_plan.type_rooms.get('WORK', ()):
+            for edge in floor_plan.adj_graph[(i, 'WORK')]:
+                if edge[1] == 'wall':
+                    room = floor_plan.rooms_by_id.get(i)
+                    if room is not None:
+                        size = room.area
+                    work_ext_score += size
+                    break
+        return work_ext_score
+
+
+class WorkExposureRule(Rule):
+    """Measures how much of the WORK rooms' perimeter touches the wall.
+
+    Uses the exposed lengths of FloorPlan.exposure instead of the 'wall'
+    edges, so sides shared with rooms that overlap one another or only lie
+    on the same line are measured exactly. Not one of DEFAULT_RULES.
+    High work_exposure means more work space at the wall.
+    """
+
+    name = 'work_exposure'
+    room = None
+    needs_graph = False
+    needs_exposure = True
+
+    def result(self, state, floor_plan):
+        return sum(sum(floor_plan.exposure[i])
+                   for i in floor_plan.type_rooms.get('WORK', ()))
+
+
+class MeetRule(Rule):
+    """Rule: 'meet should separate lounge and work as much as possible.'.
+
+    To simplify it we just lower the adjacency between lounge and work.
+    """
+
+    name = 'meet_score'
+
+    def room(self, state, i, room, edges):
+        if room.prog_type == 'ENTRANCE':
+            for edge in edges:
+                if edge[1] == 'WORK':
+                    state[0] += edge[2]
+
+
+class HallwayCountRule(Rule):
+    """Returns the number of circulate.
+
+    Smaller num_hallway means less corner of hallway, the smaller the better.
+    """
+
+    name = 'hallway_number'
+    needs_graph = False
+
+    def room(self, state, i, room, edges):
+        if room.prog_type == 'CIRC':
+            state[0] += 1
+
+
+# Rules of FloorPlan.eval(), in the order of its scores.
+DEFAULT_RULES = (AlignmentRule(), SizeRule(), LoungeRule(), AccessRule(),
+                 ExtWorkRule(), MeetRule(), HallwayCountRule())
@@ -0,0 +1,145 @@
+"""Scores a stream of NDJSON floor plans with bounded memory.
+
+Plans are read lazily, sent to the workers in chunks and written back in
+input order. At most max_pending chunks are in flight, so memory does not
+grow with the size of the dataset.
+"""
+import collections
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from evaluation.batch import evaluate_or_error
+from evaluation.eval_graph import result_to_dict
+
+
+def _score_lines(args):
+    """Parses and evaluates a chunk of NDJSON lines in a worker."""
+    lines, engine = args
+    records = []
+    for line in lines:
+        try:
+            floor_plan_json = json.loads(line)
+        except ValueError as e:
+            records.append((None, 'JSONDecodeError: %s' % e))
+            continue
+        records.append(evaluate_or_error(floor_plan_json, engine))
+    return records
+
+
+def _chunks(lines, chunksize):
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def default_max_pending(max_workers=None):
+    """Returns the default number of tasks in flight on max_workers
+    workers, twice their number so that no worker waits for a task.
+    max_workers defaults to the number of CPUs, like for a process pool."""
+    return 2 * (max_workers or os.cpu_count() or 1)
+
+
+def ordered_results(executor, fn, tasks, max_pending=None):
+    """Runs fn on every task with executor and yields the results in task
+    order.
+
+    Tasks are submitted lazily and at most max_pending are in flight, so
+    memory does not grow with the number of tasks.
+
+    Args:
+        executor: a concurrent.futures executor.
+        fn: a picklable function of one task.
+        tasks: an iterable of arguments of fn.
+        max_pending: maximum number of tasks in flight, defaults to
+            default_max_pending() for a pool of one process per CPU.
+    Yields:
+        fn(task) for every task.
+    """
+    if max_pending is None:
+        max_pending = default_max_pending()
+    pending = collections.deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        while len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def indexed_scores(chunks, start=0):
+    """Numbers the records of chunks of (result, error) pairs.
+
+    Yields:
+        (index, scores, error) for every record, index counting from
+        start. scores is the dictionary of result_to_dict, or None if
+        evaluation failed, in which case error is a message.
+    """
+    index = start
+    for records in chunks:
+        for result, error in records:
+            yield (index, result_to_dict(result) if error is None else None,
+                   error)
+            index += 1
+
+
+def stream_scores(lines, executor, engine='graph', start=0, chunksize=16,
+                  max_pending=None):
+    """Evaluates NDJSON floor plans in order.
+
+    Args:
+        lines: an iterable of lines, one floor_plan_json per line. Blank
+            lines are skipped and not counted.
+        executor: a concurrent.futures executor running the evaluations.
+        engine: evaluation engine, see evaluate.
+        start: number of plans to skip, to resume an interrupted run.
+        chunksize: number of plans evaluated per task.
+        max_pending: maximum number of chunks in flight, see
+            ordered_results.
+    Yields:
+        (index, scores, error) for every plan from start on, index counting
+        plans from 0, see indexed_scores.
+    """
+    plans = (line for line in lines if line.strip())
+    plans = itertools.islice(plans, start, None)
+    tasks = ((chunk, engine) for chunk in _chunks(plans, chunksize))
+    yield from indexed_scores(
+        ordered_results(executor, _score_lines, tasks, max_pending), start)
+
+
+def to_ndjson(index, scores, error):
+    """Formats a record of stream_scores as one NDJSON line."""
+    record = {'index': index}
+    if error is None:
+        record.update(scores)
+    else:
+        record['error'] = error
+    return json.dumps(record, default=_to_builtin) + '\n'
+
+
+def _to_builtin(val):
+    # NumPy scalars that are not float subclasses, e.g. numpy.int64.
+    if hasattr(val, 'item'):
+        return val.item()
+    raise TypeError('%r is not JSON serializable' % (val,))
+
+
+def score_ndjson(lines, output, max_workers=None, **kwargs):
+    """Evaluates NDJSON lines on a process pool and writes NDJSON scores.
+
+    Args:
+        lines: an iterable of NDJSON lines.
+        output: a text file the scores are written to.
+        max_workers: number of processes, defaults to the number of CPUs.
+        kwargs: passed to stream_scores.
+    Yields:
+        The index of every plan written, for progress reporting.
+    """
+    kwargs.setdefault('max_pending', default_max_pending(max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, scores, error in stream_scores(lines, executor, **kwargs):
+            output.write(to_ndjson(index, scores, error))
+            yield index
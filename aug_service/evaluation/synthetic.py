@@ -0,0 +1,62 @@
+"""Deterministic generator of synthetic floor plans of any size."""
+import heapq
+import math
+import random
+from evaluation.eval_graph import desired_size_of
+
+# Program types that evaluate() has a desired size for.
+EVALUATED_PROG_TYPES = list(desired_size_of(0))
+
+
+def generate_plan(num_rooms, seed=0, prog_types=None, room_area=100):
+    """Generates a rectilinear floor plan without overlapping rooms.
+
+    The plan is a square cut in two along the longer side of its largest
+    room, at an integer position, until it holds num_rooms rooms. Rooms thus
+    tile the floor and share walls like real plans do. Every program type
+    is used at least once if there are enough rooms.
+
+    Args:
+        num_rooms: number of rooms of the plan.
+        seed: seed of the random generator, equal seeds give equal plans.
+        prog_types: program types to assign, defaults to
+            EVALUATED_PROG_TYPES.
+        room_area: mean area of a room.
+    Returns:
+        A floor_plan_json dictionary with integer coordinates.
+    """
+    assert num_rooms > 0, "Invalid number of rooms."
+    rnd = random.Random(seed)
+    prog_types = list(prog_types or EVALUATED_PROG_TYPES)
+    side = int(math.ceil(math.sqrt(num_rooms * room_area)))
+
+    # Heap of (-area, insertion order, room), largest room first.
+    rooms = [(-side * side, 0, (0, 0, side, side))]
+    for order in range(1, num_rooms):
+        _, _, (x_min, y_min, x_max, y_max) = heapq.heappop(rooms)
+        if x_max - x_min >= y_max - y_min:
+            cut = x_min + _cut(rnd, x_max - x_min)
+            parts = [(x_min, y_min, cut, y_max), (cut, y_min, x_max, y_max)]
+        else:
+            cut = y_min + _cut(rnd, y_max - y_min)
+            parts = [(x_min, y_min, x_max, cut), (x_min, cut, x_max, y_max)]
+        for k, part in enumerate(parts):
+            area = (part[2] - part[0]) * (part[3] - part[1])
+            heapq.heappush(rooms, (-area, 2 * order + k, part))
+
+    assigned = prog_types[:num_rooms]
+    assigned += [rnd.choice(prog_types)
+                 for _ in range(num_rooms - len(assigned))]
+    rnd.shuffle(assigned)
+    floor_plan_json = {prog_type: [] for prog_type in prog_types}
+    for prog_type, (_, _, room) in zip(assigned, sorted(rooms)):
+        floor_plan_json[prog_type].append(list(room))
+    return floor_plan_json
+
+
+def _cut(rnd, length):
+    """Returns an integer cut position strictly inside (0, length)."""
+    if length < 2:
+        raise ValueError('Room too small to be split, increase room_area.')
+    return rnd.randint(max(1, length * 3 // 10), min(length - 1,
+                                                     length * 7 // 10))
@@ -0,0 +1,182 @@
+"""Graph construction of a single large floor plan on several processes.
+
+The plan is cut into a grid of spatial tiles, each room belonging to the
+tile of its center, and the graph entries of every tile are built in a
+worker process. The rounded rectangles and program types are put in shared
+memory once, so workers map them instead of receiving a copy per tile.
+
+The halo of a tile, the rooms its rooms may share an edge with, is not a
+fixed distance around it: the common edges link rooms whose sides lie on
+the same line however far apart they are, see
+eval_graph.intersect_edge_ratio. Every worker therefore sorts the four
+sides of all rooms once and finds the halo of a tile by binary search on
+the side lines of its rooms, which gives exactly the graph of the 'bucket'
+builder.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from evaluation.adjacency import DIRECTIONS
+from evaluation.eval_graph import Room, graph_entry
+from evaluation.eval_vector import side_index, vector_adjacency
+from evaluation.profiling import NULL_PROFILE, Profile
+
+# Number of tiles per worker, so that workers finishing early take more.
+TILES_PER_WORKER = 4
+
+# Shared arrays attached by this process, by shared memory name.
+_attached = {}
+
+
+def tile_rooms(shapes, num_tiles):
+    """Groups rooms into a grid of about num_tiles spatial tiles.
+
+    Args:
+        shapes: (n, 4) array of rectangles.
+        num_tiles: the wanted number of tiles.
+    Returns:
+        A list of the ascending room index arrays of the non-empty tiles.
+    """
+    center_x = (shapes[:, 0] + shapes[:, 2]) / 2
+    center_y = (shapes[:, 1] + shapes[:, 3]) / 2
+    columns = max(1, int(math.ceil(math.sqrt(num_tiles))))
+    rows = max(1, int(math.ceil(num_tiles / columns)))
+    tile = np.zeros(len(shapes), dtype=np.int64)
+    for center, count, stride in ((center_x, columns, 1),
+                                  (center_y, rows, columns)):
+        low, high = center.min(), center.max()
+        if high > low:
+            cell = ((center - low) / (high - low) * count).astype(np.int64)
+            tile += np.minimum(cell, count - 1) * stride
+    order = np.argsort(tile, kind='stable')
+    bounds = np.flatnonzero(np.diff(tile[order])) + 1
+    return np.split(order, bounds)
+
+
+def _attach(coords_name, codes_name, num_rooms):
+    """Returns the shared arrays of a build and their side index."""
+    state = _attached.get(coords_name)
+    if state is None:
+        _release()
+        coords_shm = shared_memory.SharedMemory(name=coords_name)
+        codes_shm = shared_memory.SharedMemory(name=codes_name)
+        shapes = np.ndarray((num_rooms, 4), dtype=np.int64,
+                            buffer=coords_shm.buf)
+        codes = np.ndarray(num_rooms, dtype=np.int8, buffer=codes_shm.buf)
+        state = _attached[coords_name] = {
+            'memory': (coords_shm, codes_shm),
+            'shapes': shapes,
+            'index': side_index(shapes),
+            'prog_types': [Room.available_prog_types[code]
+                           for code in codes.tolist()]}
+    return state
+
+
+def _release():
+    """Detaches the shared arrays attached by this process."""
+    while _attached:
+        _, state = _attached.popitem()
+        memory = state.pop('memory')
+        # The views of the buffers must go before the memory is closed.
+        state.clear()
+        for shm in memory:
+            shm.close()
+
+
+def _build_tile(args):
+    """Builds the graph entries of the rooms of a tile in a worker.
+
+    Returns:
+        entries, num_edges, num_comparisons: the graph entry of each room of
+        the tile, see eval_graph.graph_entry, and the number of common edges
+        and of compared pairs.
+    """
+    coords_name, codes_name, num_rooms, rooms = args
+    state = _attach(coords_name, codes_name, num_rooms)
+    profile = Profile()
+    src, dst, direction, ratio = vector_adjacency(
+        state['shapes'], rooms, state['index'], profile)
+    bounds = np.searchsorted(src, rooms, side='left').tolist()
+    bounds.append(len(src))
+    neighbors = list(zip(dst.tolist(),
+                         [DIRECTIONS[k] for k in direction.tolist()],
+                         ratio.tolist()))
+
+    prog_types = state['prog_types']
+    entries = [graph_entry(neighbors[bounds[k]:bounds[k + 1]], prog_types)
+               for k in range(len(rooms))]
+    return entries, len(src), profile.counts.get('pair_comparisons', 0)
+
+
+def tiled_graph(shapes, prog_types, max_workers=None, num_tiles=None,
+                executor=None, profile=NULL_PROFILE):
+    """Builds the graph entries of all rooms tile by tile.
+
+    Args:
+        shapes: a list of rounded rectangles, x_min, y_min, x_max, y_max.
+        prog_types: program type of each room.
+        max_workers: number of processes, of the pool started or of
+            executor, defaults to the number of CPUs. With 1 and no
+            executor the tiles are built in this process.
+        num_tiles: number of spatial tiles, defaults to TILES_PER_WORKER
+            per worker.
+        executor: an optional concurrent.futures process pool to build the
+            tiles on instead of starting one.
+        profile: a profiling.Profile counting the edges and compared pairs.
+    Returns:
+        For each room its graph entry, a list of (direction, prog_type,
+        ratio) edges followed by its wall edges, see eval_graph.graph_entry.
+    """
+    coords = np.asarray(shapes, dtype=np.int64).reshape(-1, 4)
+    assert len(coords) == len(prog_types), "Invalid program types."
+    assert np.all(coords[:, 0] < coords[:, 2]), \
+        "Invalid input rectangle: x_min < x_max"
+    assert np.all(coords[:, 1] < coords[:, 3]), \
+        "Invalid input rectangle: y_min < y_max"
+    if not len(coords):
+        return []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if num_tiles is None:
+        num_tiles = TILES_PER_WORKER * max_workers
+    codes = np.array([Room.available_prog_types.index(prog_type)
+                      for prog_type in prog_types], dtype=np.int8)
+
+    coords_shm = shared_memory.SharedMemory(create=True, size=coords.nbytes)
+    codes_shm = shared_memory.SharedMemory(create=True, size=codes.nbytes)
+    try:
+        np.ndarray(coords.shape, dtype=coords.dtype,
+                   buffer=coords_shm.buf)[:] = coords
+        np.ndarray(codes.shape, dtype=codes.dtype,
+                   buffer=codes_shm.buf)[:] = codes
+        tiles = tile_rooms(coords, num_tiles)
+        tasks = [(coords_shm.name, codes_shm.name, len(coords), rooms)
+                 for rooms in tiles]
+        if executor is not None:
+            results = list(executor.map(_build_tile, tasks))
+        elif max_workers == 1:
+            try:
+                results = [_build_tile(task) for task in tasks]
+            finally:
+                _release()
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(_build_tile, tasks))
+    finally:
+        coords_shm.close()
+        codes_shm.close()
+        coords_shm.unlink()
+        codes_shm.unlink()
+
+    entries = [None] * len(coords)
+    num_edges = num_comparisons = 0
+    for rooms, (tile_entries, edges, comparisons) in zip(tiles, results):
+        for i, edges_i in zip(rooms.tolist(), tile_entries):
+            entries[i] = edges_i
+        num_edges += edges
+        num_comparisons += comparisons
+    profile.count('pair_comparisons', num_comparisons)
+    profile.count('edges', num_edges)
+    return entries
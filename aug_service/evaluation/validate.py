@@ -0,0 +1,280 @@
+"""Validation of a whole floor plan at once.
+
+validate_plan checks the program types and rectangles of every room with
+array operations and finds all overlapping rooms with a sweep along x, so
+a plan is checked once before evaluation instead of pair by pair in the
+adjacency builders. Rooms are numbered like evaluate numbers them.
+
+Rectangles are checked after rounding, as the evaluation rounds them, see
+eval_graph.Room. Overlaps are measured on the shapes as given and are not
+errors: the evaluation scores overlapping plans, the report only points
+them out.
+"""
+import bisect
+import numbers
+import numpy as np
+from evaluation.eval_graph import Room, desired_size_of
+
+
+class ValidationReport:
+    """Problems found in a floor plan.
+
+    Attributes:
+        num_rooms: number of rooms of the plan.
+        invalid_types: program types that are not Room.available_prog_types.
+        invalid_values: program types whose value is not a list of rooms.
+        unscored_types: program types with rooms that have no desired size,
+            see eval_graph.desired_size_of, so evaluate cannot score them.
+        invalid_rooms: a list of (room_id, message) of the rooms whose
+            rectangle cannot be evaluated.
+        overlaps: a list of (room_id, other_room_id, area) of the pairs of
+            rooms that overlap, room_id < other_room_id.
+    """
+
+    def __init__(self, num_rooms=0):
+        self.num_rooms = num_rooms
+        self.invalid_types = []
+        self.invalid_values = []
+        self.unscored_types = []
+        self.invalid_rooms = []
+        self.overlaps = []
+
+    @property
+    def ok(self):
+        """Whether the plan can be evaluated."""
+        return (self.num_rooms > 0 and not self.invalid_types and
+                not self.invalid_values and not self.unscored_types and
+                not self.invalid_rooms)
+
+    def check(self):
+        """Raises the error evaluate would raise on the first problem, if
+        the plan cannot be evaluated."""
+        if self.invalid_values:
+            raise TypeError('Invalid rooms of program type %s.'
+                            % self.invalid_values[0])
+        if self.num_rooms == 0:
+            raise AssertionError('Invalid input room list: Empty')
+        if self.invalid_types:
+            raise AssertionError('Invalid program type.')
+        if self.invalid_rooms:
+            raise AssertionError(self.invalid_rooms[0][1])
+        if self.unscored_types:
+            raise KeyError(self.unscored_types[0])
+
+    def as_dict(self):
+        """Returns the report as a JSON serializable dictionary."""
+        return {'ok': self.ok,
+                'num_rooms': self.num_rooms,
+                'invalid_types': self.invalid_types,
+                'invalid_values': self.invalid_values,
+                'unscored_types': self.unscored_types,
+                'invalid_rooms': [{'room_id': room_id, 'error': message}
+                                  for room_id, message in self.invalid_rooms],
+                'overlaps': [{'room_id': a, 'other_room_id': b, 'area': area}
+                             for a, b, area in self.overlaps]}
+
+
+def validate_plan(floor_plan_json):
+    """Validates floor_plan_json.
+
+    Args:
+        floor_plan_json: A dictionary that specifies each zone's location
+        using rectangular representation.
+    Returns:
+        A ValidationReport.
+    """
+    report = ValidationReport()
+    desired_size = desired_size_of(0)
+    coords = []
+    for key, val in floor_plan_json.items():
+        if key not in Room.available_prog_types:
+            report.invalid_types.append(key)
+        if not isinstance(val, (list, tuple, np.ndarray)):
+            report.invalid_values.append(key)
+            continue
+        if len(val) and key in Room.available_prog_types and (
+                key not in desired_size):
+            report.unscored_types.append(key)
+        if isinstance(val, np.ndarray) and (
+                val.dtype.kind in 'biuf' and val.ndim == 2 and
+                val.shape[1] == 4):
+            recs = val.astype(np.float64)
+        elif all(_is_rectangle(rec) for rec in val):
+            recs = np.asarray(val, dtype=np.float64).reshape(-1, 4)
+        else:
+            # Malformed rooms are left NaN and reported here.
+            recs = np.full((len(val), 4), np.nan)
+            for k, rec in enumerate(val):
+                if _is_rectangle(rec):
+                    recs[k] = rec
+                else:
+                    report.invalid_rooms.append((report.num_rooms + k,
+                                                 'Invalid input rectangle.'))
+        coords.append(recs)
+        report.num_rooms += len(recs)
+    if coords:
+        _check_rooms(report, np.concatenate(coords))
+    return report
+
+
+def _is_rectangle(rec):
+    """Whether rec is a list or tuple of four numbers, see _check_rooms
+    for their values."""
+    return (isinstance(rec, (list, tuple)) and len(rec) == 4 and
+            all(isinstance(coord, numbers.Real) for coord in rec))
+
+
+def validate_arrays(coords, codes):
+    """Validates a floor plan given as arrays, like the binary bodies of
+    evaluation.codec.
+
+    Args:
+        coords, codes: the plan, see eval_vector.plan_to_arrays.
+    Returns:
+        A ValidationReport.
+    """
+    report = ValidationReport(len(coords))
+    desired_size = desired_size_of(0)
+    for code in np.unique(codes).tolist():
+        prog_type = Room.available_prog_types[code]
+        if prog_type not in desired_size:
+            report.unscored_types.append(prog_type)
+    if len(coords):
+        _check_rooms(report, np.asarray(coords, dtype=np.float64))
+    return report
+
+
+def _check_rooms(report, coords):
+    """Adds the invalid rectangles among coords, and the overlaps of the
+    valid ones, to report."""
+    bad = {room_id for room_id, _ in report.invalid_rooms}
+    shape = np.rint(coords)
+    for message, invalid in (
+            ('Invalid input rectangle.', ~np.isfinite(coords).all(axis=1)),
+            ('Invalid input rectangle: x_min < x_max',
+             ~(shape[:, 0] < shape[:, 2])),
+            ('Invalid input rectangle: y_min < y_max',
+             ~(shape[:, 1] < shape[:, 3]))):
+        for room_id in np.flatnonzero(invalid).tolist():
+            if room_id not in bad:
+                bad.add(room_id)
+                report.invalid_rooms.append((room_id, message))
+    report.invalid_rooms.sort()
+
+    valid = np.ones(len(coords), dtype=bool)
+    valid[list(bad)] = False
+    room_ids = np.flatnonzero(valid)
+    a, b, area = find_overlaps(coords[valid])
+    report.overlaps = list(zip(room_ids[a].tolist(), room_ids[b].tolist(),
+                               area.tolist()))
+
+
+def find_overlaps(coords):
+    """Finds the pairs of rectangles that overlap with a positive area.
+
+    Rectangles are swept along x: each one is compared with the active
+    rectangles, those that start before it and end after its x_min. The
+    active set is kept ordered by y, both by y_min and in an interval tree
+    of the y spans, so only the pairs that also overlap along y are visited
+    and the cost grows with the number of overlaps, not of x-overlapping
+    pairs. Rectangles that merely touch do not overlap.
+
+    Args:
+        coords: (n, 4) array of valid rectangles.
+    Returns:
+        a, b, area: arrays of the overlapping pairs, a < b, sorted by a then
+        b, and of their overlap areas.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+    ys = np.unique(coords[:, [1, 3]])
+    lows = np.searchsorted(ys, coords[:, 1]).tolist()
+    highs = np.searchsorted(ys, coords[:, 3]).tolist()
+    y_mins = coords[:, 1].tolist()
+    y_maxs = coords[:, 3].tolist()
+    tree = _SpanTree(len(ys))
+    # (y_min, room) of the active rectangles, sorted.
+    active = []
+    starts = np.argsort(coords[:, 0], kind='stable').tolist()
+    ends = np.argsort(coords[:, 2], kind='stable').tolist()
+    x_mins = coords[:, 0].tolist()
+    x_maxs = coords[:, 2].tolist()
+    first, second = [], []
+    k = 0
+    for i in starts:
+        if not (x_mins[i] < x_maxs[i] and y_mins[i] < y_maxs[i]):
+            continue
+        # Rectangles ending where i starts only touch it.
+        while k < len(ends) and x_maxs[ends[k]] <= x_mins[i]:
+            j = ends[k]
+            k += 1
+            pos = bisect.bisect_left(active, (y_mins[j], j))
+            if pos < len(active) and active[pos][1] == j:
+                del active[pos]
+                tree.remove(lows[j], highs[j], j)
+        # Active rectangles spanning y_min of i, then those starting inside
+        # the span of i.
+        for j in tree.stab(lows[i]):
+            first.append(j)
+            second.append(i)
+        pos = bisect.bisect_right(active, (y_mins[i], len(coords)))
+        while pos < len(active) and active[pos][0] < y_maxs[i]:
+            first.append(active[pos][1])
+            second.append(i)
+            pos += 1
+        bisect.insort(active, (y_mins[i], i))
+        tree.add(lows[i], highs[i], i)
+
+    a = np.array(first, dtype=np.intp)
+    b = np.array(second, dtype=np.intp)
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    width = (np.minimum(coords[a, 2], coords[b, 2]) -
+             np.maximum(coords[a, 0], coords[b, 0]))
+    height = (np.minimum(coords[a, 3], coords[b, 3]) -
+              np.maximum(coords[a, 1], coords[b, 1]))
+    area = width * height
+    pairs = np.lexsort((b, a))
+    return a[pairs], b[pairs], area[pairs]
+
+
+class _SpanTree:
+    """Segment tree of the spans [low, high) of elementary y intervals.
+
+    A span is stored on the O(log n) nodes covering it, so stab() lists the
+    spans holding an interval by walking up from its leaf.
+    """
+
+    def __init__(self, num_points):
+        self.size = 1
+        while self.size < num_points:
+            self.size *= 2
+        self.nodes = {}
+
+    def _cover(self, low, high):
+        low += self.size
+        high += self.size
+        while low < high:
+            if low & 1:
+                yield low
+                low += 1
+            if high & 1:
+                high -= 1
+                yield high
+            low >>= 1
+            high >>= 1
+
+    def add(self, low, high, item):
+        for node in self._cover(low, high):
+            self.nodes.setdefault(node, set()).add(item)
+
+    def remove(self, low, high, item):
+        for node in self._cover(low, high):
+            self.nodes[node].discard(item)
+
+    def stab(self, index):
+        """Returns the items whose span holds elementary interval index."""
+        node = index + self.size
+        items = []
+        while node:
+            items.extend(self.nodes.get(node, ()))
+            node >>= 1
+        return items
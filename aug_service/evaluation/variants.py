@@ -0,0 +1,190 @@
+"""Evaluation of many variants of a base floor plan.
+
+Variants usually differ from their base plan in a few rooms. VariantSet
+builds the IncrementalFloorPlan of the base plan once; each variant's
+room diffs are then applied to it, its scores read, and the diffs undone
+in reverse order. Evaluating a variant therefore costs O(degree) per diff
+rather than a full build and evaluation, and every variant shares the
+graph of all the rooms it does not touch.
+"""
+from evaluation.eval_graph import (desired_size_of, result_to_dict,
+                                   rooms_from_json)
+from evaluation.incremental import IncrementalFloorPlan
+from evaluation.live import check_diff
+from evaluation.validate import validate_plan
+
+
+def score_deltas(base, scores):
+    """Returns the difference of scores to base, as named by
+    eval_graph.result_to_dict.
+
+    Dictionary scores, like size_score, are compared key by key, a key
+    missing on one side counting as 0.
+    """
+    deltas = {}
+    for name, val in scores.items():
+        base_val = base[name]
+        if isinstance(val, dict):
+            deltas[name] = {key: val.get(key, 0) - base_val.get(key, 0)
+                            for key in {**base_val, **val}}
+        else:
+            deltas[name] = val - base_val
+    return deltas
+
+
+class VariantSet:
+    """A base floor plan and the variants evaluated against it.
+
+    Rooms are named by ids like in live.LiveSession: the rooms of the base
+    plan have ids 0..n-1 in the order evaluate numbers them, and the rooms
+    a variant adds get ids n, n+1, ... in the order it adds them.
+
+    Attributes:
+        floor_plan: the IncrementalFloorPlan of the base plan, back in its
+            base state between evaluations.
+        base_scores: the scores of the base plan, see
+            eval_graph.result_to_dict.
+    """
+
+    def __init__(self, floor_plan_json):
+        validate_plan(floor_plan_json).check()
+        room_list = rooms_from_json(floor_plan_json)
+        self.floor_plan = IncrementalFloorPlan(room_list, desired_size_of(0))
+        self.base_scores = result_to_dict(self.floor_plan.result())
+        self._num_rooms = len(room_list)
+
+    def evaluate(self, diffs):
+        """Evaluates the variant made by applying diffs to the base plan.
+
+        Each diff is one of
+            {'op': 'add', 'type': prog_type, 'shape': rectangle},
+            {'op': 'move', 'id': room_id, 'shape': rectangle},
+            {'op': 'retype', 'id': room_id, 'type': prog_type},
+            {'op': 'remove', 'id': room_id}.
+
+        Returns:
+            The scores of the variant, see eval_graph.result_to_dict.
+        Raises:
+            ValueError: diffs is not a list of diffs, or a diff is invalid.
+                The base plan is left unchanged.
+        """
+        if not isinstance(diffs, (list, tuple)):
+            raise ValueError('Invalid variant: not a list of diffs.')
+        floor_plan = self.floor_plan
+        # Patched sums are restored as they were, so that rounding errors
+        # do not build up over the variants.
+        totals = list(floor_plan._totals)
+        type_area = dict(floor_plan.type_area)
+        self._undo = []
+        # Indexes of the ids not at their own index, None once removed, and
+        # ids of the indexes not holding their own id.
+        self._indexes = {}
+        self._ids = {}
+        self._next_id = self._num_rooms
+        try:
+            for k, diff in enumerate(diffs):
+                try:
+                    check_diff(diff)
+                    self._apply(diff)
+                except (AssertionError, KeyError, TypeError) as e:
+                    raise ValueError('Invalid diff %d: %s %s'
+                                     % (k, type(e).__name__, e))
+            return result_to_dict(floor_plan.result())
+        finally:
+            for step in reversed(self._undo):
+                step()
+            floor_plan._totals = totals
+            floor_plan.type_area = type_area
+            floor_plan.desired_size = desired_size_of(
+                self.base_scores['total_usable_area'])
+
+    def compare(self, variants):
+        """Evaluates variants and compares them to the base plan.
+
+        Args:
+            variants: a list of lists of diffs, see evaluate.
+        Returns:
+            A list with, for each variant, either {'scores': its scores,
+            'deltas': their difference to base_scores, see score_deltas}
+            or {'error': message}.
+        """
+        rows = []
+        for diffs in variants:
+            try:
+                scores = self.evaluate(diffs)
+            except ValueError as e:
+                rows.append({'error': str(e)})
+                continue
+            rows.append({'scores': scores,
+                         'deltas': score_deltas(self.base_scores, scores)})
+        return rows
+
+    def _index(self, room_id):
+        """Returns the index of the room with room_id in the variant."""
+        if room_id in self._indexes:
+            i = self._indexes[room_id]
+        elif isinstance(room_id, int) and 0 <= room_id < self._num_rooms:
+            i = room_id
+        else:
+            i = None
+        if i is None:
+            raise KeyError(room_id)
+        return i
+
+    def _place(self, room_id, i):
+        self._indexes[room_id] = i
+        self._ids[i] = room_id
+
+    def _apply(self, diff):
+        """Applies diff and records the steps undoing it."""
+        floor_plan = self.floor_plan
+        room_list = floor_plan.room_list
+        undo = self._undo
+        op = diff['op']
+        if op == 'add':
+            i = floor_plan.add_room(diff['type'], diff['shape'])
+            undo.append(lambda: floor_plan.remove_room(i))
+            self._place(self._next_id, i)
+            self._next_id += 1
+            return
+        i = self._index(diff['id'])
+        room = room_list[i]
+        if op == 'move':
+            floor_plan.move_room(i, diff['shape'])
+            undo.append(lambda: floor_plan.move_room(i, room.raw_shape))
+        elif op == 'retype':
+            floor_plan.set_prog_type(i, diff['type'])
+            undo.append(lambda: floor_plan.set_prog_type(i, room.prog_type))
+        elif op == 'remove':
+            last_room = room_list[-1]
+            moved = floor_plan.remove_room(i)
+            self._indexes[self._ids.pop(i, i)] = None
+            if moved is None:
+                undo.append(lambda: floor_plan.add_room(room.prog_type,
+                                                        room.raw_shape))
+            else:
+                self._place(self._ids.pop(moved, moved), i)
+
+                # The last room now sits at i: add it back at the end, then
+                # turn the room at i back into the removed one.
+                def restore():
+                    floor_plan.add_room(last_room.prog_type,
+                                        last_room.raw_shape)
+                    floor_plan.move_room(i, room.raw_shape)
+                    if room.prog_type != last_room.prog_type:
+                        floor_plan.set_prog_type(i, room.prog_type)
+                undo.append(restore)
+        else:
+            raise KeyError(op)
+
+
+def evaluate_variants(floor_plan_json, variants):
+    """Evaluates variants of floor_plan_json, see VariantSet.
+
+    Returns:
+        {'base': the scores of floor_plan_json, 'variants': the
+        comparison of each variant, see VariantSet.compare}.
+    """
+    variant_set = VariantSet(floor_plan_json)
+    return {'base': variant_set.base_scores,
+            'variants': variant_set.compare(variants)}
@@ -0,0 +1,53 @@
+"""Exports the numeric features of floor plans for training models.
+
+Reads a dataset written by convert_plans.py, or floor plan JSON files,
+directories of them and NDJSON files, and writes one row of features per
+plan, in order, see evaluation.features:
+
+    python export_features.py --dataset plans.dataset -o features --workers 8
+    python export_features.py plans.ndjson -o features
+
+The output directory holds features.npy, a float64 matrix with a NaN row
+for every plan that cannot be evaluated, and columns.json, the names of
+its columns. Datasets are exported on a pool of processes, other inputs
+in this process.
+"""
+import argparse
+import sys
+import time
+from convert_plans import read_plans
+from evaluation.features import export_dataset_features, export_plan_features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='*',
+                        help='JSON files, directories or NDJSON files')
+    parser.add_argument('-o', '--output', required=True,
+                        help='features directory')
+    parser.add_argument('--dataset',
+                        help='dataset directory to export instead of files')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes for datasets')
+    parser.add_argument('--chunksize', type=int, default=256,
+                        help='plans per chunk')
+    args = parser.parse_args(argv)
+    if not args.dataset and not args.paths:
+        parser.error('expected paths or --dataset')
+
+    start_time = time.perf_counter()
+    if args.dataset:
+        count = export_dataset_features(args.dataset, args.output,
+                                        max_workers=args.workers,
+                                        chunksize=args.chunksize)
+    else:
+        count = export_plan_features(args.output, read_plans(args.paths),
+                                     chunksize=args.chunksize)
+    elapsed = time.perf_counter() - start_time
+    sys.stderr.write('Exported %d plans in %.1f s to %s\n'
+                     % (count, elapsed, args.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Improves a floor plan by simulated annealing.
+
+Reads a floor plan JSON file, runs one annealing run per seed on a pool of
+processes and writes the best plan found as JSON:
+
+    python optimize_plan.py plan.json -o best.json --steps 50000 --seeds 8
+
+Weights of the minimized scores are given as name=weight pairs, e.g.
+--weight align_score=1 --weight work_ext_score=-0.01. The cost of every run
+is reported on stderr.
+"""
+import argparse
+import json
+import sys
+from evaluation.eval_graph import EVAL_FIELDS
+from evaluation.optimize import DEFAULT_WEIGHTS, optimize_many
+
+
+def parse_weight(text):
+    name, _, weight = text.partition('=')
+    if name not in EVAL_FIELDS:
+        raise argparse.ArgumentTypeError('unknown score %r' % name)
+    return name, float(weight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('file', help='floor plan JSON file')
+    parser.add_argument('-o', '--output', help='output file, stdout if none')
+    parser.add_argument('--steps', type=int, default=10000,
+                        help='annealing steps per run')
+    parser.add_argument('--seeds', type=int, default=1,
+                        help='number of independent runs')
+    parser.add_argument('--workers', type=int, help='number of processes')
+    parser.add_argument('--step', type=int, default=1,
+                        help='largest move in grid units')
+    parser.add_argument('--weight', type=parse_weight, action='append',
+                        help='score weight as name=weight, repeatable')
+    args = parser.parse_args(argv)
+
+    with open(args.file) as f:
+        floor_plan_json = json.load(f)
+    weights = dict(args.weight) if args.weight else DEFAULT_WEIGHTS
+    results = optimize_many(floor_plan_json, range(args.seeds),
+                            max_workers=args.workers, steps=args.steps,
+                            weights=weights, step=args.step)
+    for result in results:
+        sys.stderr.write('seed %d: cost %.4f -> %.4f, %d evaluations, '
+                         '%.0f evaluations/s\n'
+                         % (result['seed'], result['initial_cost'],
+                            result['cost'], result['evaluations'],
+                            result['evaluations_per_second']))
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(results[0]['plan'], output)
+        output.write('\n')
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Scores floor plans stored as newline-delimited JSON.
+
+Reads one floor plan JSON object per line from files or stdin, evaluates
+them on a pool of processes and writes one JSON line of scores per plan,
+in input order:
+
+    python score_plans.py plans.ndjson -o scores.ndjson --workers 8
+    cat plans.ndjson | python score_plans.py --start 100000 >> scores.ndjson
+    python score_plans.py --dataset plans.dataset -o scores.ndjson
+
+Each output line holds the plan 'index' and either the scores or an
+'error'. --start skips already scored plans to resume a run. Progress is
+reported on stderr. --dataset scores a memory-mapped dataset written by
+convert_plans.py instead, with the 'vector' engine unless told otherwise.
+"""
+import argparse
+import fileinput
+import sys
+import time
+from evaluation.dataset import score_dataset_file
+from evaluation.stream import score_ndjson
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('files', nargs='*',
+                        help='NDJSON files, stdin if none or -')
+    parser.add_argument('-o', '--output', help='output file to append to, stdout if none')
+    parser.add_argument('--workers', type=int, help='number of processes')
+    parser.add_argument('--dataset',
+                        help='dataset directory to score instead of files')
+    parser.add_argument('--engine', choices=['graph', 'vector'],
+                        help="defaults to 'vector' for datasets, else 'graph'")
+    parser.add_argument('--start', type=int, default=0,
+                        help='number of plans to skip')
+    parser.add_argument('--chunksize', type=int,
+                        help='plans evaluated per task, 16 or 64 for datasets')
+    parser.add_argument('--report-every', type=float, default=10,
+                        help='seconds between progress reports, 0 for none')
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'a') if args.output else sys.stdout
+    if args.dataset:
+        lines = None
+        scored = score_dataset_file(args.dataset, output,
+                                    max_workers=args.workers,
+                                    engine=args.engine or 'vector',
+                                    start=args.start,
+                                    chunksize=args.chunksize or 64)
+    else:
+        lines = fileinput.input(args.files or ['-'])
+        scored = score_ndjson(lines, output, max_workers=args.workers,
+                              engine=args.engine or 'graph', start=args.start,
+                              chunksize=args.chunksize or 16)
+    start_time = last_report = time.perf_counter()
+    count = 0
+    try:
+        for _ in scored:
+            count += 1
+            now = time.perf_counter()
+            if args.report_every and now - last_report >= args.report_every:
+                last_report = now
+                sys.stderr.write('%d plans, %.1f plans/s\n'
+                                 % (count, count / (now - start_time)))
+    finally:
+        if lines is not None:
+            lines.close()
+        if args.output:
+            output.close()
+    elapsed = time.perf_counter() - start_time
+    sys.stderr.write('Scored %d plans in %.1f s, %.1f plans/s\n'
+                     % (count, elapsed, count / elapsed if elapsed else 0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
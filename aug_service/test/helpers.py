@@ -0,0 +1,19 @@
+"""Floor plans shared by the unit tests."""
+import json
+import os
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..',
+                             'test_data')
+
+
+def load_plan(name):
+    """Loads the floor plan json file name from TEST_DATA_DIR."""
+    with open(os.path.join(TEST_DATA_DIR, name)) as f:
+        return json.load(f)
+
+
+def load_plans():
+    """Yields (name, floor plan json) for each file of TEST_DATA_DIR, in
+    order of name."""
+    for name in sorted(os.listdir(TEST_DATA_DIR)):
+        yield name, load_plan(name)
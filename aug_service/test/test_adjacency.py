@@ -0,0 +1,151 @@
+"""A unit test file to eval the bucketed and snapped adjacency engines."""
+import random
+import unittest
+from evaluation.adjacency import (EdgeIndex, bucket_adjacency,
+                                  covered_length, exposed_lengths,
+                                  snap_adjacency)
+from evaluation.eval_graph import pairwise_adjacency
+from evaluation.eval_graph import FloorPlan, Room, rooms_from_json
+from test.helpers import load_plans
+
+
+class TestBucketAdjacency(unittest.TestCase):
+    # Sets commonly used test variable for TestBucketAdjacency.
+    def setUp(self):
+        self.desired_size = {'CIRC': 100,
+                             'OPERATE': 100,
+                             'WORK': 100,
+                             'ENTRANCE': 100,
+                             'MEET': 100,
+                             'WASH': 100,
+                             'OBS': 100}
+
+    def test_invalid_input(self):
+        with self.assertRaises(AssertionError):
+            bucket_adjacency([[0, 0, 1, 1], [0, 0, -1, -1]])
+
+    def test_same_as_pairwise(self):
+        shapes = [[0, 0, 1, 1],
+                  [-0.5, 0.5, 0, 1],
+                  [1, 0, 1.5, 0.5],
+                  [0, 1, 0.5, 1.5],
+                  [0.5, -0.5, 1, 0],
+                  # Only touches a corner of the first rectangle.
+                  [1, 1, 2, 2],
+                  # Shares a side line with the first one but is far away.
+                  [-1, 5, 0, 6]]
+        self.assertEqual(pairwise_adjacency(shapes), bucket_adjacency(shapes))
+
+    def test_random_grid(self):
+        # Rooms are cells of a grid merged at random, so many rooms share
+        # the same lines.
+        rnd = random.Random(0)
+        shapes = []
+        for x in range(0, 20, 2):
+            y = 0
+            while y < 20:
+                height = rnd.choice([1, 2, 3])
+                shapes.append([x, y, x + rnd.choice([1, 2]), y + height])
+                y += height
+        self.assertEqual(pairwise_adjacency(shapes), bucket_adjacency(shapes))
+
+    def test_test_data_graph(self):
+        for name, floor_plan_json in load_plans():
+            room_list = rooms_from_json(floor_plan_json)
+            self.assertEqual(
+                FloorPlan(room_list, self.desired_size,
+                          adjacency='pairwise').adj_graph,
+                FloorPlan(room_list, self.desired_size).adj_graph, name)
+
+    def test_exposed_lengths(self):
+        self.assertEqual(0, covered_length([]))
+        self.assertEqual(7, covered_length([(4, 8), (0, 2), (1, 3), (5, 6)]))
+        shapes = [[0, 0, 4, 2], [4, 0, 5, 1], [4, 0.5, 6, 3], [1, 2, 2, 3]]
+        self.assertEqual((0, 2, 3, 4), exposed_lengths(
+            shapes[0], bucket_adjacency(shapes)[0], shapes))
+
+    def test_index_add_remove(self):
+        index = EdgeIndex([[0, 0, 1, 1], [1, 0, 2, 1]])
+        self.assertEqual([(1, 'right', 1)], index.neighbors(0))
+
+        index.add(2, [0, 1, 1, 2])
+        self.assertEqual([(1, 'right', 1), (2, 'up', 1)], index.neighbors(0))
+
+        self.assertEqual([1, 0, 2, 1], index.remove(1))
+        self.assertEqual([(2, 'up', 1)], index.neighbors(0))
+        self.assertEqual([('bottom', 0)], list(index.candidates(2)))
+
+
+class TestSnapAdjacency(unittest.TestCase):
+
+    def assertAdjacencyAlmostEqual(self, expected, adjacency):
+        self.assertEqual([[edge[:2] for edge in edges] for edges in expected],
+                         [[edge[:2] for edge in edges] for edges in adjacency])
+        for edges, actual_edges in zip(expected, adjacency):
+            for edge, actual_edge in zip(edges, actual_edges):
+                self.assertAlmostEqual(edge[2], actual_edge[2], places=5)
+
+    def test_tolerance(self):
+        shapes = [[0, 0, 1, 1],
+                  # Touches the first one up to float error.
+                  [1 + 2e-15, 0.25, 2, 1 - 1e-15],
+                  # Gap larger than the tolerance.
+                  [-0.5, 0, -0.01, 1]]
+        self.assertAdjacencyAlmostEqual(
+            [[(1, 'right', 0.75)], [(0, 'left', 1)], []],
+            snap_adjacency(shapes))
+        self.assertAdjacencyAlmostEqual(
+            [[(1, 'right', 0.75), (2, 'left', 1)]],
+            snap_adjacency(shapes, tolerance=0.1)[:1])
+
+    def test_true_overlap(self):
+        shapes = [[0, 0, 1, 1],
+                  # Shares a side line with the first one but is far away.
+                  [-1, 5, 0, 6],
+                  # Only touches a corner of the first rectangle.
+                  [1, 1, 2, 2],
+                  [1, 0.5, 3, 1]]
+        self.assertEqual([[(3, 'right', 0.5)], [], [(3, 'bottom', 1)],
+                          [(0, 'left', 1), (2, 'up', 0.5)]],
+                         snap_adjacency(shapes))
+
+    def test_perturbed_grid(self):
+        # Same graph as the exact grid when every coordinate is off by less
+        # than the tolerance, also across snapping cell borders.
+        rnd = random.Random(0)
+        shapes = [[x, y, x + 1, y + 1] for x in range(5) for y in range(5)]
+        noisy = [[coord + rnd.uniform(-4e-7, 4e-7) for coord in rec]
+                 for rec in shapes]
+        self.assertAdjacencyAlmostEqual(snap_adjacency(shapes),
+                                        snap_adjacency(noisy))
+
+    def test_floor_plan(self):
+        room_list = [Room(0, 'WORK', [0, 0, 0.4, 1]),
+                     Room(1, 'CIRC', [0.4, 0, 1, 1])]
+        # Rounded to [0, 0, 0, 1], the first room is invalid.
+        with self.assertRaises(AssertionError):
+            FloorPlan(room_list, {'WORK': 0, 'CIRC': 0})
+        floorplan = FloorPlan(room_list, {'WORK': 0, 'CIRC': 0},
+                              adjacency='snap')
+        self.assertEqual([('right', 'CIRC', 1), ('left', 'wall', 1),
+                          ('up', 'wall', 1), ('bottom', 'wall', 1)],
+                         floorplan.adj_graph[(0, 'WORK')])
+
+    def test_floor_plan_walls(self):
+        # The uncovered length of a side, not its ratio, is compared with
+        # the tolerance: 5 of a 1000 long side is a wall, 0.005 of a 0.1
+        # long side is not.
+        room_list = [Room(0, 'WORK', [0, 0, 1, 1000]),
+                     Room(1, 'CIRC', [1, 0, 2, 995]),
+                     Room(2, 'WORK', [0, 1000, 1, 1000.1]),
+                     Room(3, 'CIRC', [1, 1000, 2, 1000.095])]
+        floorplan = FloorPlan(room_list, {'WORK': 0, 'CIRC': 0},
+                              adjacency='snap', tolerance=0.01)
+        walls = {(i, edge[0]) for (i, _), edges in floorplan.adj_graph.items()
+                 for edge in edges if edge[1] == 'wall'}
+        self.assertIn((0, 'right'), walls)
+        self.assertNotIn((2, 'right'), walls)
+
+
+if __name__ == '__main__':
+    unittest.main()
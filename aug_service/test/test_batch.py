@@ -0,0 +1,40 @@
+"""A unit test file to eval the batch evaluation."""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from evaluation.batch import evaluate_many
+from evaluation.eval_graph import evaluate
+from test.helpers import load_plans
+
+
+class TestEvaluateMany(unittest.TestCase):
+
+    def setUp(self):
+        self.plans = [plan for _, plan in load_plans()]
+
+    def test_order(self):
+        results = evaluate_many(self.plans, max_workers=2)
+        self.assertEqual([(evaluate(plan), None) for plan in self.plans],
+                         results)
+
+    def test_errors(self):
+        plans = [{'WORK': [[0, 0, 1, 1]]},
+                 {'KITCHEN': [[0, 0, 1, 1]]},
+                 {'WORK': [[0, 0, -1, -1], [0, 0, 1, 1]]},
+                 {'WORK': [[0, 0, 2, 2]]}]
+        results = evaluate_many(plans, max_workers=2)
+        self.assertEqual((evaluate(plans[0]), None), results[0])
+        self.assertEqual((None, 'AssertionError: Invalid program type.'),
+                         results[1])
+        self.assertIsNone(results[2][0])
+        self.assertTrue(results[2][1].startswith('AssertionError'))
+        self.assertEqual((evaluate(plans[3]), None), results[3])
+
+    def test_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = evaluate_many(self.plans[:3], engine='vector',
+                                    executor=executor)
+        self.assertEqual([None] * 3, [error for _, error in results])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""A unit test file to eval the building evaluation."""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from evaluation.building import evaluate_building
+from evaluation.cache import EvaluationCache
+from evaluation.eval_graph import evaluate
+from test.helpers import load_plan
+
+
+class TestEvaluateBuilding(unittest.TestCase):
+
+    def setUp(self):
+        self.typical = load_plan('data1.json')
+        self.lobby = {'ENTRANCE': [[0, 0, 10, 10]], 'CIRC': [[10, 0, 20, 10]],
+                      'OBS': [[0, 10, 20, 20]]}
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_floors(self):
+        floors = [self.lobby, self.typical, self.typical, self.typical]
+        floor_results, building = evaluate_building(floors,
+                                                    executor=self.executor)
+        expected = [(evaluate(floor), None)
+                    for floor in floors]
+        self.assertEqual(expected, floor_results)
+        self.assertEqual(4, building['floors'])
+        self.assertEqual(2, building['unique_floors'])
+        self.assertEqual([], building['failed_floors'])
+        self.assertAlmostEqual(
+            sum(scores[1] for scores, _ in expected), building['total_area'])
+        self.assertAlmostEqual(
+            sum(scores[0][1]['WORK'] for scores, _ in expected),
+            building['size_score']['WORK'])
+        worst = max(scores[0][4] for scores, _ in expected)
+        self.assertEqual(worst, building['hallway_access_score'])
+        self.assertEqual([scores[0][4] for scores, _ in expected].index(worst),
+                         building['worst_access_floor'])
+
+    def test_errors(self):
+        floors = [self.lobby, {'KITCHEN': [[0, 0, 1, 1]]}, 'lobby']
+        floor_results, building = evaluate_building(floors,
+                                                    executor=self.executor)
+        self.assertIsNone(floor_results[0][1])
+        self.assertEqual((None, 'AssertionError: Invalid program type.'),
+                         floor_results[1])
+        self.assertTrue(floor_results[2][1].startswith('TypeError'))
+        self.assertEqual([1, 2], building['failed_floors'])
+        self.assertEqual(0, building['worst_access_floor'])
+        self.assertEqual(200, building['total_usable_area'])
+
+    def test_cache(self):
+        cache = EvaluationCache()
+        evaluate_building([self.lobby, self.lobby], executor=self.executor,
+                          cache=cache)
+        self.assertEqual(1, len(cache))
+        floor_results, _ = evaluate_building([self.lobby, self.typical],
+                                             executor=self.executor,
+                                             cache=cache)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(evaluate(self.lobby),
+                         floor_results[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
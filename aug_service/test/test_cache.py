@@ -0,0 +1,92 @@
+"""A unit test file to eval the evaluation result cache."""
+import os
+import tempfile
+import unittest
+from evaluation.cache import EvaluationCache, canonical_plan, plan_key
+from evaluation.eval_graph import evaluate, result_to_dict
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = {'WORK': [[0, 0, 1, 1]], 'CIRC': [[1, 0, 2, 1]]}
+
+    def test_plan_key(self):
+        self.assertEqual({'WORK': [[0, 0, 1, 1]], 'CIRC': [[1, 0, 2, 1]]},
+                         canonical_plan(dict(self.plan, MEET=[])))
+        self.assertEqual(plan_key(self.plan),
+                         plan_key(dict(self.plan, MEET=[])))
+        # Rounding and the order of program types can change the scores.
+        nearby_plan = {'WORK': [[0, 0, 1, 1]], 'CIRC': [[1.0000001, 0, 2, 1]]}
+        self.assertNotEqual(plan_key(self.plan), plan_key(nearby_plan))
+        reordered = {'CIRC': [[1, 0, 2, 1]], 'WORK': [[0, 0, 1, 1]]}
+        self.assertNotEqual(plan_key(self.plan), plan_key(reordered))
+
+    def test_exact(self):
+        cache = EvaluationCache()
+        plan = {'WORK': [[0, 0, 1, 1]], 'CIRC': [[1, 0, 2, 1], [0, 1, 1, 2]]}
+        reordered = {'CIRC': plan['CIRC'], 'WORK': plan['WORK']}
+        self.assertNotEqual(evaluate(plan), evaluate(reordered))
+        for floor_plan_json in [plan, reordered, plan, reordered]:
+            self.assertEqual(evaluate(floor_plan_json),
+                             cache.evaluate(floor_plan_json))
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+
+    def test_hit_miss(self):
+        cache = EvaluationCache()
+        self.assertEqual(evaluate(self.plan), cache.evaluate(self.plan))
+        result = cache.evaluate(self.plan)
+        self.assertEqual(evaluate(self.plan), result)
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1,
+                          'maxsize': 1024}, cache.stats())
+
+        # Modifying a result does not change the cached one.
+        result[0][1]['WORK'] = 0
+        self.assertEqual(evaluate(self.plan), cache.evaluate(self.plan))
+
+        # Engines are cached separately.
+        cache.evaluate(self.plan, engine='vector')
+        self.assertEqual(2, cache.misses)
+
+    def test_fields(self):
+        cache = EvaluationCache()
+        expected = {'size_score': result_to_dict(evaluate(self.plan))[
+            'size_score']}
+        self.assertEqual(expected, cache.evaluate(self.plan,
+                                                  fields=['size_score']))
+        self.assertEqual(expected, cache.evaluate(self.plan,
+                                                  fields=['size_score']))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        # A cached whole evaluation answers any fields.
+        cache.evaluate(self.plan)
+        self.assertEqual({'meet_score': 0},
+                         cache.evaluate(self.plan, fields=['meet_score']))
+        self.assertEqual(2, cache.misses)
+
+    def test_eviction(self):
+        cache = EvaluationCache(maxsize=2)
+        plans = [{'WORK': [[0, 0, i, 1]]} for i in range(1, 4)]
+        for plan in plans:
+            cache.evaluate(plan)
+        # Touch the oldest plan still cached, then add the first one back.
+        cache.evaluate(plans[1])
+        cache.evaluate(plans[0])
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('graph:' + plan_key(plans[2])))
+        self.assertIsNotNone(cache.get('graph:' + plan_key(plans[1])))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'cache.pkl')
+            cache = EvaluationCache(path=path)
+            cache.evaluate(self.plan)
+            cache.save()
+
+            cache = EvaluationCache(path=path)
+            self.assertEqual(1, len(cache))
+            self.assertEqual(evaluate(self.plan), cache.evaluate(self.plan))
+            self.assertEqual(1, cache.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
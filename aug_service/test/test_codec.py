@@ -0,0 +1,42 @@
+"""A unit test file to eval the binary floor plan encoding."""
+import unittest
+from evaluation.codec import arrays_to_plan, decode_arrays, encode_plan
+from evaluation.eval_graph import Room
+from evaluation.eval_vector import plan_to_arrays
+from test.helpers import load_plan
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        floor_plan_json = load_plan('data2.json')
+        coords, codes = decode_arrays(encode_plan(floor_plan_json))
+        # Rooms are grouped in the order of Room.available_prog_types.
+        expected_coords, expected_codes = plan_to_arrays(
+            {key: floor_plan_json[key] for key in Room.available_prog_types
+             if key in floor_plan_json})
+        self.assertEqual(expected_coords.tolist(), coords.tolist())
+        self.assertEqual(expected_codes.tolist(), codes.tolist())
+        self.assertEqual({key: val for key, val in floor_plan_json.items()
+                          if val},
+                         arrays_to_plan(coords, codes))
+
+    def test_float32(self):
+        buf = encode_plan({'WORK': [[0, 0, 1.5, 1]]}, dtype='f')
+        self.assertEqual(3 + 1 + 9 * 4 + 4 * 4, len(buf))
+        coords, codes = decode_arrays(buf)
+        self.assertEqual([[0, 0, 1.5, 1]], coords.tolist())
+        self.assertEqual({'WORK': [[0, 0, 1.5, 1]]},
+                         arrays_to_plan(coords, codes))
+
+    def test_invalid_input(self):
+        with self.assertRaises(AssertionError):
+            encode_plan({'KITCHEN': [[0, 0, 1, 1]]})
+        with self.assertRaises(ValueError):
+            decode_arrays(b'{"WORK": [[0, 0, 1, 1]]}')
+        with self.assertRaises(ValueError):
+            decode_arrays(encode_plan({'WORK': [[0, 0, 1, 1]]})[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
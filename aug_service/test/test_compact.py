@@ -0,0 +1,71 @@
+"""A unit test file to eval the compact floor plan representation."""
+import tracemalloc
+import unittest
+import numpy as np
+from evaluation.compact import NO_ROOM, CompactGraph
+from evaluation.eval_graph import (FloorPlan, Room, desired_size_of,
+                                   rooms_from_json)
+from evaluation.eval_vector import VectorFloorPlan, plan_to_arrays
+from evaluation.synthetic import generate_plan
+
+
+class TestCompactGraph(unittest.TestCase):
+
+    def test_from_edges(self):
+        graph = CompactGraph.from_edges(3, np.array([2, 0, 2, 0]),
+                                        np.array([0, 2, NO_ROOM, NO_ROOM]),
+                                        np.array([1, 0, 3, 2]),
+                                        np.array([0.5, 1, 1, 0.25]))
+        self.assertEqual([0, 2, 2, 4], graph.indptr.tolist())
+        self.assertEqual([2, 0, 2], graph.degree().tolist())
+        self.assertEqual([0, 0, 2, 2], graph.sources().tolist())
+        indices, direction, ratio = graph.edges(2)
+        self.assertEqual([0, NO_ROOM], indices.tolist())
+        self.assertEqual([1, 3], direction.tolist())
+        self.assertEqual([0.5, 1], ratio.tolist())
+        self.assertEqual({(0, 'WORK'): [('right', 'CIRC', 1),
+                                        ('up', 'wall', 0.25)],
+                          (1, 'MEET'): [],
+                          (2, 'CIRC'): [('left', 'WORK', 0.5),
+                                        ('bottom', 'wall', 1)]},
+                         graph.to_adj_graph(['WORK', 'MEET', 'CIRC']))
+
+
+class TestCompactFloorPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = generate_plan(500)
+        self.room_list = rooms_from_json(self.plan)
+
+    def test_room_slots(self):
+        room = self.room_list[0]
+        with self.assertRaises(AttributeError):
+            room.color = 'red'
+        # Program type strings built at runtime are interned.
+        rooms = [Room(i, ''.join(['WO', 'RK']), [0, 0, 1, 1])
+                 for i in range(2)]
+        self.assertIs(rooms[0].prog_type, rooms[1].prog_type)
+
+    def test_same_graph(self):
+        floorplan = FloorPlan(self.room_list, desired_size_of(0))
+        coords, codes = plan_to_arrays(self.plan)
+        vector_floorplan = VectorFloorPlan(coords, codes, desired_size_of(0))
+        self.assertEqual(floorplan.adj_graph, vector_floorplan.adj_graph())
+
+    def test_memory(self):
+        coords, codes = plan_to_arrays(self.plan)
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        floorplan = FloorPlan(self.room_list, desired_size_of(0))
+        graph_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        del floorplan
+        start = tracemalloc.get_traced_memory()[0]
+        vector_floorplan = VectorFloorPlan(coords, codes, desired_size_of(0))
+        vector_memory = tracemalloc.get_traced_memory()[0] - start
+        self.assertLess(vector_floorplan.nbytes * 3, graph_memory)
+        self.assertLess(vector_memory * 3, graph_memory)
+
+
+if __name__ == '__main__':
+    unittest.main()
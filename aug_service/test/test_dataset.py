@@ -0,0 +1,87 @@
+"""A unit test file to eval the memory-mapped floor plan dataset."""
+import io
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from evaluation.dataset import (Dataset, score_dataset, score_dataset_file,
+                                write_dataset)
+from evaluation.eval_graph import result_to_dict
+from evaluation.eval_vector import evaluate_arrays, plan_to_arrays
+from evaluation.synthetic import generate_plan
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'plans')
+        self.plans = [generate_plan(20, seed=seed) for seed in range(10)]
+
+    def test_round_trip(self):
+        self.assertEqual(10, write_dataset(self.path, self.plans))
+        self.assertEqual(['codes.npy', 'coords.npy', 'offsets.npy'],
+                         sorted(os.listdir(self.path)))
+        dataset = Dataset(self.path)
+        self.assertEqual(10, len(dataset))
+        self.assertIsInstance(dataset.coords, np.memmap)
+        for k, plan in enumerate(self.plans):
+            coords, codes = dataset.arrays(k)
+            expected_coords, expected_codes = plan_to_arrays(plan)
+            np.testing.assert_array_equal(expected_coords, coords)
+            np.testing.assert_array_equal(expected_codes, codes)
+            # A view of the memory map, not a copy.
+            self.assertTrue(np.shares_memory(dataset.coords, coords))
+            self.assertEqual(json.loads(json.dumps(plan)), dataset.plan(k))
+        self.assertEqual(evaluate_arrays(*plan_to_arrays(self.plans[3])),
+                         dataset.evaluate(3))
+
+    def test_empty_and_float32(self):
+        self.assertEqual(0, write_dataset(self.path, []))
+        self.assertEqual(0, len(Dataset(self.path)))
+        write_dataset(self.path, [{'WORK': [[0.1, 0, 1, 1]]}], dtype='f')
+        dataset = Dataset(self.path)
+        self.assertEqual(np.float32, dataset.coords.dtype)
+        self.assertAlmostEqual(0.1, dataset.plan(0)['WORK'][0][0])
+
+    def test_inconsistent(self):
+        write_dataset(self.path, self.plans)
+        offsets = np.load(os.path.join(self.path, 'offsets.npy'))
+        np.save(os.path.join(self.path, 'offsets.npy'), offsets[:-1])
+        with self.assertRaises(ValueError):
+            Dataset(self.path)
+
+    def test_invalid_plan(self):
+        with self.assertRaisesRegex(AssertionError, 'Invalid program type.'):
+            write_dataset(self.path, self.plans[:3] + [
+                {'KITCHEN': [[0, 0, 1, 1]]}] + self.plans[3:])
+        # No temporary file is left behind.
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_score_dataset(self):
+        plans = self.plans[:4] + [{'WORK': [[0, 0, -1, -1]]}] + self.plans[4:]
+        write_dataset(self.path, plans)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            records = list(score_dataset(self.path, executor, start=2,
+                                         chunksize=3, max_pending=2))
+        self.assertEqual(list(range(2, 11)), [record[0] for record in records])
+        self.assertIsNone(records[2][1])
+        self.assertTrue(records[2][2].startswith('AssertionError'))
+        self.assertEqual(
+            result_to_dict(evaluate_arrays(*plan_to_arrays(plans[5]))),
+            records[3][1])
+
+    def test_score_dataset_file(self):
+        write_dataset(self.path, self.plans[:4])
+        output = io.StringIO()
+        self.assertEqual([0, 1, 2, 3], list(score_dataset_file(
+            self.path, output, max_workers=2, engine='graph')))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([0, 1, 2, 3], [record['index'] for record in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
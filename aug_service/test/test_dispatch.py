@@ -0,0 +1,76 @@
+"""A unit test file to eval the coalescing evaluation dispatcher."""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from evaluation.cache import EvaluationCache
+from evaluation.dispatch import Dispatcher, Overloaded, Timeout
+from evaluation.eval_graph import evaluate
+
+
+class TestDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = 0
+
+    def blocked(self, val):
+        self.calls += 1
+        self.release.wait()
+        return [val]
+
+    def test_coalesce(self):
+        dispatcher = Dispatcher(self.executor)
+        first = dispatcher.submit('a', self.blocked, 1)
+        second = dispatcher.submit('a', self.blocked, 2)
+        self.assertIs(first, second)
+        self.release.set()
+        self.assertEqual([1], dispatcher.run('a', self.blocked, 3))
+        self.assertEqual(1, self.calls)
+        self.assertEqual(2, dispatcher.stats()['coalesced'])
+        # Finished evaluations are not coalesced any more.
+        self.assertEqual([4], dispatcher.run('a', self.blocked, 4))
+        self.assertEqual(0, dispatcher.stats()['pending'])
+
+    def test_overloaded(self):
+        dispatcher = Dispatcher(self.executor, max_pending=2)
+        dispatcher.submit('a', self.blocked, 1)
+        dispatcher.submit('b', self.blocked, 2)
+        dispatcher.submit('a', self.blocked, 3)
+        with self.assertRaises(Overloaded):
+            dispatcher.submit('c', self.blocked, 4)
+        self.assertEqual(1, dispatcher.stats()['rejected'])
+
+    def test_timeout(self):
+        dispatcher = Dispatcher(self.executor, timeout=0.01)
+        with self.assertRaises(Timeout):
+            dispatcher.run('a', self.blocked, 1)
+        self.assertEqual({'pending': 1, 'coalesced': 0, 'rejected': 0,
+                          'timeouts': 1}, dispatcher.stats())
+        self.release.set()
+        self.assertEqual([1], dispatcher.run('a', self.blocked, 2,
+                                             timeout=5))
+
+    def test_evaluate_cache(self):
+        cache = EvaluationCache()
+        dispatcher = Dispatcher(self.executor, cache=cache)
+        plan = {'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]], 'CIRC': [[0, 1, 2, 2]]}
+        expected = evaluate(plan)
+        self.assertEqual(expected, dispatcher.evaluate(plan))
+        # Waits for the done callback, which caches the result.
+        self.executor.shutdown()
+        self.assertEqual(1, len(cache))
+        self.assertEqual(expected, dispatcher.evaluate(plan))
+        self.assertEqual(1, cache.hits)
+
+    def test_error(self):
+        dispatcher = Dispatcher(self.executor)
+        with self.assertRaises(AssertionError):
+            dispatcher.evaluate({'KITCHEN': [[0, 0, 1, 1]]})
+        self.assertEqual(0, dispatcher.stats()['pending'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@ import sys
 import logging
 import unittest
 from evaluation.eval_graph import intersect_edge_ratio
-from evaluation.eval_graph import FloorPlan, Room
+from evaluation.eval_graph import FloorPlan, Room, rooms_from_json
 
 
 class TestIntersectEdgeRatioFunction(unittest.TestCase):
@@ -24,7 +24,7 @@ class TestIntersectEdgeRatioFunction(unittest.TestCase):
                              intersect_edge_ratio(rec1, rec2))
 
     def test_overlap(self):
-        # TODO: catch warnings.
+        # Overlaps are reported by validate.validate_plan, not here.
 
         rec1 = [0, 0, 1, 1]
         rec2 = [0.5, 0.5, 1.5, 1.5]
@@ -289,6 +289,44 @@ class TestFloorPlan(unittest.TestCase):
             floorplan = FloorPlan(rooms, self.desired_size)
             self.assertEqual(i, floorplan._get_num_hallway())
 
+    def test_exposure(self):
+        # Room 1 lies on the right of room 0, room 2 overlaps room 1 along
+        # that side and room 3 only shares the top line of room 0.
+        room_list = [Room(0, 'WORK', [0, 0, 10, 10]),
+                     Room(1, 'WORK', [10, 2, 20, 6]),
+                     Room(2, 'WORK', [10, 4, 12, 8]),
+                     Room(3, 'WORK', [20, 10, 30, 20])]
+        floorplan = FloorPlan(room_list, self.desired_size)
+        # Only calculated when asked for.
+        self.assertIsNone(floorplan.exposure)
+        floorplan.ensure_exposure()
+        # The wall residuals count the overlap twice and room 3 as touching.
+        walls = [edge[:2] for edge in floorplan.adj_graph[(0, 'WORK')]
+                 if edge[1] == 'wall']
+        self.assertEqual([('right', 'wall'), ('left', 'wall'),
+                          ('bottom', 'wall')], walls)
+        self.assertEqual((4, 10, 10, 10), floorplan.exposure[0])
+        self.assertEqual((4, 0, 10, 10), floorplan.exposure[1])
+        self.assertEqual((10, 10, 10, 10), floorplan.exposure[3])
+
+    def test_indexes(self):
+        rooms = [Room(0, 'WORK', [0, 0, 1, 1]),
+                 Room(1, 'CIRC', [1, 0, 2, 1]),
+                 Room(1, 'WORK', [2, 0, 4, 1])]
+        floorplan = FloorPlan(rooms, self.desired_size)
+        self.assertEqual({0: rooms[0], 1: rooms[1]}, floorplan.rooms_by_id)
+        self.assertEqual({'WORK': [0, 2], 'CIRC': [1]}, floorplan.type_rooms)
+        self.assertEqual({'WORK': 3, 'CIRC': 1}, floorplan.type_area)
+
+    def test_rooms_from_json(self):
+        rooms = rooms_from_json({'WORK': [[0, 0, 1, 1], [1, 0, 2.4, 1]],
+                                 'CIRC': [[0, 1, 2, 2]]})
+        self.assertEqual([(0, 'WORK', [0, 0, 1, 1]), (1, 'WORK', [1, 0, 2, 1]),
+                          (2, 'CIRC', [0, 1, 2, 2])],
+                         [(room.room_id, room.prog_type, room.shape)
+                          for room in rooms])
+        self.assertEqual([1, 0, 2.4, 1], rooms[1].raw_shape)
+
 
 if __name__ == '__main__':
     unittest.main()
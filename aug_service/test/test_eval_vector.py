@@ -0,0 +1,104 @@
+"""A unit test file to eval the columnar evaluation engine."""
+import unittest
+import numpy as np
+from evaluation.eval_graph import FloorPlan, Room, evaluate, result_to_dict
+from evaluation.eval_vector import VectorFloorPlan, PROG_CODES
+from evaluation.eval_vector import plan_to_arrays, vector_adjacency
+from evaluation.eval_graph import pairwise_adjacency
+from test.helpers import load_plan, load_plans
+
+
+class TestVectorFloorPlan(unittest.TestCase):
+    # Sets commonly used test variable for TestVectorFloorPlan.
+    def setUp(self):
+        self.desired_size = {'CIRC': 100,
+                             'OPERATE': 100,
+                             'WORK': 100,
+                             'ENTRANCE': 100,
+                             'MEET': 100,
+                             'WASH': 100,
+                             'OBS': 100,
+                             'core': 100}
+
+    def assertScoresEqual(self, expected, actual):
+        if isinstance(expected, (tuple, list)):
+            self.assertEqual(len(expected), len(actual))
+            for exp, act in zip(expected, actual):
+                self.assertScoresEqual(exp, act)
+        elif isinstance(expected, dict):
+            self.assertEqual(sorted(expected), sorted(actual))
+            for key in expected:
+                self.assertScoresEqual(expected[key], actual[key])
+        else:
+            self.assertAlmostEqual(expected, actual, places=6)
+
+    def eval_both(self, rooms):
+        coords = np.array([room.shape for room in rooms])
+        codes = np.array([PROG_CODES[room.prog_type] for room in rooms])
+        return (FloorPlan(rooms, self.desired_size).eval(),
+                VectorFloorPlan(coords, codes, self.desired_size).eval())
+
+    def test_invalid_input(self):
+        with self.assertRaises(AssertionError):
+            VectorFloorPlan(np.empty((0, 4)), [], self.desired_size)
+        with self.assertRaises(AssertionError):
+            VectorFloorPlan([[0, 0, -1, -1]], [PROG_CODES['WORK']],
+                            self.desired_size)
+
+    def test_adjacency(self):
+        shapes = [[0, 0, 1, 1], [-1, 0, 0, 1], [1, 0, 2, 1], [0, 1, 1, 2],
+                  [0, -1, 1, 0], [1, 1, 2, 2], [-1, 5, 0, 6]]
+        src, dst, direction, ratio = vector_adjacency(np.array(shapes))
+        expected = [(i, j, ratio)
+                    for i, edges in enumerate(pairwise_adjacency(shapes))
+                    for j, _, ratio in edges]
+        self.assertEqual(expected, list(zip(src, dst, ratio)))
+
+    def test_rules(self):
+        rooms = [Room(0, 'ENTRANCE', [0, 0, 1, 1]),
+                 Room(1, 'core', [1, 0, 2, 1]),
+                 Room(2, 'WORK', [0, 1, 1, 2]),
+                 Room(3, 'CIRC', [-1, 0, 0, 1]),
+                 Room(4, 'MEET', [0, -1, 1, 0]),
+                 Room(5, 'WORK', [1, 1, 3, 2])]
+        expected, actual = self.eval_both(rooms)
+        self.assertScoresEqual(expected[:1] + expected[2:],
+                               actual[:1] + actual[2:])
+
+    def test_lounge_without_entrance(self):
+        rooms = [Room(0, 'WORK', [0, 0, 1, 1]),
+                 Room(1, 'core', [1, 0, 2, 1])]
+        expected, actual = self.eval_both(rooms)
+        self.assertEqual(expected[3], actual[3])
+
+    def test_test_data(self):
+        for _, floor_plan_json in load_plans():
+            self.assertScoresEqual(evaluate(floor_plan_json),
+                                   evaluate(floor_plan_json, engine='vector'))
+
+    def test_fields(self):
+        floor_plan_json = load_plan('data7.json')
+        scores = result_to_dict(evaluate(floor_plan_json))
+        for fields in (['size_score'], ['hallway_number', 'total_area'],
+                       ['meet_score', 'desired_size', 'align_score'],
+                       list(scores)):
+            expected = {name: scores[name] for name in scores
+                        if name in fields}
+            for engine in ('graph', 'vector'):
+                actual = evaluate(floor_plan_json, engine=engine,
+                                  fields=fields)
+                self.assertEqual(list(expected), list(actual))
+                self.assertScoresEqual(expected, actual)
+        with self.assertRaises(AssertionError):
+            evaluate(floor_plan_json, fields=['size_score', 'unknown'])
+
+    def test_plan_to_arrays(self):
+        coords, codes = plan_to_arrays({'WORK': [[0, 0, 1, 1]], 'MEET': [],
+                                        'CIRC': [[1, 0, 2, 1]]})
+        self.assertEqual([[0, 0, 1, 1], [1, 0, 2, 1]], coords.tolist())
+        self.assertEqual([PROG_CODES['WORK'], PROG_CODES['CIRC']],
+                         codes.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
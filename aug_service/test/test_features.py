@@ -0,0 +1,126 @@
+"""A unit test file to eval the feature matrix export."""
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from evaluation.dataset import write_dataset
+from evaluation.eval_graph import (FloorPlan, desired_size_of, evaluate,
+                                   pairwise_adjacency, result_to_dict,
+                                   rooms_from_json)
+from evaluation.eval_vector import plan_to_arrays
+from evaluation.features import (FEATURE_NAMES, FEATURE_TYPES,
+                                 dataset_feature_chunks, export_plan_features,
+                                 feature_chunks, plan_features, write_features)
+from evaluation.synthetic import generate_plan
+from test.helpers import load_plans
+
+
+class TestFeatures(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.plans = [generate_plan(30, seed=seed) for seed in range(5)]
+
+    def features(self, floor_plan_json):
+        return dict(zip(FEATURE_NAMES,
+                        plan_features(*plan_to_arrays(floor_plan_json))))
+
+    def test_scores(self):
+        for _, floor_plan_json in load_plans():
+            features = self.features(floor_plan_json)
+            for key, val in result_to_dict(evaluate(floor_plan_json)).items():
+                if isinstance(val, dict):
+                    for sub_key, sub_val in val.items():
+                        self.assertAlmostEqual(
+                            sub_val, features[key + '.' + sub_key], places=6)
+                else:
+                    self.assertAlmostEqual(val, features[key], places=6)
+
+    def test_graph_features(self):
+        plan = {'ENTRANCE': [[0, 0, 2, 2]],
+                'CIRC': [[2, 0, 10, 1], [0, 2, 2, 3]],
+                'WORK': [[2, 1, 4, 2], [4, 1, 6, 2]],
+                'core': [[-1, 0, 0, 1]]}
+        features = self.features(plan)
+        self.assertEqual(2, features['adjacency.ENTRANCE.CIRC'])
+        self.assertEqual(1, features['adjacency.ENTRANCE.WORK'])
+        self.assertEqual(0, features['adjacency.ENTRANCE.ENTRANCE'])
+        self.assertEqual(2, features['rooms.WORK'])
+        self.assertEqual(4, features['area.WORK'])
+        self.assertEqual(1, features['lounge_score.touch_core'])
+
+        room_list = rooms_from_json(plan)
+        floorplan = FloorPlan(room_list, desired_size_of(0))
+        floorplan.ensure_exposure()
+        pairs = {}
+        adjacency = pairwise_adjacency([room.shape for room in room_list])
+        for i, edges in enumerate(adjacency):
+            for j, _, _ in edges:
+                if i < j:
+                    a, b = sorted([room_list[i].prog_type,
+                                   room_list[j].prog_type],
+                                  key=FEATURE_TYPES.index)
+                    key = 'adjacency.%s.%s' % (a, b)
+                    pairs[key] = pairs.get(key, 0) + 1
+        self.assertEqual(pairs, {name: val for name, val in features.items()
+                                 if name.startswith('adjacency.') and val})
+        for prog_type in FEATURE_TYPES:
+            rooms = [i for i, room in enumerate(room_list)
+                     if room.prog_type == prog_type]
+            self.assertEqual(sum(sum(floorplan.exposure[i]) for i in rooms),
+                             features['exposure.' + prog_type])
+            self.assertEqual(
+                sum(edge[1] == 'wall' for i in rooms
+                    for edge in floorplan.adj_graph[(i, prog_type)]),
+                features['walls.' + prog_type])
+
+    def test_wall_rooms(self):
+        features = self.features({'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]],
+                                  'CIRC': [[2, 0, 3, 1]],
+                                  'wall': [[0, 1, 3, 2]]})
+        self.assertFalse(np.isnan(list(features.values())).any())
+        self.assertEqual(1, features['adjacency.WORK.WORK'])
+        self.assertEqual(1, features['adjacency.CIRC.WORK'])
+        self.assertEqual(2, sum(val for name, val in features.items()
+                                if name.startswith('adjacency.')))
+
+    def test_chunks(self):
+        arrays = [plan_to_arrays(plan) for plan in self.plans]
+        arrays.insert(2, (np.array([[0, 0, -1, -1]]), np.array([2])))
+        chunks = list(feature_chunks(arrays, chunksize=4))
+        self.assertEqual([4, 2], [len(chunk) for chunk in chunks])
+        matrix = np.concatenate(chunks)
+        self.assertTrue(np.isnan(matrix[2]).all())
+        np.testing.assert_array_equal(plan_features(*arrays[5]), matrix[5])
+
+    def test_export(self):
+        path = os.path.join(self.tmp, 'features')
+        self.assertEqual(6, export_plan_features(
+            path, self.plans + [{'unknown': [[0, 0, 1, 1]]}], chunksize=4))
+        with open(os.path.join(path, 'columns.json')) as f:
+            self.assertEqual(list(FEATURE_NAMES), json.load(f))
+        matrix = np.load(os.path.join(path, 'features.npy'), mmap_mode='r')
+        self.assertEqual((6, len(FEATURE_NAMES)), matrix.shape)
+        self.assertTrue(np.isnan(matrix[5]).all())
+        self.assertEqual(0, write_features(path, []))
+        self.assertEqual((0, len(FEATURE_NAMES)),
+                         np.load(os.path.join(path, 'features.npy')).shape)
+
+    def test_dataset(self):
+        dataset_path = os.path.join(self.tmp, 'plans')
+        write_dataset(dataset_path, self.plans)
+        expected = np.concatenate(list(feature_chunks(
+            plan_to_arrays(plan) for plan in self.plans)))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            chunks = list(dataset_feature_chunks(dataset_path, executor,
+                                                 chunksize=2, max_pending=2))
+        self.assertEqual([2, 2, 1], [len(chunk) for chunk in chunks])
+        np.testing.assert_array_equal(expected, np.concatenate(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""A unit test file to eval the incrementally edited floor plan."""
+import random
+import unittest
+from evaluation.eval_graph import FloorPlan, Room
+from evaluation.incremental import IncrementalFloorPlan
+
+
+class TestIncrementalFloorPlan(unittest.TestCase):
+    # Sets commonly used test variable for TestIncrementalFloorPlan.
+    def setUp(self):
+        self.desired_size = {'CIRC': 100,
+                             'OPERATE': 100,
+                             'WORK': 100,
+                             'ENTRANCE': 100,
+                             'MEET': 100,
+                             'WASH': 100,
+                             'OBS': 100,
+                             'core': 100}
+
+    def assertSameAsRebuilt(self, floorplan):
+        rooms = [Room(i, room.prog_type, room.shape)
+                 for i, room in enumerate(floorplan.room_list)]
+        rebuilt = FloorPlan(rooms, self.desired_size)
+        rebuilt.ensure_exposure()
+        # Kept up to date by the edits once calculated.
+        floorplan.ensure_exposure()
+        self.assertEqual(rebuilt.adj_graph, floorplan.adj_graph)
+        self.assertEqual(rebuilt.type_rooms, floorplan.type_rooms)
+        self.assertEqual(rebuilt.exposure, floorplan.exposure)
+        self.assertEqual(sorted(rebuilt.rooms_by_id),
+                         sorted(floorplan.rooms_by_id))
+        expected = rebuilt.eval()
+        actual = floorplan.eval()
+        self.assertEqual(len(expected), len(actual))
+        for exp, act in zip(expected, actual):
+            if isinstance(exp, dict):
+                self.assertEqual(sorted(exp), sorted(act))
+                for key in exp:
+                    self.assertAlmostEqual(exp[key], act[key])
+            else:
+                self.assertAlmostEqual(exp, act)
+
+    def test_invalid_input(self):
+        with self.assertRaises(AssertionError):
+            IncrementalFloorPlan([Room(1, 'WORK', [0, 0, 1, 1])],
+                                 self.desired_size)
+        floorplan = IncrementalFloorPlan([Room(0, 'WORK', [0, 0, 1, 1])],
+                                         self.desired_size)
+        with self.assertRaises(AssertionError):
+            floorplan.move_room(0, [0, 0, -1, -1])
+        with self.assertRaises(AssertionError):
+            floorplan.remove_room(0)
+
+    def test_move(self):
+        rooms = [Room(0, 'ENTRANCE', [0, 0, 1, 1]),
+                 Room(1, 'core', [1, 0, 2, 1]),
+                 Room(2, 'WORK', [0, 1, 1, 2]),
+                 Room(3, 'CIRC', [-1, 0, 0, 1])]
+        floorplan = IncrementalFloorPlan(rooms, self.desired_size)
+        self.assertSameAsRebuilt(floorplan)
+
+        floorplan.move_room(1, [5, 5, 6, 6])
+        self.assertEqual({'touch_gv': 2, 'touch_core': 0},
+                         floorplan.eval()[3])
+        self.assertSameAsRebuilt(floorplan)
+
+        floorplan.move_room(2, [1, 0, 3, 2])
+        self.assertSameAsRebuilt(floorplan)
+
+    def test_set_prog_type(self):
+        rooms = [Room(0, 'ENTRANCE', [0, 0, 1, 1]),
+                 Room(1, 'WORK', [1, 0, 2, 1]),
+                 Room(2, 'CIRC', [0, 1, 2, 2])]
+        floorplan = IncrementalFloorPlan(rooms, self.desired_size)
+        floorplan.set_prog_type(1, 'core')
+        self.assertEqual({'touch_gv': 2, 'touch_core': 1},
+                         floorplan.eval()[3])
+        self.assertSameAsRebuilt(floorplan)
+        with self.assertRaises(AssertionError):
+            floorplan.set_prog_type(1, 'KITCHEN')
+
+    def test_add_remove(self):
+        floorplan = IncrementalFloorPlan([Room(0, 'WORK', [0, 0, 1, 1])],
+                                         self.desired_size)
+        self.assertEqual(1, floorplan.add_room('CIRC', [1, 0, 2, 1]))
+        self.assertEqual(2, floorplan.add_room('ENTRANCE', [2, 0, 3, 1]))
+        self.assertSameAsRebuilt(floorplan)
+
+        # The last room takes the index of the removed one.
+        self.assertEqual(2, floorplan.remove_room(0))
+        self.assertEqual(['ENTRANCE', 'CIRC'],
+                         [room.prog_type for room in floorplan.room_list])
+        self.assertEqual([0, 1],
+                         [room.room_id for room in floorplan.room_list])
+        self.assertSameAsRebuilt(floorplan)
+
+        self.assertIsNone(floorplan.remove_room(1))
+        self.assertSameAsRebuilt(floorplan)
+
+    def test_random_edits(self):
+        rnd = random.Random(0)
+        prog_types = ['CIRC', 'WORK', 'ENTRANCE', 'MEET', 'core']
+        rooms = [Room(i, rnd.choice(prog_types),
+                      [2 * (i % 6), 2 * (i // 6), 2 * (i % 6) + 2,
+                       2 * (i // 6) + 2])
+                 for i in range(36)]
+        floorplan = IncrementalFloorPlan(rooms, self.desired_size)
+        for _ in range(200):
+            x, y = rnd.randrange(12), rnd.randrange(12)
+            shape = [x, y, x + rnd.choice([1, 2]), y + rnd.choice([1, 2])]
+            action = rnd.random()
+            if action < 0.1:
+                floorplan.set_prog_type(
+                    rnd.randrange(len(floorplan.room_list)),
+                    rnd.choice(prog_types))
+            elif action < 0.6:
+                floorplan.move_room(rnd.randrange(len(floorplan.room_list)),
+                                    shape)
+            elif action < 0.8 or len(floorplan.room_list) < 2:
+                floorplan.add_room(rnd.choice(prog_types), shape)
+            else:
+                floorplan.remove_room(
+                    rnd.randrange(len(floorplan.room_list)))
+            self.assertSameAsRebuilt(floorplan)
+
+
+if __name__ == '__main__':
+    unittest.main()
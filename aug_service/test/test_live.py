@@ -0,0 +1,141 @@
+"""A unit test file to eval the live evaluation sessions."""
+import threading
+import unittest
+from evaluation.eval_graph import evaluate, result_to_dict
+from evaluation.live import LiveSession, LiveSessions
+
+
+class EditingCondition(threading.Condition):
+    """A condition whose waits return at once, each after applying the next
+    edits to session, as if they came while waiting."""
+
+    def __init__(self, session, edits):
+        super().__init__()
+        self.session = session
+        self.edits = list(edits)
+        self.waits = 0
+
+    def wait(self, timeout=None):
+        self.waits += 1
+        if self.edits:
+            self.session.apply(self.edits.pop(0))
+        return False
+
+
+class TestLiveSession(unittest.TestCase):
+
+    def setUp(self):
+        self.session = LiveSession({'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]],
+                                    'CIRC': [[0, 1, 2, 2]]}, debounce=0.05)
+
+    def assertScoresOf(self, plan):
+        self.assertEqual(result_to_dict(evaluate(plan)), self.session.scores())
+
+    def test_scores(self):
+        self.assertScoresOf({'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]],
+                             'CIRC': [[0, 1, 2, 2]]})
+        self.assertEqual({}, self.session.changed_scores())
+
+    def test_apply(self):
+        self.assertEqual([3, 4], self.session.apply([
+            {'op': 'add', 'type': 'ENTRANCE', 'shape': [2, 0, 3, 2]},
+            {'op': 'add', 'type': 'OBS', 'shape': [3, 0, 4, 2]},
+            {'op': 'move', 'id': 1, 'shape': [1, 0, 2, 2]},
+            {'op': 'remove', 'id': 0}]))
+        self.assertEqual(4, self.session.version)
+        # Room 4 took the index of room 0, ids stay the same.
+        self.assertEqual({1: ('WORK', [1, 0, 2, 2]),
+                          2: ('CIRC', [0, 1, 2, 2]),
+                          3: ('ENTRANCE', [2, 0, 3, 2]),
+                          4: ('OBS', [3, 0, 4, 2])}, self.session.room_ids())
+        self.assertEqual([], self.session.apply([{'op': 'remove', 'id': 4}]))
+        self.assertScoresOf({'WORK': [[1, 0, 2, 2]], 'CIRC': [[0, 1, 2, 2]],
+                             'ENTRANCE': [[2, 0, 3, 2]]})
+
+    def test_invalid_diff(self):
+        with self.assertRaises(ValueError):
+            self.session.apply([{'op': 'remove', 'id': 1},
+                                {'op': 'move', 'id': 1,
+                                 'shape': [0, 0, 1, 1]}])
+        self.assertEqual(1, self.session.version)
+        for diff in ({'op': 'rotate', 'id': 0},
+                     {'op': 'add', 'type': 'KITCHEN', 'shape': [0, 0, 1, 1]},
+                     {'op': 'add', 'type': 'core', 'shape': [2, 0, 3, 1]},
+                     {'op': 'move', 'id': 0, 'shape': [0, 0, -1, 1]},
+                     {'op': 'move', 'id': 0, 'shape': [0, 0, 1]},
+                     {'op': 'add', 'type': 'WORK', 'shape': [0, 0, 'a', 1]},
+                     {'op': 'add', 'type': 'WORK',
+                      'shape': [0, 0, float('nan'), 1]},
+                     ['remove', 0]):
+            with self.assertRaises(ValueError):
+                self.session.apply([diff])
+        self.assertEqual(1, self.session.version)
+        self.assertScoresOf({'WORK': [[1, 0, 2, 1]], 'CIRC': [[0, 1, 2, 2]]})
+
+    def test_invalid_plan(self):
+        with self.assertRaises(KeyError):
+            LiveSession({'WORK': [[0, 0, 1, 1]], 'core': [[1, 0, 2, 1]]})
+        with self.assertRaises(AssertionError):
+            LiveSession({'WORK': [[0, 0, 1, -1]]})
+        with self.assertRaises(AssertionError):
+            LiveSession({})
+
+    def test_changed_scores(self):
+        before = self.session.scores()
+        self.session.apply([{'op': 'move', 'id': 1, 'shape': [1, 0, 3, 1]}])
+        changed = self.session.changed_scores()
+        self.assertNotIn('hallway_number', changed)
+        self.assertEqual({key: val for key, val in self.session.scores().items()
+                          if before[key] != val}, changed)
+
+    def test_events_debounce(self):
+        self.session.scores()
+        edits = [[{'op': 'move', 'id': 1, 'shape': [1, 0, 2, 2 + k]}]
+                 for k in range(5)]
+        self.session._changed = EditingCondition(self.session, edits[1:])
+        self.session.apply(edits[0])
+        version, changed = next(self.session.events(keepalive=5))
+        # One wait per further edit, then one without an edit.
+        self.assertEqual(5, self.session._changed.waits)
+        self.assertEqual(5, version)
+        self.assertEqual(-7, changed['size_score']['WORK'])
+
+    def test_events_keepalive(self):
+        self.session.scores()
+        self.assertIsNone(next(self.session.events(keepalive=0.01)))
+
+
+class TestLiveSessions(unittest.TestCase):
+
+    def test_expire(self):
+        sessions = LiveSessions(ttl=60)
+        session_id, session = sessions.create({'WORK': [[0, 0, 1, 1]]})
+        self.assertIs(session, sessions.get(session_id))
+        session.last_access -= 61
+        self.assertIsNone(sessions.get(session_id))
+        self.assertEqual(0, len(sessions))
+        self.assertTrue(session.closed)
+
+    def test_events_end(self):
+        sessions = LiveSessions(ttl=60)
+        session_id, session = sessions.create({'WORK': [[0, 0, 1, 1]]})
+        session.scores()
+        events = sessions.events(session_id, keepalive=0.01)
+        self.assertIsNone(next(events))
+        # Listening does not keep the session alive.
+        session.last_access -= 61
+        self.assertEqual([], list(events))
+        self.assertEqual(0, len(sessions))
+
+        session_id, session = sessions.create({'WORK': [[0, 0, 1, 1]]})
+        session.scores()
+        events = session.events(keepalive=5)
+        timer = threading.Timer(0.01, sessions.close, [session_id])
+        timer.start()
+        self.assertEqual([], list(events))
+        timer.join()
+        self.assertEqual([], list(sessions.events(session_id)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""A unit test file to eval the simulated annealing optimizer."""
+import unittest
+from evaluation.eval_graph import evaluate
+from evaluation.optimize import (DEFAULT_WEIGHTS, Annealer, optimize,
+                                 optimize_many, plan_cost)
+from test.helpers import load_plan
+
+
+class TestOptimize(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = load_plan('data7.json')
+
+    def test_plan_cost(self):
+        scores = (1.5, {'WORK': -2, 'CIRC': 1}, {}, 0, 3, 10, 0.5, 2)
+        self.assertEqual(5, plan_cost(scores, DEFAULT_WEIGHTS))
+        self.assertEqual(-7, plan_cost(scores, {'size_score': 1,
+                                                'work_ext_score': -1}))
+
+    def test_invalid_temperatures(self):
+        with self.assertRaises(AssertionError):
+            Annealer(self.plan).run(10, start_temperature=0.1,
+                                    end_temperature=1)
+
+    def test_best_plan(self):
+        annealer = Annealer(self.plan, seed=1)
+        initial_cost = annealer.cost
+        best_cost = annealer.run(2000)
+        self.assertLessEqual(best_cost, initial_cost)
+        self.assertGreater(annealer.evaluations, 0)
+
+        best = annealer.best_plan()
+        self.assertEqual({key: len(val) for key, val in self.plan.items()},
+                         {key: len(val) for key, val in best.items()})
+        self.assertAlmostEqual(
+            best_cost, plan_cost(evaluate(best)[0], DEFAULT_WEIGHTS))
+        shapes = [shape for val in best.values() for shape in val]
+        x_min, y_min, x_max, y_max = annealer._bounds
+        for k, a in enumerate(shapes):
+            self.assertTrue(x_min <= a[0] < a[2] <= x_max and
+                            y_min <= a[1] < a[3] <= y_max, a)
+            for b in shapes[k + 1:]:
+                self.assertFalse(a[0] < b[2] and b[0] < a[2] and
+                                 a[1] < b[3] and b[1] < a[3], (a, b))
+
+    def test_deterministic(self):
+        first = optimize(self.plan, steps=500, seed=3)
+        second = optimize(self.plan, steps=500, seed=3)
+        self.assertEqual(first['plan'], second['plan'])
+        self.assertEqual(first['cost'], second['cost'])
+        self.assertLessEqual(first['cost'], first['initial_cost'])
+
+    def test_optimize_many(self):
+        results = optimize_many(self.plan, [0, 1], max_workers=2, steps=200)
+        self.assertEqual([0, 1], sorted(result['seed'] for result in results))
+        self.assertLessEqual(results[0]['cost'], results[1]['cost'])
+
+
+if __name__ == '__main__':
+    unittest.main()
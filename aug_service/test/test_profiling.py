@@ -0,0 +1,66 @@
+"""A unit test file to eval the evaluation instrumentation."""
+import unittest
+from evaluation.eval_graph import evaluate
+from evaluation.profiling import Metrics, Profile
+
+STAGES = ['rooms', 'graph_build', 'rules']
+VECTOR_STAGES = ['rooms', 'graph_build', 'alignment_check', 'size_check',
+                 'lounge_check', 'access_hw_check', 'check_ext_work',
+                 'check_meet', 'get_num_hallway']
+
+
+class TestProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = {'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]],
+                     'CIRC': [[0, 1, 2, 2]]}
+
+    def test_graph_engine(self):
+        profile = Profile()
+        self.assertEqual(evaluate(self.plan), evaluate(self.plan,
+                                                       profile=profile))
+        self.assertEqual(STAGES, list(profile.timings))
+        self.assertEqual({'rooms': 3, 'edges': 6, 'pair_comparisons': 6},
+                         profile.counts)
+
+    def test_no_shared_lines(self):
+        profile = Profile()
+        evaluate({'WORK': [[0, 0, 1, 1], [5, 5, 6, 6], [9, 9, 10, 10]]},
+                 profile=profile)
+        self.assertEqual(0, profile.counts['pair_comparisons'])
+
+    def test_vector_engine(self):
+        profile = Profile()
+        evaluate(self.plan, engine='vector', profile=profile)
+        self.assertEqual(VECTOR_STAGES, list(profile.timings))
+        self.assertEqual({'rooms': 3, 'edges': 6}, profile.counts)
+
+    def test_fields(self):
+        for engine, stages in (('graph', ['rooms', 'rules']),
+                               ('vector', ['rooms', 'size_check'])):
+            profile = Profile()
+            evaluate(self.plan, engine=engine, profile=profile,
+                     fields=['size_score', 'total_area'])
+            self.assertEqual(stages, list(profile.timings))
+            profile = Profile()
+            evaluate(self.plan, engine=engine, profile=profile,
+                     fields=['meet_score'])
+            self.assertIn('graph_build', profile.timings)
+
+    def test_metrics(self):
+        metrics = Metrics()
+        for _ in range(2):
+            profile = Profile()
+            evaluate(self.plan, profile=profile)
+            metrics.observe(profile)
+        text = metrics.render({'cache_hits': 3})
+        self.assertIn('aug_evaluation_seconds_count 2\n', text)
+        self.assertIn('aug_evaluation_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn('aug_evaluation_stage_seconds_count{stage="rooms"} 2\n',
+                      text)
+        self.assertIn('aug_evaluation_items_total{item="rooms"} 6\n', text)
+        self.assertIn('aug_cache_hits 3\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""A unit test file to eval the reachability metrics."""
+import unittest
+from evaluation.reachability import UNREACHABLE, evaluate_reachability
+from evaluation.synthetic import generate_plan
+
+U = UNREACHABLE
+
+
+class TestReachability(unittest.TestCase):
+
+    def setUp(self):
+        # Rooms are numbered ENTRANCE 0-1, CIRC 2-4, WORK 5-7, OBS 8, MEET 9.
+        self.plan = {'ENTRANCE': [[0, 0, 2, 2], [20, 20, 21, 21]],
+                     'CIRC': [[2, 0, 10, 1], [10, 0, 11, 5], [30, 0, 31, 1]],
+                     # The last one only lies on the top line of CIRC 3.
+                     'WORK': [[2, 1, 4, 2], [11, 0, 13, 2], [0, 5, 1, 6]],
+                     'OBS': [[4, 1, 6, 2]],
+                     'MEET': [[6, 1, 7, 2]]}
+
+    def test_metrics(self):
+        self.assertEqual({'entrance': 0,
+                          'circ_components': 2,
+                          'largest_circ_component': 2,
+                          'reachable_circ_components': 1,
+                          'hops': [0, U, 1, 2, U, 1, 3, U, U, 2],
+                          'max_hops': 3,
+                          'mean_hops': 1.8,
+                          'unreachable_rooms': 3},
+                         evaluate_reachability(self.plan))
+
+    def test_no_entrance(self):
+        del self.plan['ENTRANCE']
+        metrics = evaluate_reachability(self.plan)
+        self.assertIsNone(metrics['entrance'])
+        self.assertEqual([U] * 8, metrics['hops'])
+        self.assertEqual(0, metrics['reachable_circ_components'])
+        self.assertEqual(7, metrics['unreachable_rooms'])
+
+    def test_large_plan(self):
+        plan = generate_plan(5000)
+        metrics = evaluate_reachability(plan)
+        self.assertEqual(sum(len(val) for val in plan.values()),
+                         len(metrics['hops']))
+
+
+if __name__ == '__main__':
+    unittest.main()
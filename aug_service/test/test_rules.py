@@ -0,0 +1,64 @@
+"""A unit test file to eval the single pass rules."""
+import unittest
+from evaluation.eval_graph import FloorPlan, Room, rooms_from_json
+from evaluation.rules import (DEFAULT_RULES, ExtWorkRule, Rule,
+                              WorkExposureRule)
+from evaluation.synthetic import generate_plan
+
+
+class WorkCountRule(Rule):
+    name = 'work_number'
+
+    def room(self, state, i, room, edges):
+        if room.prog_type == 'WORK':
+            state[0] += 1
+
+
+class TestRules(unittest.TestCase):
+
+    def setUp(self):
+        desired_size = {'ENTRANCE': 0, 'CIRC': 0, 'WORK': 0, 'OPERATE': 0,
+                        'MEET': 0, 'WASH': 0, 'OBS': 0}
+        self.floorplan = FloorPlan(rooms_from_json(generate_plan(60, seed=3)),
+                                   desired_size)
+
+    def test_single_pass_matches_checks(self):
+        fp = self.floorplan
+        self.assertEqual((fp._alignment_check(), fp._size_check(),
+                          fp.desired_size, fp._lounge_check(),
+                          fp._access_hw_check(), fp._check_ext_work(),
+                          fp._check_meet(), fp._get_num_hallway()),
+                         fp.eval())
+
+    def test_extra_rule(self):
+        scores = self.floorplan.eval_rules(DEFAULT_RULES + (WorkCountRule(),))
+        num_work = sum(room.prog_type == 'WORK'
+                       for room in self.floorplan.room_list)
+        self.assertEqual(num_work, scores['work_number'])
+        self.assertEqual(self.floorplan._check_meet(), scores['meet_score'])
+
+    def test_ext_work_room_id(self):
+        room_list = [Room(0, 'WORK', [0, 0, 1, 1]),
+                     Room(0, 'WORK', [1, 0, 3, 1])]
+        floorplan = FloorPlan(room_list, {'WORK': 0})
+        # Both rooms touch the wall, room 1 has no room_id 1 and is counted
+        # with the area of room_id 0.
+        self.assertEqual(2, floorplan.eval_rules([ExtWorkRule()])
+                         ['work_ext_score'])
+
+    def test_work_exposure(self):
+        room_list = [Room(0, 'WORK', [0, 0, 2, 1]),
+                     Room(1, 'CIRC', [2, 0, 3, 1]),
+                     Room(2, 'WORK', [3, 0, 4, 2])]
+        floorplan = FloorPlan(room_list, {'WORK': 0, 'CIRC': 0}, lazy=True)
+        self.assertEqual(5 + 5, floorplan.eval_rules([WorkExposureRule()])
+                         ['work_exposure'])
+        self.assertIsNone(floorplan.adj_graph)
+        # Default rules leave it uncalculated.
+        floorplan = FloorPlan(room_list, {'WORK': 0, 'CIRC': 0})
+        floorplan.eval()
+        self.assertIsNone(floorplan.exposure)
+
+
+if __name__ == '__main__':
+    unittest.main()
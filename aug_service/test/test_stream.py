@@ -0,0 +1,67 @@
+"""A unit test file to eval the streaming NDJSON scorer."""
+import io
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from evaluation.eval_graph import evaluate, result_to_dict
+from evaluation.stream import (default_max_pending, ordered_results,
+                               score_ndjson, stream_scores)
+from evaluation.synthetic import generate_plan
+
+
+class TestStreamScores(unittest.TestCase):
+
+    def setUp(self):
+        self.plans = [generate_plan(20, seed=seed) for seed in range(10)]
+        self.lines = [json.dumps(plan) + '\n' for plan in self.plans]
+
+    def test_order(self):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            records = list(stream_scores(self.lines, executor, chunksize=3,
+                                         max_pending=2))
+        self.assertEqual([(i, result_to_dict(evaluate(plan)), None)
+                          for i, plan in enumerate(self.plans)], records)
+
+    def test_errors_and_start(self):
+        lines = self.lines[:2] + ['\n', '{"WORK": [[0, 0, -1, -1]]}\n',
+                                  '{"WORK"\n'] + self.lines[2:4]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            records = list(stream_scores(iter(lines), executor, start=1,
+                                         chunksize=2))
+        self.assertEqual([1, 2, 3, 4, 5], [record[0] for record in records])
+        self.assertIsNone(records[1][1])
+        self.assertIsNone(records[2][1])
+        self.assertTrue(records[1][2].startswith('AssertionError'))
+        self.assertTrue(records[2][2].startswith('JSONDecodeError'))
+        self.assertEqual(result_to_dict(evaluate(self.plans[3])),
+                         records[4][1])
+
+    def test_ordered_results(self):
+        submitted = []
+
+        def tasks():
+            for k in range(10):
+                submitted.append(k)
+                yield k
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = ordered_results(executor, lambda k: k * k, tasks(),
+                                      max_pending=3)
+            self.assertEqual(0, next(results))
+            # Tasks are only submitted as results are taken.
+            self.assertEqual([0, 1, 2], submitted)
+            self.assertEqual([k * k for k in range(1, 10)], list(results))
+        self.assertEqual(6, default_max_pending(3))
+
+    def test_score_ndjson(self):
+        output = io.StringIO()
+        indexes = list(score_ndjson(self.lines[:4], output, max_workers=2))
+        self.assertEqual([0, 1, 2, 3], indexes)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([0, 1, 2, 3], [record['index'] for record in records])
+        self.assertEqual(evaluate(self.plans[2])[0][4],
+                         records[2]['hallway_access_score'])
+
+
+if __name__ == '__main__':
+    unittest.main()
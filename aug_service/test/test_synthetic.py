@@ -0,0 +1,54 @@
+"""A unit test file to eval the synthetic floor plan generator."""
+import unittest
+from evaluation.eval_graph import Room, evaluate
+from evaluation.synthetic import EVALUATED_PROG_TYPES, generate_plan
+
+
+def overlap(rec1, rec2):
+    return (rec1[0] < rec2[2] and rec2[0] < rec1[2] and
+            rec1[1] < rec2[3] and rec2[1] < rec1[3])
+
+
+class TestGeneratePlan(unittest.TestCase):
+
+    def test_tiling(self):
+        for num_rooms in [1, 7, 150]:
+            plan = generate_plan(num_rooms, seed=num_rooms)
+            rooms = [rec for val in plan.values() for rec in val]
+            self.assertEqual(num_rooms, len(rooms))
+            for i, rec1 in enumerate(rooms):
+                self.assertTrue(rec1[0] < rec1[2] and rec1[1] < rec1[3])
+                for rec2 in rooms[i + 1:]:
+                    self.assertFalse(overlap(rec1, rec2))
+            # Rooms tile the whole square.
+            side = max(rec[2] for rec in rooms)
+            self.assertEqual(side * side,
+                             sum((rec[2] - rec[0]) * (rec[3] - rec[1])
+                                 for rec in rooms))
+
+    def test_prog_types(self):
+        plan = generate_plan(100)
+        self.assertEqual(EVALUATED_PROG_TYPES, list(plan))
+        self.assertTrue(all(plan.values()))
+
+        plan = generate_plan(50, prog_types=Room.available_prog_types)
+        self.assertEqual(Room.available_prog_types, list(plan))
+        self.assertTrue(all(plan.values()))
+
+    def test_deterministic(self):
+        self.assertEqual(generate_plan(200, seed=3),
+                         generate_plan(200, seed=3))
+        self.assertNotEqual(generate_plan(200, seed=3),
+                            generate_plan(200, seed=4))
+
+    def test_evaluate(self):
+        plan = generate_plan(300)
+        self.assertEqual(300, sum(len(val) for val in plan.values()))
+        _, total_area, total_usable_area, _ = evaluate(plan)
+        self.assertEqual(total_area, total_usable_area +
+                         sum((rec[2] - rec[0]) * (rec[3] - rec[1])
+                             for rec in plan['OBS']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""A unit test file to eval the tiled parallel graph construction."""
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from evaluation.eval_graph import FloorPlan, Room, evaluate, rooms_from_json
+from evaluation.profiling import Profile
+from evaluation.synthetic import generate_plan
+from evaluation.tiled import tile_rooms, tiled_graph
+from test.helpers import load_plans
+
+
+class TestTiledGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.desired_size = {'WORK': 100}
+
+    def assertSameAsBucket(self, room_list, **kwargs):
+        expected_profile, profile = Profile(), Profile()
+        expected = FloorPlan(room_list, self.desired_size,
+                             profile=expected_profile)
+        floorplan = FloorPlan(room_list, self.desired_size,
+                              adjacency='tiled', profile=profile, **kwargs)
+        self.assertEqual(expected.adj_graph, floorplan.adj_graph)
+        self.assertEqual(expected_profile.counts, profile.counts)
+
+    def test_same_as_bucket(self):
+        room_list = rooms_from_json(generate_plan(300, seed=2))
+        self.assertSameAsBucket(room_list, workers=1)
+        self.assertSameAsBucket(room_list, workers=2)
+        # Rooms far apart on a common side line are adjacent as well.
+        self.assertSameAsBucket([Room(0, 'WORK', [0, 0, 1, 1]),
+                                 Room(1, 'CIRC', [1, 50, 2, 51]),
+                                 Room(2, 'WORK', [90, 1, 91, 2])], workers=1)
+
+    def test_test_data(self):
+        for _, floor_plan_json in load_plans():
+            self.assertEqual(evaluate(floor_plan_json),
+                             evaluate(floor_plan_json, adjacency='tiled',
+                                      workers=1))
+
+    def test_executor(self):
+        room_list = rooms_from_json(generate_plan(200, seed=4))
+        shapes = [room.shape for room in room_list]
+        prog_types = [room.prog_type for room in room_list]
+        expected = tiled_graph(shapes, prog_types, max_workers=1)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for _ in range(2):
+                self.assertEqual(expected, tiled_graph(
+                    shapes, prog_types, max_workers=2, executor=executor))
+
+    def test_tile_rooms(self):
+        shapes = np.array([room.shape for room in
+                           rooms_from_json(generate_plan(100, seed=1))])
+        tiles = tile_rooms(shapes, 9)
+        self.assertLessEqual(len(tiles), 9)
+        self.assertGreater(len(tiles), 1)
+        self.assertEqual(list(range(100)),
+                         sorted(np.concatenate(tiles).tolist()))
+        for rooms in tiles:
+            self.assertEqual(sorted(rooms.tolist()), rooms.tolist())
+        self.assertEqual(1, len(tile_rooms(shapes[:1], 9)))
+
+    def test_invalid_input(self):
+        with self.assertRaises(AssertionError):
+            tiled_graph([[0, 0, -1, 1]], ['WORK'], max_workers=1)
+        with self.assertRaises(AssertionError):
+            FloorPlan([Room(0, 'WORK', [0, 0, 1, 1])], self.desired_size,
+                      adjacency='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""A unit test file to eval the floor plan validation."""
+import itertools
+import random
+import unittest
+import numpy as np
+from evaluation.eval_graph import evaluate
+from evaluation.eval_vector import plan_to_arrays
+from evaluation.validate import find_overlaps, validate_arrays, validate_plan
+from test.helpers import load_plans
+
+
+class TestValidate(unittest.TestCase):
+
+    def test_valid(self):
+        report = validate_plan({'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]],
+                                'CIRC': [[0, 1, 2, 2]]})
+        self.assertTrue(report.ok)
+        report.check()
+        self.assertEqual({'ok': True, 'num_rooms': 3, 'invalid_types': [],
+                          'invalid_values': [], 'unscored_types': [],
+                          'invalid_rooms': [], 'overlaps': []},
+                         report.as_dict())
+
+    def test_invalid(self):
+        report = validate_plan({'WORK': [[0, 0, 1, 1], [0, 0, -1, 1],
+                                         [0, 0, 0.4, 1]],
+                                'KITCHEN': [[0, 0, 1, 1]],
+                                'CIRC': [[0, 0, 1], [0, 2, 1, 'a'],
+                                         [0, 5, 1, 4]]})
+        self.assertFalse(report.ok)
+        self.assertEqual(['KITCHEN'], report.invalid_types)
+        self.assertEqual([(1, 'Invalid input rectangle: x_min < x_max'),
+                          (2, 'Invalid input rectangle: x_min < x_max'),
+                          (4, 'Invalid input rectangle.'),
+                          (5, 'Invalid input rectangle.'),
+                          (6, 'Invalid input rectangle: y_min < y_max')],
+                         report.invalid_rooms)
+        # Only valid rooms are checked for overlaps.
+        self.assertEqual([(0, 3, 1)], report.overlaps)
+        with self.assertRaisesRegex(AssertionError, 'Invalid program type.'):
+            report.check()
+
+    def test_malformed(self):
+        # None of these is converted to a rectangle.
+        report = validate_plan({'WORK': [['0', '0', '1', '1'],
+                                         [[0, 0, 1, 1]], 5, None],
+                                'CIRC': [[0, 0, 1, 1]]})
+        self.assertFalse(report.ok)
+        self.assertEqual([(k, 'Invalid input rectangle.') for k in range(4)],
+                         report.invalid_rooms)
+        report = validate_plan({'WORK': [[[0, 0, 1, 1]]]})
+        self.assertEqual([(0, 'Invalid input rectangle.')],
+                         report.invalid_rooms)
+        report = validate_plan({'WORK': np.array([[0, 0, 1, 1]])})
+        self.assertTrue(report.ok)
+
+    def test_not_evaluated(self):
+        report = validate_plan({'WORK': 5, 'MEET': 'a', 'CIRC': [[0, 0, 1, 1]],
+                                'core': [[1, 0, 2, 1]], 'wall': []})
+        self.assertFalse(report.ok)
+        self.assertEqual(['WORK', 'MEET'], report.invalid_values)
+        self.assertEqual(['core'], report.unscored_types)
+        self.assertEqual(2, report.num_rooms)
+        with self.assertRaises(TypeError):
+            report.check()
+        report = validate_plan({'CIRC': [[0, 0, 1, 1]], 'core': [[1, 0, 2, 1]]})
+        with self.assertRaises(KeyError):
+            evaluate({'CIRC': [[0, 0, 1, 1]], 'core': [[1, 0, 2, 1]]})
+        with self.assertRaises(KeyError):
+            report.check()
+
+    def test_arrays(self):
+        for plan in ({'WORK': [[0, 0, 1, 1], [0.5, 0, 2, 1]],
+                      'CIRC': [[0, 0, -1, 1]], 'core': [[5, 5, 6, 6]]},
+                     {'WORK': [[0, 0, 1, 1]]}, {}):
+            self.assertEqual(validate_plan(plan).as_dict(),
+                             validate_arrays(*plan_to_arrays(plan)).as_dict())
+
+    def test_empty(self):
+        with self.assertRaisesRegex(AssertionError, 'Empty'):
+            validate_plan({}).check()
+
+    def test_overlaps(self):
+        # Touching rectangles do not overlap.
+        coords = [[0, 0, 2, 2], [2, 0, 3, 2], [1, 1, 4, 4], [0, 2, 1, 3],
+                  [-1, -1, 0.5, 0.5]]
+        a, b, area = find_overlaps(coords)
+        self.assertEqual([(0, 2, 1), (0, 4, 0.25), (1, 2, 1)],
+                         list(zip(a.tolist(), b.tolist(), area.tolist())))
+        # Stacked rooms all overlap along x, only neighbors along y.
+        coords = [[0, y, 10, y + 2] for y in range(100)]
+        a, b, area = find_overlaps(coords)
+        self.assertEqual([(i, i + 1, 10) for i in range(99)],
+                         list(zip(a.tolist(), b.tolist(), area.tolist())))
+        self.assertEqual(0, len(find_overlaps([])[0]))
+
+    def test_overlaps_random(self):
+        rnd = random.Random(0)
+        coords = []
+        for _ in range(200):
+            x, y = rnd.randint(0, 50), rnd.randint(0, 50)
+            coords.append([x, y, x + rnd.randint(1, 8), y + rnd.randint(1, 8)])
+        expected = []
+        for (i, p), (j, q) in itertools.combinations(enumerate(coords), 2):
+            width = min(p[2], q[2]) - max(p[0], q[0])
+            height = min(p[3], q[3]) - max(p[1], q[1])
+            if width > 0 and height > 0:
+                expected.append((i, j, width * height))
+        a, b, area = find_overlaps(coords)
+        self.assertEqual(expected,
+                         list(zip(a.tolist(), b.tolist(), area.tolist())))
+
+    def test_test_data(self):
+        for name, floor_plan_json in load_plans():
+            self.assertTrue(validate_plan(floor_plan_json).ok, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
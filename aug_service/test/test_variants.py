@@ -0,0 +1,142 @@
+"""A unit test file to eval the variant evaluation."""
+import random
+import unittest
+from evaluation.eval_graph import evaluate, result_to_dict
+from evaluation.variants import VariantSet, evaluate_variants, score_deltas
+from test.helpers import load_plan
+
+
+def apply_diffs(floor_plan_json, diffs):
+    """Applies diffs to a copy of floor_plan_json the slow way."""
+    rooms = {}
+    for prog_type, recs in floor_plan_json.items():
+        for rec in recs:
+            rooms[len(rooms)] = (prog_type, rec)
+    next_id = len(rooms)
+    for diff in diffs:
+        if diff['op'] == 'add':
+            rooms[next_id] = (diff['type'], diff['shape'])
+            next_id += 1
+        elif diff['op'] == 'move':
+            rooms[diff['id']] = (rooms[diff['id']][0], diff['shape'])
+        elif diff['op'] == 'retype':
+            rooms[diff['id']] = (diff['type'], rooms[diff['id']][1])
+        else:
+            del rooms[diff['id']]
+    plan = {}
+    for prog_type, rec in rooms.values():
+        plan.setdefault(prog_type, []).append(rec)
+    return plan
+
+
+class TestVariantSet(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = load_plan('data7.json')
+
+    def assertScoresAlmostEqual(self, expected, actual):
+        self.assertEqual(sorted(expected), sorted(actual))
+        for key, val in expected.items():
+            if isinstance(val, dict):
+                self.assertScoresAlmostEqual(val, actual[key])
+            else:
+                self.assertAlmostEqual(val, actual[key], places=6)
+
+    def random_diffs(self, rnd, num_rooms, count):
+        diffs = []
+        ids = list(range(num_rooms))
+        for _ in range(count):
+            op = rnd.choice(['add', 'move', 'retype', 'remove'])
+            x, y = rnd.randint(0, 60), rnd.randint(0, 60)
+            shape = [x, y, x + rnd.randint(1, 9), y + rnd.randint(1, 9)]
+            prog_type = rnd.choice(['CIRC', 'WORK', 'MEET', 'ENTRANCE'])
+            if op == 'add':
+                diffs.append({'op': 'add', 'type': prog_type, 'shape': shape})
+                ids.append(num_rooms + sum(diff['op'] == 'add'
+                                           for diff in diffs) - 1)
+                continue
+            room_id = rnd.choice(ids)
+            if op == 'move':
+                diffs.append({'op': 'move', 'id': room_id, 'shape': shape})
+            elif op == 'retype':
+                diffs.append({'op': 'retype', 'id': room_id,
+                              'type': prog_type})
+            else:
+                diffs.append({'op': 'remove', 'id': room_id})
+                ids.remove(room_id)
+        return diffs
+
+    def test_variants(self):
+        variant_set = VariantSet(self.plan)
+        variant_set.floor_plan.ensure_exposure()
+        self.assertScoresAlmostEqual(result_to_dict(evaluate(self.plan)),
+                                     variant_set.base_scores)
+        rnd = random.Random(0)
+        num_rooms = sum(len(recs) for recs in self.plan.values())
+        for _ in range(30):
+            diffs = self.random_diffs(rnd, num_rooms, rnd.randint(1, 6))
+            self.assertScoresAlmostEqual(
+                result_to_dict(evaluate(apply_diffs(self.plan, diffs))),
+                variant_set.evaluate(diffs))
+
+        # The base plan is back as it was built.
+        base = VariantSet(self.plan).floor_plan
+        base.ensure_exposure()
+        floor_plan = variant_set.floor_plan
+        self.assertEqual(base.adj_graph, floor_plan.adj_graph)
+        self.assertEqual(base.exposure, floor_plan.exposure)
+        self.assertEqual(base.type_rooms, floor_plan.type_rooms)
+        self.assertEqual(base.result(), floor_plan.result())
+
+    def test_room_ids(self):
+        plan = {'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]], 'CIRC': [[0, 1, 2, 2]]}
+        # Room 2 takes the index of the removed room 0, room 3 is added and
+        # then moved by its id.
+        diffs = [{'op': 'remove', 'id': 0},
+                 {'op': 'add', 'type': 'ENTRANCE', 'shape': [2, 0, 3, 1]},
+                 {'op': 'retype', 'id': 2, 'type': 'MEET'},
+                 {'op': 'move', 'id': 3, 'shape': [2, 0, 3, 2]},
+                 {'op': 'remove', 'id': 1}]
+        self.assertEqual(
+            result_to_dict(evaluate({'MEET': [[0, 1, 2, 2]],
+                                     'ENTRANCE': [[2, 0, 3, 2]]})),
+            VariantSet(plan).evaluate(diffs))
+
+    def test_compare(self):
+        plan = {'WORK': [[0, 0, 1, 1], [1, 0, 2, 1]], 'CIRC': [[0, 1, 2, 2]]}
+        comparison = evaluate_variants(plan, [
+            [{'op': 'retype', 'id': 1, 'type': 'MEET'}],
+            [{'op': 'remove', 'id': 0}, {'op': 'move', 'id': 0,
+                                         'shape': [0, 0, 1, 1]}],
+            [{'op': 'add', 'type': 'WORK', 'shape': [1, 1, 0, 0]}],
+            [],
+            [{'op': 'move', 'id': 0, 'shape': [0, 0, 1]}],
+            [{'op': 'retype', 'id': 0, 'type': 'core'}],
+            5])
+        base = comparison['base']
+        retyped = result_to_dict(evaluate({'WORK': [[0, 0, 1, 1]],
+                                           'MEET': [[1, 0, 2, 1]],
+                                           'CIRC': [[0, 1, 2, 2]]}))
+        self.assertEqual({'scores': retyped,
+                          'deltas': score_deltas(base, retyped)},
+                         comparison['variants'][0])
+        self.assertEqual({'MEET': -1, 'WORK': 1},
+                         {key: val for key, val in comparison['variants'][0][
+                             'deltas']['size_score'].items() if val})
+        self.assertEqual(['error'], list(comparison['variants'][1]))
+        self.assertIn('Invalid diff 1', comparison['variants'][1]['error'])
+        self.assertIn('Invalid diff 0', comparison['variants'][2]['error'])
+        self.assertEqual(0, comparison['variants'][3]['deltas']['meet_score'])
+        self.assertIn('Invalid diff 0', comparison['variants'][4]['error'])
+        self.assertIn('Invalid diff 0', comparison['variants'][5]['error'])
+        self.assertIn('Invalid variant', comparison['variants'][6]['error'])
+        # Failed variants leave the base plan as it was.
+        self.assertEqual(base, VariantSet(plan).evaluate([]))
+
+    def test_invalid_base(self):
+        with self.assertRaises(KeyError):
+            VariantSet({'WORK': [[0, 0, 1, 1]], 'core': [[1, 0, 2, 1]]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,34 @@ import axios from 'axios';
 
 
 const dataServer = ' http://127.0.0.1:5000';
+const liveUrl = `${dataServer}/data_server/evaluation/live`;
 
 export default {
-  fetchEvaluationResult: (inputJson) => axios.get(`${dataServer}/data_server/evaluation?floor_plan=${inputJson}`).then((response) => response.data),
-};
+  fetchEvaluationResult: (inputJson) => axios.post(`${dataServer}/data_server/evaluation`, inputJson, {
+    headers: { 'Content-Type': 'application/json' },
+  }).then((response) => response.data),
+
+  // Opens a live session on a floor plan, resolves to { session, scores }.
+  createLiveSession: (inputJson) => axios.post(liveUrl, inputJson, {
+    headers: { 'Content-Type': 'application/json' },
+  }).then((response) => response.data),
+
+  // Sends room diffs, e.g. { op: 'move', id: 3, shape: [0, 0, 10, 10] },
+  // resolves to { ids, version } with the ids of the added rooms.
+  sendLiveDiffs: (session, diffs) => axios.post(`${liveUrl}/${session}`, diffs, {
+    headers: { 'Content-Type': 'application/json' },
+  }).then((response) => response.data),
 
+  // Calls onScores(scores, version) with the changed scores after each burst
+  // of edits. Returns the EventSource, close() it to stop.
+  subscribeLiveScores: (session, onScores) => {
+    const source = new EventSource(`${liveUrl}/${session}/events`);
+    source.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      onScores(data.scores, data.version);
+    };
+    return source;
+  },
+
+  closeLiveSession: (session) => axios.delete(`${liveUrl}/${session}`),
+};